@@ -1,11 +1,15 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Header
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Header, Request
 from typing import Optional, List
 from bson import ObjectId
 from datetime import datetime, timezone
 import logging
-from ..models import ScrapeResponse, WineResponse, WineUpdateRequest, AddTikTokPostRequest
+from ..models import ScrapeResponse, WineResponse, WineUpdateRequest, AddTikTokPostRequest, AddTikTokPostsRequest
 from ..jobs.daily_scraper import run_scraping_job
+from ..jobs.job_queue import job_queue, serialize_job
 from ..database import get_database
+from ..services.wine_cache import wine_cache
+from .caching import cached_json_response
+from .serialization import FastJSONResponse, encode_wine_documents
 from ..config import settings
 
 router = APIRouter()
@@ -33,31 +37,18 @@ async def trigger_scrape(background_tasks: BackgroundTasks):
     )
 
 
-@router.get("/wines", response_model=List[WineResponse])
-async def get_all_wines_admin(authorization: Optional[str] = Header(None)):
+@router.get("/wines", response_class=FastJSONResponse, responses={200: {"model": List[WineResponse]}})
+async def get_all_wines_admin(request: Request, authorization: Optional[str] = Header(None)):
     """Get all wines with full details for admin editing"""
     verify_admin_auth(authorization)
     
-    db = get_database()
-    wines = []
+    if wine_cache.ready:
+        return cached_json_response(request, "admin:wines", lambda: (wine_cache.get(), {}))
     
-    async for wine in db.wines.find({}).sort("date_found", -1):
-        wines.append(WineResponse(
-            id=str(wine["_id"]),
-            name=wine["name"],
-            supermarket=wine["supermarket"],
-            wine_type=wine["wine_type"],
-            image_url=wine.get("image_url"),
-            image_urls=wine.get("image_urls"),
-            rating=wine.get("rating"),
-            influencer_source=wine["influencer_source"],
-            post_url=wine["post_url"],
-            date_found=wine["date_found"],
-            in_stock=wine.get("in_stock"),
-            description=wine.get("description")
-        ))
+    db = get_database()
+    wines = await db.wines.find({}).sort("date_found", -1).to_list(length=None)
     
-    return wines
+    return FastJSONResponse(encode_wine_documents(wines))
 
 
 @router.put("/wines/{wine_id}")
@@ -102,12 +93,14 @@ async def update_wine(
     # Update in database
     result = await db.wines.update_one(
         {"_id": obj_id},
-        {"$set": update_doc}
+        {"$set": update_doc, "$currentDate": {"updated_at": True}}
     )
     
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Wine not found")
     
+    await wine_cache.refresh(db, obj_id)
+    
     return {"status": "success", "message": "Wine updated successfully"}
 
 
@@ -129,6 +122,8 @@ async def delete_wine(wine_id: str, authorization: Optional[str] = Header(None))
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Wine not found")
     
+    wine_cache.remove(obj_id)
+    
     return {"status": "success", "message": "Wine deleted successfully"}
 
 
@@ -137,134 +132,59 @@ async def add_tiktok_post(
     request: AddTikTokPostRequest,
     authorization: Optional[str] = Header(None)
 ):
-    """Process a single TikTok URL and extract wines"""
+    """Queue a TikTok URL for ingestion; poll /jobs/{job_id} for the result"""
     verify_admin_auth(authorization)
-    
-    # Import here to avoid circular dependencies
-    from ..scrapers.tiktok_oembed_scraper import TikTokOEmbedScraper
-    from ..services.video_downloader import TikTokVideoDownloader
-    from ..services.transcription import transcribe_video_audio
-    from ..services.wine_extractor import extract_wines_from_caption_and_transcription
-    from ..services.frame_extractor import extract_frames_at_times
-    from ..services.wine_timing import find_wine_mention_with_signal, get_optimal_frame_times, get_fallback_frame_times
-    from ..services.cloudinary_upload import upload_wine_image
-    
     db = get_database()
-    tiktok_url = request.tiktok_url
-    
-    try:
-        # 1. Fetch video metadata
-        scraper = TikTokOEmbedScraper()
-        video_data = scraper.get_video_data(tiktok_url)
-        
-        if not video_data:
-            raise HTTPException(status_code=400, detail="Failed to fetch TikTok video data")
-        
-        caption = video_data.get("caption", "")
-        
-        # 2. Download video (both audio for transcription and full video for frames)
-        downloader = TikTokVideoDownloader()
-        
-        # Download audio for transcription
-        audio_result = downloader.download_video_audio(tiktok_url)
-        if not audio_result:
-            raise HTTPException(status_code=400, detail="Failed to download audio")
-        audio_path, post_date = audio_result
-        
-        # Download full video for frame extraction
-        video_path = downloader.download_full_video(tiktok_url)
-        if not video_path:
-            raise HTTPException(status_code=400, detail="Failed to download video")
-        
-        # 3. Transcribe audio
-        transcription_result = transcribe_video_audio(audio_path)
-        if not transcription_result or transcription_result.get("status") != "success":
-            raise HTTPException(status_code=400, detail="Transcription failed")
-        
-        transcription_text = transcription_result.get("text", "")
-        segments = transcription_result.get("segments", [])
-        
-        # 4. Extract wines
-        wines = extract_wines_from_caption_and_transcription(caption, transcription_text)
-        
-        if not wines:
-            return {
-                "status": "no_wines",
-                "message": "No wines found in this video",
-                "wines_added": 0
-            }
-        
-        wines_added = 0
-        
-        # 5. Process each wine
-        for wine_data in wines:
-            # Check if this video already has a wine (one wine per video)
-            # Using post_url as unique identifier allows safe editing of all fields
-            existing = await db.wines.find_one({
-                "post_url": tiktok_url
-            })
-            
-            if existing:
-                continue  # Skip duplicates
-            
-            # Find optimal frame times using signal words
-            wine_name = wine_data["name"]
-            timestamp, method = find_wine_mention_with_signal(wine_name, segments)
-            
-            if timestamp:
-                # Get video duration from transcription
-                video_duration = segments[-1]['end'] if segments else 30.0
-                frame_times = get_optimal_frame_times(timestamp, video_duration)
-            else:
-                # Fallback if wine not found in transcription
-                video_duration = segments[-1]['end'] if segments else 30.0
-                frame_times = get_fallback_frame_times(video_duration)
-            
-            # Extract frames
-            frame_paths = extract_frames_at_times(video_path, frame_times)
-            
-            # Upload to Cloudinary
-            # Generate a temporary wine_id for uploads (will be replaced by MongoDB _id)
-            import hashlib
-            temp_wine_id = hashlib.md5(f"{tiktok_url}_{wine_data['name']}".encode()).hexdigest()[:16]
-            
-            image_urls = []
-            for i, frame_path in enumerate(frame_paths):
-                cloudinary_url = upload_wine_image(frame_path, temp_wine_id, i)
-                if cloudinary_url:
-                    image_urls.append(cloudinary_url)
-            
-            # Save to database
-            wine_doc = {
-                "name": wine_data["name"],
-                "supermarket": wine_data["supermarket"],
-                "wine_type": wine_data["wine_type"],
-                "image_urls": image_urls,
-                "rating": wine_data.get("rating"),
-                "description": wine_data.get("description"),
-                "influencer_source": video_data.get("author_name", "manual_add") + "_tiktok",
-                "post_url": tiktok_url,
-                "date_found": datetime.now(timezone.utc),
-                "in_stock": None,
-                "last_checked": None
-            }
-            
-            await db.wines.insert_one(wine_doc)
-            wines_added += 1
-        
-        return {
-            "status": "success",
-            "message": f"Successfully added {wines_added} wine(s)",
-            "wines_added": wines_added,
-            "wines": [{"name": w["name"], "supermarket": w["supermarket"]} for w in wines]
-        }
-        
-    except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        print(f"Error processing TikTok post: {error_trace}")
-        logger.error(f"Error processing TikTok post: {error_trace}")
-        raise HTTPException(status_code=500, detail=f"Error processing TikTok post: {str(e)}")
+
+    job_id = await job_queue.enqueue(db, "add_tiktok_post", {"tiktok_url": request.tiktok_url})
+    return {
+        "status": "queued",
+        "message": "TikTok post queued for processing",
+        "job_id": job_id,
+    }
+
+
+@router.post("/add-tiktok-posts")
+async def add_tiktok_posts(
+    request: AddTikTokPostsRequest,
+    authorization: Optional[str] = Header(None)
+):
+    """Queue many TikTok URLs for ingestion as one job; known URLs are skipped"""
+    verify_admin_auth(authorization)
+    db = get_database()
+
+    job_id = await job_queue.enqueue(db, "bulk_add_tiktok_posts", {
+        "tiktok_urls": request.tiktok_urls,
+        "include_processed": request.include_processed,
+    })
+    return {
+        "status": "queued",
+        "message": f"{len(request.tiktok_urls)} TikTok post(s) queued for processing",
+        "job_id": job_id,
+    }
+
+
+@router.get("/jobs/{job_id}", response_class=FastJSONResponse)
+async def get_job(job_id: str, authorization: Optional[str] = Header(None)):
+    """Status, current stage and result of a background job"""
+    verify_admin_auth(authorization)
+    db = get_database()
+
+    job = await job_queue.get(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse(serialize_job(job))
+
+
+@router.get("/jobs", response_class=FastJSONResponse)
+async def list_jobs(limit: int = 20, authorization: Optional[str] = Header(None)):
+    """Most recent background jobs, newest first"""
+    verify_admin_auth(authorization)
+    db = get_database()
+
+    limit = max(1, min(limit, 100))
+    jobs = await db.jobs.find().sort("created_at", -1).limit(limit).to_list(limit)
+    return FastJSONResponse([serialize_job(job) for job in jobs])
 
 
 @router.post("/wines/{wine_id}/duplicate")
@@ -320,6 +240,7 @@ async def duplicate_wine(wine_id: str, suffix: Optional[str] = "2", authorizatio
     new_doc["date_found"] = datetime.now(timezone.utc)
 
     result = await db.wines.insert_one(new_doc)
+    await wine_cache.refresh(db, result.inserted_id)
 
     return {
         "status": "success",
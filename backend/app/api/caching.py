@@ -0,0 +1,116 @@
+"""
+Conditional, precompressed JSON responses for catalogue endpoints.
+
+Responses are keyed by the catalogue version from the wine read model:
+- A strong ETag is derived from (version, variant), so polling clients get
+  a 304 until the next write.
+- Encoded bodies (identity/gzip/brotli) are cached per variant and version,
+  so each representation is serialized and compressed once per write.
+"""
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from fastapi import Request, Response
+from ..services.wine_cache import wine_cache
+from .serialization import dumps
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+MAX_CACHED_BODIES = 256
+
+# (variant, accepted encoding) -> (version, body, actual encoding, extra headers)
+_bodies: "OrderedDict[Tuple[str, str], Tuple[str, bytes, str, Dict[str, str]]]" = OrderedDict()
+
+
+def _choose_encoding(accept_encoding: str) -> str:
+    accepted = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def _etag(version: str, variant: str, encoding: str) -> str:
+    digest = hashlib.sha1(f"{version}|{variant}".encode()).hexdigest()[:16]
+    # Each content-coding is a different representation and needs its own strong tag
+    suffix = "" if encoding == "identity" else f"-{encoding}"
+    return f'"{digest}{suffix}"'
+
+
+def _matches(if_none_match: Optional[str], version: str, variant: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    known = {_etag(version, variant, enc) for enc in ("identity", "gzip", "br")}
+    return bool(candidates & known)
+
+
+def cached_json_response(
+    request: Request,
+    variant: str,
+    build: Callable[[], Tuple[object, Dict[str, str]]],
+) -> Response:
+    """
+    Return a conditional, possibly compressed JSON response for the current
+    catalogue version.
+
+    Args:
+        request: Incoming request (If-None-Match / Accept-Encoding)
+        variant: Key identifying this representation (path + relevant params)
+        build: Produces (payload, extra_headers) on a cache miss
+    """
+    version = wine_cache.version
+    encoding = _choose_encoding(request.headers.get("accept-encoding", ""))
+    headers = {
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+    if _matches(request.headers.get("if-none-match"), version, variant):
+        headers["ETag"] = _etag(version, variant, encoding)
+        return Response(status_code=304, headers=headers)
+
+    key = (variant, encoding)
+    cached = _bodies.get(key)
+    if cached and cached[0] == version:
+        _bodies.move_to_end(key)
+        _, body, encoding, extra_headers = cached
+    else:
+        payload, extra_headers = build()
+        body = dumps(payload)
+        if len(body) < MIN_COMPRESS_BYTES:
+            encoding = "identity"
+        body = _compress(body, encoding)
+        _bodies[key] = (version, body, encoding, extra_headers)
+        _bodies.move_to_end(key)
+        while len(_bodies) > MAX_CACHED_BODIES:
+            _bodies.popitem(last=False)
+
+    headers.update(extra_headers)
+    headers["ETag"] = _etag(version, variant, encoding)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def request_variant(request: Request) -> str:
+    """Stable variant key from the path and sorted query parameters."""
+    params = sorted(request.query_params.multi_items())
+    return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
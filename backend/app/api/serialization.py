@@ -0,0 +1,92 @@
+"""
+Fast-path JSON serialization for wine lists.
+
+FastAPI's default path validates every row into a Pydantic model and then
+walks the result again in `jsonable_encoder` before `json.dumps`. For wine
+lists that is the dominant CPU cost once Mongo is cached. Here we go from
+Mongo documents (or already-serialized read-model rows) straight to bytes:
+- a precompiled field mapping in WineResponse field order
+- ObjectId and datetime conversion in one pass per document
+- one C-level `json.dumps` call for the whole list
+
+Output is byte-for-byte what the Pydantic path produces for WineResponse.
+"""
+import json
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Tuple
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+# (output key, document key) in WineResponse field order
+WINE_FIELD_MAP: Tuple[Tuple[str, str], ...] = (
+    ("id", "_id"),
+    ("name", "name"),
+    ("supermarket", "supermarket"),
+    ("wine_type", "wine_type"),
+    ("image_url", "image_url"),
+    ("image_urls", "image_urls"),
+    ("rating", "rating"),
+    ("influencer_source", "influencer_source"),
+    ("post_url", "post_url"),
+    ("date_found", "date_found"),
+    ("in_stock", "in_stock"),
+    ("description", "description"),
+)
+
+
+def encode_datetime(value: datetime) -> str:
+    """ISO-8601 like Pydantic v2: naive stays naive, UTC is written as Z."""
+    if value.tzinfo is not None and value.utcoffset() == timezone.utc.utcoffset(None):
+        return value.replace(tzinfo=None).isoformat() + "Z"
+    return value.isoformat()
+
+
+def _default(value: Any):
+    # Only called by json.dumps for types it cannot encode itself
+    if isinstance(value, datetime):
+        return encode_datetime(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a JSON payload with the same formatting as FastAPI's JSONResponse."""
+    return json.dumps(
+        payload,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def wine_rows(docs: Iterable[Dict]) -> List[Dict]:
+    """Map Mongo wine documents to WineResponse-shaped rows in one pass."""
+    rows = []
+    for doc in docs:
+        row = {out: doc.get(key) for out, key in WINE_FIELD_MAP}
+        row["id"] = str(row["id"])
+        rows.append(row)
+    return rows
+
+
+def encode_wine_documents(docs: Iterable[Dict]) -> bytes:
+    """Mongo wine documents straight to JSON bytes."""
+    return dumps(wine_rows(docs))
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse that encodes with `dumps` and passes pre-encoded bytes
+    through untouched. Return it directly from a route to skip response_model
+    validation and `jsonable_encoder`.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return dumps(content)
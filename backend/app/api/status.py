@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from datetime import datetime
 from typing import Optional
 from ..database import get_database
+from .serialization import FastJSONResponse
 
 router = APIRouter()
 
@@ -16,7 +17,7 @@ scraping_status = {
 }
 
 
-@router.get("/status")
+@router.get("/status", response_class=FastJSONResponse)
 async def get_scraping_status():
     """Get current scraping status and recent activity"""
     db = get_database()
@@ -35,7 +36,7 @@ async def get_scraping_status():
     total_wines = await db.wines.count_documents({})
     real_wines = await db.wines.count_documents({"influencer_source": {"$ne": "test_data"}})
     
-    return {
+    return FastJSONResponse({
         "scraping": scraping_status,
         "database": {
             "total_wines": total_wines,
@@ -43,7 +44,7 @@ async def get_scraping_status():
             "test_wines": total_wines - real_wines
         },
         "recent_wines": recent_wines
-    }
+    })
 
 
 @router.get("/logs")
@@ -1,60 +1,180 @@
-from fastapi import APIRouter, Query
-from typing import Optional, List
+import base64
+import json
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional, List, Dict, Tuple
+from bson import ObjectId
 from ..database import get_database
 from ..models import WineResponse, Supermarket, WineType
+from ..services.wine_cache import wine_cache
+from ..services.wine_facets import get_wine_facets, count_for
+from .caching import cached_json_response, request_variant
+from .serialization import FastJSONResponse, wine_rows
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+WINE_FIELDS = list(WineResponse.model_fields.keys())
 
-@router.get("/wines", response_model=List[WineResponse])
+
+def _encode_cursor(date_found: datetime, wine_id: str) -> str:
+    """Opaque keyset cursor for the (date_found, _id) position of the last row."""
+    raw = json.dumps({"d": date_found.isoformat(), "i": wine_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        date_found = datetime.fromisoformat(data["d"])
+        wine_id = str(ObjectId(data["i"]))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return date_found, wine_id
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse the fields= projection; `id` is always returned."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in WINE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [f for f in requested if f != "id"]
+
+
+def _page_from_cache(
+    supermarket: Optional[str],
+    wine_type: Optional[str],
+    after: Optional[Tuple[datetime, str]],
+    limit: int
+) -> Tuple[List[Dict], bool]:
+    view = wine_cache.get(supermarket, wine_type)
+    start = 0
+    if after:
+        # View is sorted newest first; binary search the first row past the cursor
+        lo, hi = 0, len(view)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if (view[mid]["date_found"], view[mid]["id"]) >= after:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = lo
+    page = view[start:start + limit]
+    return page, start + limit < len(view)
+
+
+async def _page_from_db(
+    query: Dict,
+    after: Optional[Tuple[datetime, str]],
+    limit: int,
+    fields: Optional[List[str]]
+) -> Tuple[List[Dict], bool]:
+    db = get_database()
+    if after:
+        date_found, wine_id = after
+        query = {**query, "$or": [
+            {"date_found": {"$lt": date_found}},
+            {"date_found": date_found, "_id": {"$lt": ObjectId(wine_id)}},
+        ]}
+    
+    # Push the projection down to Mongo; date_found is needed for the cursor
+    projection = None
+    if fields:
+        projection = {f: 1 for f in fields if f != "id"}
+        projection["date_found"] = 1
+    
+    cursor = db.wines.find(query, projection).sort([("date_found", -1), ("_id", -1)]).limit(limit + 1)
+    docs = await cursor.to_list(length=limit + 1)
+    # Projected rows carry None for unrequested fields; _finish_page trims them
+    return wine_rows(docs[:limit]), len(docs) > limit
+
+
+def _finish_page(wines: List[Dict], has_more: bool, field_list: Optional[List[str]]) -> Tuple[List[Dict], Dict[str, str]]:
+    headers = {}
+    if has_more and wines:
+        last = wines[-1]
+        headers["X-Next-Cursor"] = _encode_cursor(last["date_found"], last["id"])
+    if field_list:
+        wines = [{f: w.get(f) for f in field_list} for w in wines]
+    return wines, headers
+
+
+@router.get("/wines", response_class=FastJSONResponse, responses={200: {"model": List[WineResponse]}})
 async def get_wines(
+    request: Request,
     supermarket: Optional[Supermarket] = None,
-    wine_type: Optional[WineType] = Query(None, alias="type")
+    wine_type: Optional[WineType] = Query(None, alias="type"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. name,supermarket,image_urls")
 ):
-    """Get wines filtered by supermarket and/or wine type"""
-    db = get_database()
+    """
+    Get wines filtered by supermarket and/or wine type, newest first.
+    
+    Paginated by keyset on (date_found, _id): when more rows exist the
+    response carries an `X-Next-Cursor` header to pass back as `cursor`.
+    Supports `If-None-Match` against the catalogue version ETag.
+    """
+    supermarket_value = supermarket.value if supermarket else None
+    wine_type_value = wine_type.value if wine_type else None
+    after = _decode_cursor(cursor) if cursor else None
+    field_list = _parse_fields(fields)
+    
+    # Serve from the in-memory read model when it is built
+    if wine_cache.ready:
+        def build():
+            wines, has_more = _page_from_cache(supermarket_value, wine_type_value, after, limit)
+            return _finish_page(wines, has_more, field_list)
+        return cached_json_response(request, request_variant(request), build)
     
     # Build query
     query = {}
-    if supermarket:
-        query["supermarket"] = supermarket.value
-    if wine_type:
-        query["wine_type"] = wine_type.value
-    
-    # Fetch wines
-    wines = []
-    async for wine in db.wines.find(query).sort("date_found", -1).limit(100):
-        wines.append(WineResponse(
-            id=str(wine["_id"]),
-            name=wine["name"],
-            supermarket=wine["supermarket"],
-            wine_type=wine["wine_type"],
-            image_url=wine.get("image_url"),
-            image_urls=wine.get("image_urls"),
-            rating=wine.get("rating"),
-            influencer_source=wine["influencer_source"],
-            post_url=wine["post_url"],
-            date_found=wine["date_found"],
-            in_stock=wine.get("in_stock"),
-            description=wine.get("description")
-        ))
+    if supermarket_value:
+        query["supermarket"] = supermarket_value
+    if wine_type_value:
+        query["wine_type"] = wine_type_value
+    wines, has_more = await _page_from_db(query, after, limit, field_list)
     
-    return wines
+    wines, headers = _finish_page(wines, has_more, field_list)
+    return FastJSONResponse(wines, headers=headers)
+
+
+@router.get("/wines/search", response_class=FastJSONResponse, responses={200: {"model": List[WineResponse]}})
+async def search_wines(
+    q: str = Query(..., min_length=1, max_length=200),
+    supermarket: Optional[Supermarket] = None,
+    wine_type: Optional[WineType] = Query(None, alias="type"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Search wine names, descriptions, ratings and supermarkets (accent-insensitive, typo-tolerant)"""
+    if not wine_cache.ready:
+        raise HTTPException(status_code=503, detail="Search index is not ready")
+    return FastJSONResponse(wine_cache.search(
+        q,
+        supermarket=supermarket.value if supermarket else None,
+        wine_type=wine_type.value if wine_type else None,
+        limit=limit
+    ))
+
+
+@router.get("/wines/facets")
+async def get_facets():
+    """Per-supermarket, wine type, influencer and stock counts for the filters"""
+    return await get_wine_facets(get_database())
 
 
 @router.get("/supermarkets")
 async def get_supermarkets():
-    """Get list of available supermarkets"""
+    """Get list of available supermarkets with their wine counts"""
+    facets = await get_wine_facets(get_database())
     return {
         "supermarkets": [
-            {"name": "Albert Heijn", "value": "Albert Heijn"},
-            {"name": "Dirk", "value": "Dirk"},
-            {"name": "HEMA", "value": "HEMA"},
-            {"name": "LIDL", "value": "LIDL"},
-            {"name": "Jumbo", "value": "Jumbo"},
-            {"name": "ALDI", "value": "ALDI"},
-            {"name": "Plus", "value": "Plus"},
-            {"name": "Sligro", "value": "Sligro"}
+            {"name": sm.value, "value": sm.value, "count": count_for(facets, "supermarket", sm.value)}
+            for sm in Supermarket
         ]
     }
-
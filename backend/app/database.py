@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from .config import settings
+from .indexes import ensure_indexes
 
 client = None
 db = None
@@ -10,6 +11,11 @@ async def connect_to_mongo():
     client = AsyncIOMotorClient(settings.mongodb_uri)
     db = client.vinly
     print("Connected to MongoDB")
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        # Never block startup on index maintenance
+        print(f"Index reconciliation failed: {e}")
 
 
 async def close_mongo_connection():
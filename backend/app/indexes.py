@@ -0,0 +1,126 @@
+"""
+MongoDB index declarations and startup reconciliation.
+
+Every query shape the app and scripts run often is declared here once.
+`ensure_indexes` creates what is missing, rebuilds indexes whose definition
+drifted, and reports undeclared or unused indexes. It is idempotent and
+runs on every startup.
+"""
+import logging
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "wines": [
+        # Dedup lookups before insert; one wine per post_url
+        IndexModel([("post_url", ASCENDING)], name="post_url_unique", unique=True),
+        # Listing: find(filter).sort(date_found desc, _id desc)
+        IndexModel([("date_found", DESCENDING), ("_id", DESCENDING)], name="date_found_id"),
+        IndexModel(
+            [("supermarket", ASCENDING), ("date_found", DESCENDING), ("_id", DESCENDING)],
+            name="supermarket_date_found_id",
+        ),
+        IndexModel(
+            [("wine_type", ASCENDING), ("date_found", DESCENDING), ("_id", DESCENDING)],
+            name="wine_type_date_found_id",
+        ),
+        IndexModel(
+            [("supermarket", ASCENDING), ("wine_type", ASCENDING), ("date_found", DESCENDING), ("_id", DESCENDING)],
+            name="supermarket_wine_type_date_found_id",
+        ),
+        # Read model change detection: newest updated_at (set by every wine update)
+        IndexModel([("updated_at", DESCENDING)], name="updated_at"),
+    ],
+    "processed_videos": [
+        # update_one({"video_url": ...}) after every transcription / extraction
+        IndexModel([("video_url", ASCENDING)], name="video_url"),
+        # find({"tiktok_handle": ...}) when diffing a profile against processed videos
+        IndexModel([("tiktok_handle", ASCENDING), ("processed_date", DESCENDING)], name="tiktok_handle_processed_date"),
+        # Transcription / extraction queues, optionally per handle
+        IndexModel(
+            [("is_wine_content", ASCENDING), ("transcription_status", ASCENDING), ("tiktok_handle", ASCENDING)],
+            name="wine_content_transcription_status_handle",
+        ),
+    ],
+    "influencers": [
+        IndexModel([("tiktok_handle", ASCENDING)], name="tiktok_handle"),
+    ],
+    "tiktok_influencers": [
+        IndexModel([("is_active", ASCENDING)], name="is_active"),
+    ],
+    "oembed_cache": [
+        # Mongo drops cached oEmbed responses once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "jobs": [
+        # Workers claim the oldest queued job: find_one_and_update({status}, sort created_at)
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+        # Admin job list, newest first
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+}
+
+# Options that make two indexes with the same keys different
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def _same_definition(declared: Dict, existing: Dict) -> bool:
+    if list(declared["key"].items()) != [(k, v) for k, v in existing["key"]]:
+        return False
+    return all(declared.get(opt) == existing.get(opt) for opt in _COMPARED_OPTIONS)
+
+
+async def ensure_indexes(db) -> Dict:
+    """
+    Create missing declared indexes and rebuild drifted ones.
+
+    Returns:
+        Report per collection: created, rebuilt, failed, undeclared, unused
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        entry = {"created": [], "rebuilt": [], "failed": [], "undeclared": [], "unused": []}
+
+        for model in models:
+            declared = model.document
+            name = declared["name"]
+            current = existing.get(name)
+            if current and _same_definition(declared, current):
+                continue
+            try:
+                if current:
+                    await collection.drop_index(name)
+                await collection.create_indexes([model])
+                entry["rebuilt" if current else "created"].append(name)
+            except OperationFailure as e:
+                # e.g. unique index over existing duplicate post_urls
+                entry["failed"].append(name)
+                logger.error(f"Could not create index {collection_name}.{name}: {e}")
+
+        declared_names = {m.document["name"] for m in models}
+        entry["undeclared"] = [n for n in existing if n != "_id_" and n not in declared_names]
+        entry["unused"] = await _unused_indexes(collection)
+        report[collection_name] = entry
+
+        for key in ("created", "rebuilt", "undeclared", "unused"):
+            if entry[key]:
+                logger.info(f"Indexes {key} on {collection_name}: {', '.join(entry[key])}")
+    return report
+
+
+async def _unused_indexes(collection) -> List[str]:
+    """Indexes with zero recorded accesses since the server last started."""
+    unused = []
+    try:
+        async for stat in collection.aggregate([{"$indexStats": {}}]):
+            if stat["name"] != "_id_" and stat.get("accesses", {}).get("ops", 0) == 0:
+                unused.append(stat["name"])
+    except OperationFailure as e:
+        # $indexStats needs clusterMonitor-like privileges on some deployments
+        logger.debug(f"$indexStats unavailable on {collection.name}: {e}")
+    return unused
@@ -1,9 +1,10 @@
 import asyncio
 from datetime import datetime, timezone
 from ..database import get_database
-from ..scrapers.tiktok_oembed_scraper import TikTokOEmbedScraper
+from ..scrapers.oembed_client import OEmbedClient
 from ..services.wine_extractor import extract_wines_from_text
 from ..services.inventory_updater import update_inventory_status, mark_stale_wines
+from ..services.wine_cache import wine_cache
 
 
 async def process_tiktok_videos(tiktok_handle: str, video_urls: list) -> int:
@@ -16,11 +17,9 @@ async def process_tiktok_videos(tiktok_handle: str, video_urls: list) -> int:
     
     print(f"Processing TikTok: @{tiktok_handle}")
     
-    # Initialize TikTok scraper
-    scraper = TikTokOEmbedScraper()
-    
-    # Scrape videos using oEmbed API
-    videos = scraper.scrape_profile_videos(tiktok_handle, video_urls)
+    # Scrape videos using oEmbed API (concurrent and cached, without blocking the loop)
+    async with OEmbedClient(db) as scraper:
+        videos = await scraper.scrape_profile_videos(tiktok_handle, video_urls)
     
     for video in videos:
         # Get caption
@@ -56,7 +55,8 @@ async def process_tiktok_videos(tiktok_handle: str, video_urls: list) -> int:
                     "last_checked": None
                 }
                 
-                await db.wines.insert_one(wine_doc)
+                result = await db.wines.insert_one(wine_doc)
+                await wine_cache.refresh(db, result.inserted_id)
                 wines_added += 1
                 print(f"Added wine: {wine_data['name']}")
     
@@ -116,6 +116,10 @@ async def run_scraping_job():
     except Exception as e:
         print(f"Error updating inventory: {e}")
     
+    # Bulk stock updates touch many wines; reload the read model in one go
+    if wine_cache.ready:
+        await wine_cache.rebuild(db)
+    
     print(f"Scraping job completed. Total wines added: {total_wines_added}")
     return total_wines_added
 
@@ -0,0 +1,333 @@
+"""
+Mongo-backed background job queue.
+
+Long-running admin work (single and bulk TikTok ingestion) is enqueued as a
+document in the `jobs` collection and picked up by a small pool of asyncio
+workers. Workers claim jobs atomically with find_one_and_update, so several
+API processes can share one queue. Handlers report progress through a
+callback that writes the current stage to the job document, which the admin
+UI polls.
+
+A claimed job carries a lease (lease_token, lease_expires_at) that its
+worker renews while it runs. A job whose lease expired belongs to a process
+that died: it is requeued, or failed once it has used `jobs.max_attempts`.
+Jobs still held by a live process are never touched, and a worker that lost
+its lease cannot overwrite the job any more.
+
+Job document:
+    type, payload, status (queued | running | succeeded | failed),
+    stage, message, history [{stage, message, at}] (latest jobs.history_limit),
+    result, error,
+    attempts, lease_token, lease_expires_at,
+    created_at, started_at, finished_at, updated_at
+"""
+import asyncio
+import logging
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from ..services.ingestion import IngestionError, ingest_tiktok_post, ingest_tiktok_posts
+from ..utils.config_loader import config
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+async def _add_tiktok_post(db, payload: Dict, progress) -> Dict:
+    return await ingest_tiktok_post(db, payload["tiktok_url"], progress)
+
+
+async def _bulk_add_tiktok_posts(db, payload: Dict, progress) -> Dict:
+    return await ingest_tiktok_posts(
+        db,
+        payload["tiktok_urls"],
+        progress,
+        include_processed=payload.get("include_processed", True),
+    )
+
+
+# job type -> async handler(db, payload, progress) returning a JSON-able result
+HANDLERS: Dict[str, Callable[..., Awaitable[Dict]]] = {
+    "add_tiktok_post": _add_tiktok_post,
+    "bulk_add_tiktok_posts": _bulk_add_tiktok_posts,
+}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _settings() -> Dict:
+    return config.scraping_settings.get("jobs", {}) or {}
+
+
+def serialize_job(doc: Dict) -> Dict:
+    """Job document as returned by the admin API."""
+    return {
+        "id": str(doc["_id"]),
+        "type": doc.get("type"),
+        "status": doc.get("status"),
+        "stage": doc.get("stage"),
+        "message": doc.get("message"),
+        "history": doc.get("history", []),
+        "result": doc.get("result"),
+        "error": doc.get("error"),
+        "attempts": doc.get("attempts", 0),
+        "payload": doc.get("payload"),
+        "created_at": doc.get("created_at"),
+        "started_at": doc.get("started_at"),
+        "finished_at": doc.get("finished_at"),
+    }
+
+
+class JobQueue:
+    def __init__(self):
+        self._db = None
+        self._workers: List[asyncio.Task] = []
+        self._reaper: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._poll_interval = 5.0
+        self._lease_seconds = 120.0
+        self._max_attempts = 3
+        self._history_limit = 200
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def enqueue(self, db, job_type: str, payload: Dict) -> str:
+        """Insert a queued job and wake a worker. Returns the job id."""
+        if job_type not in HANDLERS:
+            raise ValueError(f"Unknown job type: {job_type}")
+        now = _now()
+        result = await db.jobs.insert_one({
+            "type": job_type,
+            "payload": payload,
+            "status": QUEUED,
+            "stage": QUEUED,
+            "message": "Waiting for a worker",
+            "history": [],
+            "result": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "updated_at": now,
+        })
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return str(result.inserted_id)
+
+    async def get(self, db, job_id: str) -> Optional[Dict]:
+        try:
+            obj_id = ObjectId(job_id)
+        except Exception:
+            return None
+        return await db.jobs.find_one({"_id": obj_id})
+
+    def _lease_until(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self._lease_seconds)
+
+    async def _claim(self) -> Optional[Dict]:
+        now = _now()
+        return await self._db.jobs.find_one_and_update(
+            {"status": QUEUED},
+            {
+                "$set": {
+                    "status": RUNNING,
+                    "started_at": now,
+                    "updated_at": now,
+                    "lease_token": uuid.uuid4().hex,
+                    "lease_expires_at": self._lease_until(now),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _progress(self, job_id: ObjectId, token: str):
+        async def report(stage: str, message: str) -> None:
+            now = _now()
+            await self._db.jobs.update_one(
+                {"_id": job_id, "lease_token": token},
+                {
+                    "$set": {"stage": stage, "message": message, "updated_at": now, "lease_expires_at": self._lease_until(now)},
+                    # Keep only the latest entries: bulk jobs report once per URL
+                    "$push": {"history": {
+                        "$each": [{"stage": stage, "message": message, "at": now}],
+                        "$slice": -self._history_limit,
+                    }},
+                },
+            )
+        return report
+
+    async def _heartbeat(self, job_id: ObjectId, token: str) -> None:
+        """Renew the lease while the handler runs."""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            now = _now()
+            try:
+                result = await self._db.jobs.update_one(
+                    {"_id": job_id, "lease_token": token, "status": RUNNING},
+                    {"$set": {"lease_expires_at": self._lease_until(now), "updated_at": now}},
+                )
+                if result.matched_count == 0:
+                    logger.warning(f"Job {job_id} lost its lease")
+                    return
+            except Exception as e:
+                logger.warning(f"Could not renew lease of job {job_id}: {e}")
+
+    async def _finish(self, job_id: ObjectId, token: Optional[str], status: str, result=None, error: Optional[str] = None) -> None:
+        now = _now()
+        await self._db.jobs.update_one(
+            {"_id": job_id, "lease_token": token},
+            {"$set": {
+                "status": status,
+                "stage": status,
+                "message": error or (result or {}).get("message"),
+                "result": result,
+                "error": error,
+                "finished_at": now,
+                "updated_at": now,
+                "lease_expires_at": None,
+            }},
+        )
+
+    async def _run(self, job: Dict) -> None:
+        job_id = job["_id"]
+        token = job.get("lease_token")
+        handler = HANDLERS.get(job.get("type"))
+        if handler is None:
+            await self._finish(job_id, token, FAILED, error=f"Unknown job type: {job.get('type')}")
+            return
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, token))
+        try:
+            result = await handler(self._db, job.get("payload") or {}, self._progress(job_id, token))
+            await self._finish(job_id, token, SUCCEEDED, result=result)
+        except IngestionError as e:
+            await self._finish(job_id, token, FAILED, error=str(e))
+        except Exception as e:
+            logger.error(f"Job {job_id} ({job.get('type')}) failed: {traceback.format_exc()}")
+            await self._finish(job_id, token, FAILED, error=f"Error processing job: {str(e)}")
+        finally:
+            heartbeat.cancel()
+
+    async def _worker(self, n: int) -> None:
+        while True:
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.warning(f"Job worker {n} could not claim a job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(job)
+
+    async def _requeue_interrupted(self) -> int:
+        """
+        Requeue running jobs whose lease expired (their process died), or fail
+        them once they have used max_attempts. Returns the number requeued.
+        """
+        now = _now()
+        stale = {
+            "status": RUNNING,
+            "$or": [
+                {"lease_expires_at": {"$lt": now}},
+                # Jobs claimed before leases existed
+                {"lease_expires_at": {"$exists": False}, "updated_at": {"$lt": now - timedelta(seconds=self._lease_seconds)}},
+            ],
+        }
+        failed = await self._db.jobs.update_many(
+            {**stale, "attempts": {"$gte": self._max_attempts}},
+            {"$set": {
+                "status": FAILED,
+                "stage": FAILED,
+                "message": f"Interrupted {self._max_attempts} times, giving up",
+                "error": f"Interrupted {self._max_attempts} times, giving up",
+                "finished_at": now,
+                "updated_at": now,
+                "lease_token": None,
+                "lease_expires_at": None,
+            }},
+        )
+        if failed.modified_count:
+            logger.warning(f"Failed {failed.modified_count} job(s) that were interrupted {self._max_attempts} times")
+        result = await self._db.jobs.update_many(
+            {**stale, "attempts": {"$lt": self._max_attempts}},
+            {"$set": {
+                "status": QUEUED,
+                "stage": QUEUED,
+                "message": "Requeued after its worker stopped",
+                "updated_at": now,
+                "lease_token": None,
+                "lease_expires_at": None,
+            }},
+        )
+        if result.modified_count and self._wakeup is not None:
+            self._wakeup.set()
+        return result.modified_count
+
+    async def _reap(self) -> None:
+        """Periodically requeue jobs whose worker process died."""
+        while True:
+            await asyncio.sleep(self._lease_seconds / 2)
+            try:
+                requeued = await self._requeue_interrupted()
+                if requeued:
+                    logger.info(f"Requeued {requeued} job(s) with an expired lease")
+            except Exception as e:
+                logger.warning(f"Could not requeue interrupted jobs: {e}")
+
+    async def start(self, db) -> None:
+        if self._workers:
+            return
+        settings = _settings()
+        workers = int(settings.get("workers", 2))
+        self._poll_interval = float(settings.get("poll_interval_seconds", 5))
+        self._lease_seconds = float(settings.get("lease_seconds", 120))
+        self._max_attempts = int(settings.get("max_attempts", 3))
+        self._history_limit = max(1, int(settings.get("history_limit", 200)))
+        self._db = db
+        self._wakeup = asyncio.Event()
+
+        try:
+            requeued = await self._requeue_interrupted()
+            if requeued:
+                print(f"🔁 Requeued {requeued} interrupted job(s)")
+        except Exception as e:
+            print(f"⚠️  Could not requeue interrupted jobs: {e}")
+
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(max(1, workers))]
+        self._reaper = asyncio.create_task(self._reap())
+        print(f"✅ Job queue started with {len(self._workers)} worker(s)")
+
+    async def stop(self) -> None:
+        tasks = self._workers + ([self._reaper] if self._reaper else [])
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._workers = []
+        self._reaper = None
+
+
+job_queue = JobQueue()
@@ -3,21 +3,30 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 from pathlib import Path
-from .database import connect_to_mongo, close_mongo_connection
+from .database import connect_to_mongo, close_mongo_connection, get_database
 from .config import settings
 from .api import wines, admin, health, status
 from .scheduler import start_scheduler, shutdown_scheduler
+from .services.wine_cache import wine_cache
+from .jobs.job_queue import job_queue
+from .utils.config_loader import config
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await connect_to_mongo()
+    config.start_watching()
+    await wine_cache.start(get_database())
+    await job_queue.start(get_database())
     start_scheduler()
     yield
     # Shutdown
     shutdown_scheduler()
+    await job_queue.stop()
+    await wine_cache.stop()
     await close_mongo_connection()
+    config.stop_watching()
 
 
 app = FastAPI(
@@ -34,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Include routers
@@ -90,4 +90,10 @@ class WineUpdateRequest(BaseModel):
 
 class AddTikTokPostRequest(BaseModel):
     """Request model for manually adding a TikTok post"""
-    tiktok_url: str
\ No newline at end of file
+    tiktok_url: str
+
+
+class AddTikTokPostsRequest(BaseModel):
+    """Request model for bulk adding TikTok posts"""
+    tiktok_urls: List[str] = Field(..., min_length=1, max_length=1000)
+    include_processed: bool = True  # also skip URLs already in processed_videos
\ No newline at end of file
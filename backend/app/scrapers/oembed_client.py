@@ -0,0 +1,215 @@
+"""
+Async TikTok oEmbed client.
+
+One httpx connection pool per client, a token-bucket rate limiter shared by
+all requests, concurrent batch fetching and a TTL cache keyed by video URL.
+The cache lives in memory for the client's lifetime and, when a database is
+given, in the `oembed_cache` collection (Mongo expires entries via a TTL
+index on `expires_at`), so re-scraping a profile only hits TikTok for new or
+expired videos.
+
+Use as an async context manager so the pool is closed with the run:
+
+    async with OEmbedClient(db) as client:
+        videos = await client.scrape_profile_videos(username, video_urls)
+
+Rates, concurrency and TTL come from `oembed` in config/scraping_settings.yaml.
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+import httpx
+from pymongo import UpdateOne
+from ..utils.config_loader import config
+
+logger = logging.getLogger(__name__)
+
+OEMBED_URL = "https://www.tiktok.com/oembed"
+CACHE_COLLECTION = "oembed_cache"
+
+DEFAULTS = {
+    "rate_per_second": 10,       # sustained request rate
+    "burst": 10,                 # requests allowed at once after idling
+    "concurrency": 16,           # requests in flight
+    "timeout_seconds": 10,
+    "retries": 2,                # retries on 429 / 5xx / network errors
+    "ttl_hours": 168,
+}
+
+
+def _settings() -> Dict:
+    return {**DEFAULTS, **(config.scraping_settings.get("oembed", {}) or {})}
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, at most `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                # Holding the lock while waiting keeps requests first-come first-served
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def video_info_from_oembed(video_url: str, data: Dict, username: str) -> Dict:
+    """Video dict in the shape TikTokOEmbedScraper.scrape_profile_videos returns."""
+    return {
+        "post_url": video_url,
+        "caption": data.get('title', ''),
+        "author": data.get('author_name', username),
+        "date": datetime.now(),  # oEmbed doesn't provide date
+        "is_video": True,
+        "thumbnail_url": data.get('thumbnail_url'),
+        "media_files": []
+    }
+
+
+class OEmbedClient:
+    def __init__(self, db=None):
+        settings = _settings()
+        self.db = db
+        self.ttl = timedelta(hours=float(settings["ttl_hours"]))
+        self.retries = int(settings["retries"])
+        self._timeout = float(settings["timeout_seconds"])
+        self._concurrency = int(settings["concurrency"])
+        self._bucket = TokenBucket(settings["rate_per_second"], settings["burst"])
+        self._memory: Dict[str, Tuple[float, Dict]] = {}
+        self._http: Optional[httpx.AsyncClient] = None
+        self.stats = {"requests": 0, "cache_hits": 0, "failures": 0}
+
+    async def __aenter__(self) -> "OEmbedClient":
+        self._http = httpx.AsyncClient(
+            timeout=self._timeout,
+            limits=httpx.Limits(max_connections=self._concurrency, max_keepalive_connections=self._concurrency),
+            headers={"User-Agent": "Mozilla/5.0 (vinly oEmbed client)"},
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # Cache ---------------------------------------------------------------
+
+    async def _cache_get_many(self, urls: List[str]) -> Dict[str, Dict]:
+        now = time.monotonic()
+        found = {}
+        for url in urls:
+            entry = self._memory.get(url)
+            if entry and entry[0] > now:
+                found[url] = entry[1]
+        missing = [u for u in urls if u not in found]
+        if self.db is not None and missing:
+            try:
+                cursor = self.db[CACHE_COLLECTION].find(
+                    {"_id": {"$in": missing}, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+                )
+                async for doc in cursor:
+                    found[doc["_id"]] = doc["data"]
+                    self._memory[doc["_id"]] = (now + self.ttl.total_seconds(), doc["data"])
+            except Exception as e:
+                logger.warning(f"oEmbed cache lookup failed: {e}")
+        return found
+
+    async def _cache_put_many(self, results: Dict[str, Dict]) -> None:
+        if not results:
+            return
+        expires_mono = time.monotonic() + self.ttl.total_seconds()
+        for url, data in results.items():
+            self._memory[url] = (expires_mono, data)
+        if self.db is None:
+            return
+        now = datetime.now(timezone.utc)
+        ops = [
+            UpdateOne(
+                {"_id": url},
+                {"$set": {"data": data, "fetched_at": now, "expires_at": now + self.ttl}},
+                upsert=True,
+            )
+            for url, data in results.items()
+        ]
+        try:
+            await self.db[CACHE_COLLECTION].bulk_write(ops, ordered=False)
+        except Exception as e:
+            logger.warning(f"oEmbed cache write failed: {e}")
+
+    # Fetching ------------------------------------------------------------
+
+    async def _fetch(self, video_url: str) -> Dict:
+        if self._http is None:
+            raise RuntimeError("OEmbedClient must be used as 'async with OEmbedClient(...)'")
+        attempt = 0
+        while True:
+            attempt += 1
+            await self._bucket.acquire()
+            self.stats["requests"] += 1
+            try:
+                response = await self._http.get(OEMBED_URL, params={'url': video_url})
+                if response.status_code == 200:
+                    return response.json()
+                retryable = response.status_code == 429 or response.status_code >= 500
+                error = f"status {response.status_code}"
+            except (httpx.HTTPError, ValueError) as e:
+                retryable = True
+                error = str(e) or type(e).__name__
+            if not retryable or attempt > self.retries:
+                print(f"oEmbed API failed for {video_url}: {error}")
+                self.stats["failures"] += 1
+                return {}
+            await asyncio.sleep(0.5 * (2 ** (attempt - 1)) * (0.5 + random.random()))
+
+    async def fetch_many(self, video_urls: List[str]) -> Dict[str, Dict]:
+        """
+        oEmbed data for many URLs: cached entries first, the rest fetched
+        concurrently. Failed URLs are missing from the result (and not cached).
+        """
+        urls = list(dict.fromkeys(video_urls))
+        results = await self._cache_get_many(urls)
+        self.stats["cache_hits"] += len(results)
+        missing = [u for u in urls if u not in results]
+        if not missing:
+            return results
+
+        semaphore = asyncio.Semaphore(self._concurrency)
+
+        async def one(url: str):
+            async with semaphore:
+                return url, await self._fetch(url)
+
+        fetched = {url: data for url, data in await asyncio.gather(*(one(u) for u in missing)) if data}
+        await self._cache_put_many(fetched)
+        results.update(fetched)
+        return results
+
+    async def get_video_data(self, video_url: str) -> Dict:
+        """oEmbed data for one URL ({} on failure)."""
+        return (await self.fetch_many([video_url])).get(video_url, {})
+
+    async def scrape_profile_videos(self, username: str, video_urls: List[str]) -> List[Dict]:
+        """Async, concurrent TikTokOEmbedScraper.scrape_profile_videos (same output, same order)."""
+        print(f"Scraping TikTok videos from @{username}")
+        started = time.perf_counter()
+        data = await self.fetch_many(video_urls)
+        videos = [video_info_from_oembed(url, data[url], username) for url in video_urls if data.get(url)]
+        print(
+            f"  Scraped {len(videos)}/{len(video_urls)} videos in {time.perf_counter() - started:.1f}s "
+            f"({self.stats['cache_hits']} cached, {self.stats['requests']} requests)"
+        )
+        return videos
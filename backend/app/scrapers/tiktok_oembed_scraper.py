@@ -5,12 +5,15 @@ This is how video downloaders work - simple and reliable!
 import requests
 import re
 from typing import List, Dict
-from datetime import datetime
+from .oembed_client import OEMBED_URL, video_info_from_oembed
 
 
 class TikTokOEmbedScraper:
+    """Blocking client for scripts; async code should use oembed_client.OEmbedClient."""
+
     def __init__(self):
-        self.oembed_url = "https://www.tiktok.com/oembed"
+        self.oembed_url = OEMBED_URL
+        self.session = requests.Session()
     
     def get_video_data(self, video_url: str) -> Dict:
         """
@@ -18,7 +21,7 @@ class TikTokOEmbedScraper:
         This is the same method downloaders use!
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 self.oembed_url,
                 params={'url': video_url},
                 timeout=10
@@ -47,17 +50,7 @@ class TikTokOEmbedScraper:
             data = self.get_video_data(video_url)
             
             if data:
-                video_info = {
-                    "post_url": video_url,
-                    "caption": data.get('title', ''),
-                    "author": data.get('author_name', username),
-                    "date": datetime.now(),  # oEmbed doesn't provide date
-                    "is_video": True,
-                    "thumbnail_url": data.get('thumbnail_url'),
-                    "media_files": []
-                }
-                
-                videos_data.append(video_info)
+                videos_data.append(video_info_from_oembed(video_url, data, username))
                 print(f"  Scraped: {video_url.split('/')[-1]}")
         
         return videos_data
@@ -0,0 +1,179 @@
+"""
+ASR backends for transcribe_audio_file.
+
+Every backend takes a (normalized, 16k mono) audio file plus an optional
+prompt and returns {'text', 'segments'}, with segments as dicts carrying at
+least 'start', 'end' and 'text' in seconds. That is the shape of Whisper's
+verbose_json, so wine_timing and the two-pass logic work the same on every
+backend.
+
+- "openai" (alias "whisper"): the hosted whisper-1 endpoint
+- "local" (alias "faster-whisper"): a quantized faster-whisper/CTranslate2
+  model on CPU. No per-minute cost and no network round trip. Requires the
+  optional `faster-whisper` package; the model loads once per process.
+
+A `cancel` event asks a running transcription to stop early (used to drop
+a speculative second pass): the local engine checks it between segments;
+the OpenAI call cannot be aborted once sent, so its result is just discarded.
+
+The backend is chosen by `asr.provider` in config/scraping_settings.yaml;
+local model settings live under `asr.local`.
+"""
+import logging
+import threading
+from typing import Dict, List, Optional, Protocol
+from openai import OpenAI
+from ..config import settings
+from ..utils.config_loader import config
+
+try:
+    from faster_whisper import WhisperModel
+except ImportError:  # faster-whisper is optional; only the local backend needs it
+    WhisperModel = None
+
+logger = logging.getLogger(__name__)
+
+LOCAL_DEFAULTS = {
+    "model": "small",            # tiny | base | small | medium | large-v3 | path to a converted model
+    "device": "cpu",
+    "compute_type": "int8",      # quantized weights; int8_float16 / float16 on GPU
+    "cpu_threads": 0,            # 0 = CTranslate2 default (all cores)
+    "num_workers": 1,            # parallel transcriptions sharing the model
+    "beam_size": 5,
+}
+
+
+class ASRBackend(Protocol):
+    name: str
+    # Identifies the engine and model; part of transcription cache keys and
+    # the asr_metrics version label
+    model_id: str
+    # USD per audio minute sent, for asr_metrics cost tracking
+    cost_per_minute: float
+
+    def transcribe(
+        self, audio_path: str, prompt: Optional[str] = None, language: str = "nl",
+        cancel: Optional[threading.Event] = None
+    ) -> Dict:
+        """Return {'text': str, 'segments': [{'start', 'end', 'text', ...}]}"""
+        ...
+
+
+class OpenAIWhisperBackend:
+    name = "openai"
+    cost_per_minute = 0.006
+
+    def __init__(self, model: str = "whisper-1"):
+        self.model_id = model
+        self._client: Optional[OpenAI] = None
+
+    @property
+    def client(self) -> OpenAI:
+        if self._client is None:
+            self._client = OpenAI(api_key=settings.openai_api_key)
+        return self._client
+
+    def transcribe(
+        self, audio_path: str, prompt: Optional[str] = None, language: str = "nl",
+        cancel: Optional[threading.Event] = None
+    ) -> Dict:
+        with open(audio_path, "rb") as audio_file:
+            response = self.client.audio.transcriptions.create(
+                model=self.model_id,
+                file=audio_file,
+                response_format="verbose_json",  # Get timestamps for frame extraction!
+                language=language,
+                prompt=prompt if prompt else None
+            )
+        return {
+            "text": response.text,
+            "segments": response.segments if hasattr(response, 'segments') else [],
+        }
+
+
+class FasterWhisperBackend:
+    name = "local"
+    cost_per_minute = 0.0
+
+    def __init__(self, options: Optional[Dict] = None):
+        if WhisperModel is None:
+            raise RuntimeError("asr.provider 'local' requires the faster-whisper package (pip install faster-whisper)")
+        self.options = {**LOCAL_DEFAULTS, **(options or {})}
+        self.model_id = f"faster-whisper-{self.options['model']}-{self.options['compute_type']}"
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        # Loading takes seconds and hundreds of MB; do it once, on first use
+        with self._lock:
+            if self._model is None:
+                logger.info(f"Loading local ASR model {self.model_id}")
+                self._model = WhisperModel(
+                    self.options["model"],
+                    device=self.options["device"],
+                    compute_type=self.options["compute_type"],
+                    cpu_threads=int(self.options["cpu_threads"]),
+                    num_workers=int(self.options["num_workers"]),
+                )
+            return self._model
+
+    def transcribe(
+        self, audio_path: str, prompt: Optional[str] = None, language: str = "nl",
+        cancel: Optional[threading.Event] = None
+    ) -> Dict:
+        segments_iter, _info = self.model.transcribe(
+            audio_path,
+            language=language,
+            initial_prompt=prompt or None,
+            beam_size=int(self.options["beam_size"]),
+        )
+        segments: List[Dict] = []
+        # Segments are decoded lazily, so stopping the iteration stops the work
+        for i, seg in enumerate(segments_iter):
+            if cancel is not None and cancel.is_set():
+                break
+            segments.append({
+                "id": i,
+                "start": float(seg.start),
+                "end": float(seg.end),
+                "text": seg.text,
+                "avg_logprob": float(seg.avg_logprob),
+                "no_speech_prob": float(seg.no_speech_prob),
+            })
+        return {
+            "text": "".join(s["text"] for s in segments).strip(),
+            "segments": segments,
+        }
+
+
+PROVIDERS = {
+    "openai": OpenAIWhisperBackend,
+    "whisper": OpenAIWhisperBackend,
+    "local": FasterWhisperBackend,
+    "faster-whisper": FasterWhisperBackend,
+}
+
+_backends: Dict[tuple, ASRBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_asr_backend(provider: Optional[str] = None) -> ASRBackend:
+    """
+    Process-wide backend for a provider (default: `asr.provider`).
+    Backends are reused, so a local model is loaded only once.
+    """
+    asr_cfg = config.scraping_settings.get('asr', {}) or {}
+    provider = (provider or asr_cfg.get('provider') or 'openai').lower()
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown asr.provider '{provider}' (expected one of: {', '.join(PROVIDERS)})")
+    backend_cls = PROVIDERS[provider]
+    local_options = asr_cfg.get('local', {}) or {}
+    # A config reload with new local settings gets a new backend
+    options_key = tuple(sorted(local_options.items())) if backend_cls is FasterWhisperBackend else ()
+    with _backends_lock:
+        backend = _backends.get((backend_cls.name, options_key))
+        if backend is None:
+            backend = backend_cls(local_options) if backend_cls is FasterWhisperBackend else backend_cls()
+            _backends[(backend_cls.name, options_key)] = backend
+        return backend
@@ -2,18 +2,39 @@
 Audio preprocessing utilities for ASR:
 - Loudness normalization to ~-16 LUFS
 - Optional simple denoise (spectral gating placeholder)
-- Optional VAD-based trimming/splitting (placeholder hooks)
+- Energy-based VAD on the normalized 16k PCM: trims non-speech (silence,
+  quiet intros/outros) and splits long audio into chunks that can be
+  transcribed concurrently; each chunk maps its timestamps back onto the
+  original timeline
 
 Note: Keep this lightweight and fast; we rely on ffmpeg and simple heuristics.
 """
 import os
 import subprocess
-from typing import Optional
+import wave
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from ..utils.config_loader import config
+from ..utils.ffmpeg import ffmpeg_binary
+
+VAD_DEFAULTS = {
+    "enabled": True,
+    "frame_ms": 30,
+    "margin_db": 12.0,          # speech threshold above the noise floor (10th percentile frame energy)
+    "min_db": -50.0,            # frames quieter than this (dBFS) are never speech
+    "min_speech": 0.25,         # seconds; shorter bursts are dropped
+    "min_silence": 0.6,         # seconds; shorter pauses stay inside one region
+    "padding": 0.2,             # seconds kept around each speech region
+    "join_gap": 0.3,            # seconds of silence inserted between regions in a chunk
+    "max_chunk_seconds": 60,    # longer audio is split into chunks of at most this much speech
+    "min_trim_ratio": 0.1,      # below this fraction of non-speech, short audio is sent whole
+    "concurrency": 4,           # chunks transcribed at once
+}
 
 
 def _run_ffmpeg(args: list) -> None:
     process = subprocess.run([
-        'ffmpeg', '-y',
+        ffmpeg_binary(), '-y',
         *args
     ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
     if process.returncode != 0:
@@ -35,12 +56,30 @@ def loudness_normalize(input_path: str, output_path: str, target_lufs: float = -
     return output_path
 
 
+def extract_asr_audio(video_path: str, output_path: str, target_lufs: float = -16.0) -> str:
+    """Decode a video's audio track straight to loudness-normalized mono 16k PCM (one ffmpeg pass)."""
+    args = [
+        '-i', video_path,
+        '-vn',
+        '-ac', '1',
+        '-ar', '16000',
+        '-af', f"loudnorm=I={target_lufs}:TP=-1.5:LRA=11",
+        '-c:a', 'pcm_s16le',
+        output_path
+    ]
+    _run_ffmpeg(args)
+    return output_path
+
+
 def simple_preprocess(input_path: str) -> str:
     """
     Minimal preprocessing pipeline:
     - Loudness normalize to mono 16k PCM
-    Returns path to processed WAV.
+    Returns path to processed WAV. Already-normalized input (*.norm.wav) is
+    returned as-is.
     """
+    if input_path.endswith('.norm.wav'):
+        return input_path
     base, _ = os.path.splitext(input_path)
     out_path = f"{base}.norm.wav"
     try:
@@ -50,3 +89,174 @@ def simple_preprocess(input_path: str) -> str:
         return input_path
 
 
+
+
+def vad_settings() -> Dict:
+    """VAD settings (`asr.vad` in scraping_settings.yaml, so they are part of the ASR prompt version)."""
+    asr_cfg = config.scraping_settings.get("asr", {}) or {}
+    return {**VAD_DEFAULTS, **(asr_cfg.get("vad", {}) or {})}
+
+
+def read_pcm16(path: str) -> Tuple[np.ndarray, int]:
+    """Mono int16 samples and sample rate of a PCM WAV (e.g. the *.norm.wav from simple_preprocess)."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2 or w.getnchannels() != 1:
+            raise ValueError(f"Expected mono 16-bit PCM, got {w.getnchannels()}ch/{8 * w.getsampwidth()}bit")
+        rate = w.getframerate()
+        samples = np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+    return samples, rate
+
+
+def write_pcm16(path: str, samples: np.ndarray, rate: int) -> str:
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.astype("<i2").tobytes())
+    return path
+
+
+def detect_speech(samples: np.ndarray, rate: int, settings: Optional[Dict] = None) -> List[Tuple[float, float]]:
+    """
+    Energy-based voice activity detection.
+
+    Frame energies (dBFS) above max(noise floor + margin_db, min_db) count as
+    speech. Short bursts are dropped, short pauses bridged, and regions
+    padded.
+
+    Returns:
+        [(start, end)] speech regions in seconds, sorted and non-overlapping
+    """
+    settings = settings or vad_settings()
+    frame = max(1, int(rate * float(settings["frame_ms"]) / 1000))
+    n = len(samples) // frame
+    if n == 0:
+        return []
+    frames = samples[:n * frame].astype(np.float32).reshape(n, frame) / 32768.0
+    energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+    floor = float(np.percentile(energy_db, 10))
+    threshold = max(floor + float(settings["margin_db"]), float(settings["min_db"]))
+    # Loud throughout (music bed, constant noise): keep the loud part rather than nothing
+    threshold = min(threshold, float(np.percentile(energy_db, 95)) - 3.0)
+    voiced = energy_db > threshold
+
+    frame_s = frame / rate
+    # Runs of voiced frames -> (start, end) in seconds
+    edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    regions: List[List[float]] = []
+    for s, e in zip(starts, ends):
+        start, end = float(s * frame_s), float(e * frame_s)
+        if regions and start - regions[-1][1] < float(settings["min_silence"]):
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    duration = len(samples) / rate
+    padding = float(settings["padding"])
+    padded: List[Tuple[float, float]] = []
+    for start, end in regions:
+        if end - start < float(settings["min_speech"]):
+            continue
+        start, end = max(0.0, start - padding), min(duration, end + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+class AudioChunk:
+    """
+    A chunk file made of speech regions joined by short silences, and the
+    map from chunk time back to the original timeline.
+    """
+
+    def __init__(self, path: str, pieces: List[Tuple[float, float, float]]):
+        self.path = path
+        # (chunk_start, original_start, length) per region, in chunk order
+        self.pieces = pieces
+
+    @property
+    def duration(self) -> float:
+        """Length of the chunk file (speech plus joining gaps)"""
+        chunk_start, _, length = self.pieces[-1]
+        return chunk_start + length
+
+    def to_original(self, t: float) -> float:
+        """Original-timeline time for a chunk time (gaps map to the preceding region's end)."""
+        for chunk_start, orig_start, length in reversed(self.pieces):
+            if t >= chunk_start:
+                return orig_start + min(t - chunk_start, length)
+        return self.pieces[0][1] if self.pieces else t
+
+
+def plan_chunks(regions: List[Tuple[float, float]], max_chunk: float) -> List[List[Tuple[float, float]]]:
+    """Group speech regions into chunks of at most max_chunk seconds of speech (long regions are cut)."""
+    pieces: List[Tuple[float, float]] = []
+    for start, end in regions:
+        while end - start > max_chunk:
+            pieces.append((start, start + max_chunk))
+            start += max_chunk
+        pieces.append((start, end))
+
+    chunks: List[List[Tuple[float, float]]] = []
+    current: List[Tuple[float, float]] = []
+    used = 0.0
+    for start, end in pieces:
+        if current and used + (end - start) > max_chunk:
+            chunks.append(current)
+            current, used = [], 0.0
+        current.append((start, end))
+        used += end - start
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def vad_split(pcm_path: str, out_dir: str, settings: Optional[Dict] = None) -> Optional[List[AudioChunk]]:
+    """
+    Trim non-speech from a 16k PCM file and split it into chunk files.
+
+    Returns:
+        AudioChunks in timeline order, or None when the file should be sent
+        whole (VAD disabled, no speech found, not PCM, or short audio with
+        little to trim)
+    """
+    settings = settings or vad_settings()
+    if not settings["enabled"]:
+        return None
+    try:
+        samples, rate = read_pcm16(pcm_path)
+    except (wave.Error, ValueError, EOFError):
+        return None
+    duration = len(samples) / rate if rate else 0.0
+    regions = detect_speech(samples, rate, settings)
+    if not regions:
+        return None
+    speech = sum(end - start for start, end in regions)
+    max_chunk = float(settings["max_chunk_seconds"])
+    if duration <= max_chunk and speech >= duration * (1 - float(settings["min_trim_ratio"])):
+        return None
+
+    gap = np.zeros(int(float(settings["join_gap"]) * rate), dtype=np.int16)
+    chunks: List[AudioChunk] = []
+    base = os.path.splitext(os.path.basename(pcm_path))[0]
+    for index, group in enumerate(plan_chunks(regions, max_chunk)):
+        parts: List[np.ndarray] = []
+        pieces: List[Tuple[float, float, float]] = []
+        position = 0.0
+        for start, end in group:
+            if parts:
+                parts.append(gap)
+                position += len(gap) / rate
+            segment = samples[int(start * rate):int(end * rate)]
+            pieces.append((position, start, len(segment) / rate))
+            parts.append(segment)
+            position += len(segment) / rate
+        path = os.path.join(out_dir, f"{base}.vad{index:03d}.wav")
+        chunks.append(AudioChunk(write_pcm16(path, np.concatenate(parts), rate), pieces))
+    return chunks
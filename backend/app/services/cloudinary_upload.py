@@ -1,12 +1,50 @@
 """
 Cloudinary image upload service for wine images.
 Uploads extracted wine bottle images to Cloudinary CDN for fast, scalable delivery.
+
+CloudinaryUploader (see get_uploader) configures the SDK once, uploads
+through a bounded thread pool with retry/backoff, and skips images whose
+content hash is already stored under the wine's public_id prefix (the hash is
+kept in the asset's context metadata). Public ids are derived from the
+content hash, so an upload never replaces a different image whose URL is
+still in use; once a wine's image_urls have been replaced, the scripts call
+delete_superseded to remove the assets it no longer references. Freshly
+generated wine ids (new_wine=True) skip the prefix listing. Upload counts are kept as totals and latencies over the most
+recent LATENCY_WINDOW uploads.
+Limits come from `cloudinary_upload` in config/scraping_settings.yaml.
 """
 import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
 import cloudinary.uploader
+import hashlib
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Sequence, Tuple
 import os
+from ..utils.config_loader import config
+
+logger = logging.getLogger(__name__)
+
+FOLDER = "vinly"
+# Uploads kept for the latency percentiles (the uploader lives as long as the API process)
+LATENCY_WINDOW = 1000
+
+# Client errors that a retry cannot fix
+_PERMANENT_ERRORS = (
+    cloudinary.exceptions.BadRequest,
+    cloudinary.exceptions.AuthorizationRequired,
+    cloudinary.exceptions.NotAllowed,
+)
+
+_configured = False
+_configure_lock = threading.Lock()
 
 
 def configure_cloudinary():
@@ -33,10 +71,232 @@ def configure_cloudinary():
         )
 
 
+def ensure_configured():
+    """configure_cloudinary once per process."""
+    global _configured
+    if _configured:
+        return
+    with _configure_lock:
+        if not _configured:
+            configure_cloudinary()
+            _configured = True
+
+
+def _public_id(wine_id: str, digest: str) -> str:
+    # Content-addressed: the same id always holds the same image
+    return f"wines/{wine_id}_{digest[:16]}"
+
+
+def _content_hash(image_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _settings() -> Dict:
+    return config.scraping_settings.get("cloudinary_upload", {}) or {}
+
+
+class CloudinaryUploader:
+    def __init__(self, workers: Optional[int] = None, retries: Optional[int] = None, backoff: Optional[float] = None):
+        settings = _settings()
+        self.workers = workers or int(settings.get("workers", 8))
+        self.retries = retries if retries is not None else int(settings.get("retries", 3))
+        self.backoff = backoff if backoff is not None else float(settings.get("backoff_seconds", 1.0))
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cloudinary")
+        self._lock = threading.Lock()
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+        self.totals = {"uploads": 0, "skipped": 0, "failed": 0}
+
+    def _list_resources(self, wine_id: str) -> List[Dict]:
+        """Admin API listing of the `vinly/wines/{wine_id}_` prefix (raises on API errors)."""
+        ensure_configured()
+        prefix = f"{FOLDER}/wines/{wine_id}_"
+        resources: List[Dict] = []
+        cursor = None
+        while True:
+            kwargs = {"type": "upload", "prefix": prefix, "context": True, "max_results": 100}
+            if cursor:
+                kwargs["next_cursor"] = cursor
+            response = cloudinary.api.resources(**kwargs)
+            resources.extend(response.get("resources", []))
+            cursor = response.get("next_cursor")
+            if not cursor:
+                return resources
+
+    def existing_uploads(self, wine_id: str) -> Dict[str, str]:
+        """
+        Content hash -> secure_url of images already stored for a wine.
+        
+        One Admin API listing of the wine's prefix; on any error nothing is
+        treated as existing (everything gets uploaded).
+        """
+        existing: Dict[str, str] = {}
+        try:
+            for resource in self._list_resources(wine_id):
+                digest = ((resource.get("context") or {}).get("custom") or {}).get("sha256")
+                if digest:
+                    existing[digest] = resource["secure_url"]
+        except Exception as e:
+            logger.warning(f"Could not list Cloudinary images for {wine_id}: {e}")
+        return existing
+
+    def delete_superseded(self, wine_id: str, keep_urls: Sequence[str]) -> int:
+        """
+        Delete a wine's assets that none of keep_urls points to.
+        
+        Call after the wine's new image_urls are saved, so no stored URL
+        refers to a deleted asset. Errors are logged; returns the number deleted.
+        """
+        try:
+            stale = [
+                r["public_id"] for r in self._list_resources(wine_id)
+                if not any(f"/{r['public_id']}." in url for url in keep_urls)
+            ]
+            for i in range(0, len(stale), 100):
+                cloudinary.api.delete_resources(stale[i:i + 100], type="upload", resource_type="image")
+        except Exception as e:
+            logger.warning(f"Could not delete superseded Cloudinary images for {wine_id}: {e}")
+            return 0
+        if stale:
+            logger.info(f"Deleted {len(stale)} superseded Cloudinary image(s) for {wine_id}")
+        return len(stale)
+
+    def _record(self, public_id: str, started: float, attempts: int, skipped: bool, ok: bool) -> None:
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        with self._lock:
+            self.latencies.append({
+                "public_id": public_id, "ms": elapsed_ms, "attempts": attempts,
+                "skipped": skipped, "ok": ok,
+            })
+            self.totals["skipped" if skipped else ("uploads" if ok else "failed")] += 1
+        status = "skipped (already uploaded)" if skipped else ("ok" if ok else "failed")
+        logger.info(f"Cloudinary {public_id}: {status} in {elapsed_ms}ms ({attempts} attempt(s))")
+
+    def upload_image(
+        self,
+        image_path: Path,
+        wine_id: str,
+        index: int,
+        existing: Optional[Dict[str, str]] = None,
+    ) -> Optional[str]:
+        """
+        Upload one image with retry/backoff; reuse an existing asset with the same content.
+        
+        Args:
+            image_path: Path to local image file
+            wine_id: Unique wine identifier
+            index: Image index for this wine (0, 1, 2, etc.), used in logs
+            existing: existing_uploads(wine_id), fetched once per wine by the caller
+        
+        Returns:
+            Secure HTTPS URL, or None if every attempt failed
+        """
+        ensure_configured()
+        started = time.perf_counter()
+        try:
+            digest = _content_hash(Path(image_path))
+        except OSError as e:
+            print(f"Error uploading {image_path} to Cloudinary: {e}")
+            self._record(f"wines/{wine_id} #{index}", started, 0, False, False)
+            return None
+        public_id = _public_id(wine_id, digest)
+        
+        if existing and digest in existing:
+            self._record(public_id, started, 0, True, True)
+            return existing[digest]
+        
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                result = cloudinary.uploader.upload(
+                    str(image_path),
+                    public_id=public_id,
+                    folder=FOLDER,
+                    overwrite=True,
+                    resource_type="image",
+                    context={"sha256": digest},
+                    # Optimize images
+                    quality="auto",
+                    fetch_format="auto"
+                )
+                self._record(public_id, started, attempts, False, True)
+                return result['secure_url']
+            except Exception as e:
+                if isinstance(e, _PERMANENT_ERRORS) or attempts > self.retries:
+                    print(f"Error uploading {image_path} to Cloudinary: {e}")
+                    self._record(public_id, started, attempts, False, False)
+                    return None
+                delay = self.backoff * (2 ** (attempts - 1)) * (0.5 + random.random())
+                logger.warning(f"Upload of {public_id} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def upload_batch(self, jobs: Sequence[Tuple[Path, str, int]], new_wine: bool = False) -> List[Optional[str]]:
+        """
+        Upload many images concurrently on the bounded pool.
+        
+        Args:
+            jobs: (image_path, wine_id, index) per image, any number of wines
+            new_wine: the wine ids were just generated, so there is nothing
+                      stored under them to list
+        
+        Returns:
+            Secure URL (or None) per job, in job order
+        """
+        wine_ids = list(dict.fromkeys(wine_id for _, wine_id, _ in jobs))
+        if new_wine:
+            existing = {wine_id: {} for wine_id in wine_ids}
+        else:
+            existing = dict(zip(wine_ids, self._executor.map(self.existing_uploads, wine_ids)))
+        futures = [
+            self._executor.submit(self.upload_image, path, wine_id, index, existing[wine_id])
+            for path, wine_id, index in jobs
+        ]
+        return [f.result() for f in futures]
+
+    def upload_wine_images(self, image_paths: Sequence[Path], wine_id: str, new_wine: bool = False) -> List[Optional[str]]:
+        """Upload a wine's images (indexed 0..n-1) concurrently. Returns URL or None per image."""
+        return self.upload_batch([(Path(p), wine_id, i) for i, p in enumerate(image_paths)], new_wine=new_wine)
+
+    def latency_summary(self) -> Dict:
+        """Upload, skipped and failed totals, and p50/p95/max latency of recent uploads."""
+        with self._lock:
+            records = list(self.latencies)
+            summary = dict(self.totals)
+        uploaded = sorted(r["ms"] for r in records if not r["skipped"] and r["ok"])
+        if uploaded:
+            summary.update({
+                "p50_ms": int(statistics.median(uploaded)),
+                "p95_ms": uploaded[min(len(uploaded) - 1, int(len(uploaded) * 0.95))],
+                "max_ms": uploaded[-1],
+            })
+        return summary
+
+
+_uploader: Optional[CloudinaryUploader] = None
+_uploader_lock = threading.Lock()
+
+
+def get_uploader() -> CloudinaryUploader:
+    """Process-wide upload manager, created on first use."""
+    global _uploader
+    with _uploader_lock:
+        if _uploader is None:
+            _uploader = CloudinaryUploader()
+        return _uploader
+
+
 def upload_wine_image(image_path: Path, wine_id: str, index: int) -> Optional[str]:
     """
     Upload wine image to Cloudinary and return public URL.
     
+    Single-image convenience wrapper around the shared CloudinaryUploader
+    (retries included). Prefer get_uploader().upload_wine_images for several
+    images so they upload concurrently and duplicates are skipped.
+    
     Args:
         image_path: Path to local image file
         wine_id: Unique wine identifier
@@ -46,24 +306,4 @@ def upload_wine_image(image_path: Path, wine_id: str, index: int) -> Optional[st
         Secure HTTPS URL to the uploaded image on Cloudinary CDN
         Returns None if upload fails
     """
-    try:
-        configure_cloudinary()
-        
-        # Upload to Cloudinary with organized public_id
-        result = cloudinary.uploader.upload(
-            str(image_path),
-            public_id=f"wines/{wine_id}_{index}",
-            folder="vinly",
-            overwrite=True,
-            resource_type="image",
-            # Optimize images
-            quality="auto",
-            fetch_format="auto"
-        )
-        
-        return result['secure_url']
-    
-    except Exception as e:
-        print(f"Error uploading {image_path} to Cloudinary: {e}")
-        return None
-
+    return get_uploader().upload_image(image_path, wine_id, index)
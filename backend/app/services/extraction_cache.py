@@ -0,0 +1,86 @@
+"""
+Persistent cache of LLM wine extractions.
+
+An extraction is keyed by what determines the model's answer: the model,
+temperature, system prompt, prompt template version (`PROMPT_VERSION` in
+wine_extractor.py: a manual tag plus a hash of the rendered template) and
+the input text (caption + transcription). Batch answers are stored under
+BATCH_PROMPT_VERSION, so only batched runs are served them. The system
+prompt carries the supermarket list, so supermarket config changes and
+template edits miss on their own; validation changes need a new PROMPT_TAG.
+
+Entries (raw response, reasoning, candidate and validated wines, prompt
+version) are JSON files on local disk, one per key (json_file_cache.py,
+shared with the transcription cache). extract_wines.py,
+find_and_add_missed_wines.py and every other caller of wine_extractor hit it
+before calling the API, so idempotent re-runs are free. Old entries are
+dropped per prompt version with
+`scripts/manage_media_cache.py extractions invalidate <version>`.
+Location comes from `extraction_cache` in config/scraping_settings.yaml.
+"""
+import hashlib
+import json
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+from .json_file_cache import JsonFileCache
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache(JsonFileCache):
+    settings_section = "extraction_cache"
+    label = "extraction cache"
+
+    @staticmethod
+    def key(model: str, temperature: float, system_prompt: str, prompt_version: str, text: str) -> str:
+        material = json.dumps([model, float(temperature), system_prompt, prompt_version, text], ensure_ascii=False)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def stats(self) -> Dict:
+        versions = Counter()
+        total_bytes = 0
+        for path, entry in self._entries():
+            total_bytes += path.stat().st_size
+            versions[(entry or {}).get("prompt_version", "unreadable")] += 1
+        return {
+            "root": str(self.root),
+            "entries": sum(versions.values()),
+            "bytes": total_bytes,
+            "by_prompt_version": dict(versions),
+        }
+
+    def invalidate(self, prompt_version: str) -> int:
+        """
+        Delete entries written with a prompt version. Returns the number removed.
+
+        Unreadable files are left alone (they may be mid-write by another
+        process) and logged; `clear` removes everything.
+        """
+        removed = 0
+        for path, entry in self._entries():
+            if entry is None:
+                logger.warning(f"Skipping unreadable extraction cache entry {path}")
+                continue
+            if entry.get("prompt_version") != prompt_version:
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Process-wide extraction cache, created on first use."""
+    global _extraction_cache
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            _extraction_cache = ExtractionCache()
+        return _extraction_cache
@@ -1,15 +1,30 @@
 """
 Video frame extraction using ffmpeg.
 Extracts frames at specific timestamps for wine bottle images.
+
+All timestamps for a video are extracted by one ffmpeg process instead of
+one process (and one probe/demux) per frame:
+- extract_frames_batch: one input seek per timestamp, one output file each;
+  the exact frames `extract_frame` produces
+- extract_frames_to_bytes: nearby timestamps share one decode window and the
+  JPEGs come back over a pipe, no temp files; optionally keyframes only
 """
 import subprocess
+import uuid
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import logging
-import glob
+from ..utils.ffmpeg import ffmpeg_binary
+from .frame_scoring import rank_frame_files
 
 logger = logging.getLogger(__name__)
 
+# Minimum size for a frame to count as real content (blank/failed frames are tiny)
+MIN_FRAME_BYTES = 1000
+JPEG_SOI = b"\xff\xd8"
+# Timestamps closer than this (seconds) are decoded in one window instead of two seeks
+WINDOW_MERGE_GAP = 1.0
+
 
 def extract_frame(video_path: str, timestamp: float, output_path: str) -> bool:
     """
@@ -24,20 +39,7 @@ def extract_frame(video_path: str, timestamp: float, output_path: str) -> bool:
         True if successful, False otherwise
     """
     try:
-        # Find ffmpeg location
-        ffmpeg_location = None
-        possible_paths = [
-            r"C:\Users\tanst\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_*\ffmpeg-*\bin",
-            r"C:\Program Files\ffmpeg\bin",
-            r"C:\ffmpeg\bin"
-        ]
-        for pattern in possible_paths:
-            matches = glob.glob(pattern)
-            if matches:
-                ffmpeg_location = matches[0]
-                break
-        
-        ffmpeg_cmd = str(Path(ffmpeg_location) / "ffmpeg.exe") if ffmpeg_location else "ffmpeg"
+        ffmpeg_cmd = ffmpeg_binary()
         
         # ffmpeg command to extract single frame
         cmd = [
@@ -55,7 +57,7 @@ def extract_frame(video_path: str, timestamp: float, output_path: str) -> bool:
         subprocess.run(cmd, check=True, capture_output=True)
         
         # Verify frame was created
-        if Path(output_path).exists() and Path(output_path).stat().st_size > 1000:
+        if Path(output_path).exists() and Path(output_path).stat().st_size > MIN_FRAME_BYTES:
             logger.debug(f"Frame extracted successfully ({Path(output_path).stat().st_size} bytes)")
             return True
         else:
@@ -69,12 +71,11 @@ def extract_frame(video_path: str, timestamp: float, output_path: str) -> bool:
 
 def select_best_frame(frame_paths: List[str]) -> Optional[str]:
     """
-    Pick the best frame from candidates using simple heuristics.
+    Pick the best frame from candidates by image quality.
     
-    No ML needed - just basic checks:
-    1. Check file exists and is not corrupted
-    2. Check file size (blank/dark frames are small)
-    3. Return first valid frame (priority already set by timing)
+    Frames are scored on sharpness, exposure and colour entropy (see
+    frame_scoring.py), so blurry, dark or transition frames lose even when
+    they come first in timing order; timing priority only breaks near-ties.
     
     Args:
         frame_paths: List of extracted frame paths (in priority order)
@@ -82,49 +83,218 @@ def select_best_frame(frame_paths: List[str]) -> Optional[str]:
     Returns:
         Path to best frame, or None if all invalid
     """
-    for frame_path in frame_paths:
-        p = Path(frame_path)
-        
-        if not p.exists():
-            continue
-        
-        # Check file size (blank/dark frames are typically < 10KB)
-        size_kb = p.stat().st_size / 1024
-        
-        if size_kb > 10:  # At least 10KB indicates actual content
-            logger.info(f"Selected frame: {frame_path} ({size_kb:.1f}KB)")
-            return str(frame_path)
+    # Missing or truncated files are never candidates
+    valid = [
+        str(p) for p in frame_paths
+        if Path(p).exists() and Path(p).stat().st_size > MIN_FRAME_BYTES
+    ]
+    ranked = rank_frame_files(valid, max_frames=1)
+    if ranked:
+        logger.info(f"Selected frame: {ranked[0]}")
+        return ranked[0]
     
     logger.warning("No valid frames found (all too small or missing)")
     return None
 
 
-def extract_frames_at_times(video_path: str, timestamps: List[float]) -> List[str]:
+def extract_frames_batch(video_path: str, timestamps: List[float], output_paths: List[str]) -> List[bool]:
+    """
+    Extract several frames in one ffmpeg process.
+    
+    Each timestamp gets its own input seek (`-ss` before `-i`, so only the GOP
+    around it is decoded) mapped to its own output, i.e. the same frames
+    `extract_frame` produces, without one process and demux per frame.
+    
+    Args:
+        video_path: Path to video file
+        timestamps: Timestamps in seconds
+        output_paths: Output JPEG path per timestamp
+    
+    Returns:
+        Success flag per timestamp
+    """
+    if not timestamps:
+        return []
+    
+    # Stale files from an earlier run must not count as success
+    for output_path in output_paths:
+        Path(output_path).unlink(missing_ok=True)
+    
+    cmd = [ffmpeg_binary(), '-y', '-loglevel', 'error']
+    for timestamp in timestamps:
+        cmd += ['-ss', str(timestamp), '-i', video_path]
+    for i, output_path in enumerate(output_paths):
+        cmd += ['-map', f'{i}:v:0', '-frames:v', '1', '-q:v', '2', output_path]
+    
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except Exception as e:
+        logger.warning(f"Batch frame extraction failed: {e}")
+    
+    return [
+        Path(p).exists() and Path(p).stat().st_size > MIN_FRAME_BYTES
+        for p in output_paths
+    ]
+
+
+def _window_filters(i: int, window: List[float]) -> Tuple[List[str], List[str]]:
+    """
+    Filters giving exactly one frame per timestamp of input i's window: the
+    decoded stream is split once per timestamp and each branch keeps its
+    first frame at or after that timestamp, so timestamps inside one frame
+    interval each get their own copy. Thresholds sit half a millisecond
+    early so float rounding of t cannot skip a frame that starts exactly on
+    the timestamp (matching `-ss` accurate seeking).
+
+    Returns:
+        (filter chains, output labels in timestamp order)
+    """
+    labels = [f"w{i}_{k}" for k in range(len(window))]
+    split_labels = "".join(f"[s{i}_{k}]" for k in range(len(window)))
+    filters = [f"[{i}:v:0]split={len(window)}{split_labels}"]
+    for k, t in enumerate(window):
+        filters.append(f"[s{i}_{k}]select='gte(t,{t - 0.0005:.4f})',trim=end_frame=1[{labels[k]}]")
+    return filters, labels
+
+
+def _plan_windows(timestamps: List[float]) -> List[List[float]]:
+    """Group sorted timestamps so close ones share one decode window."""
+    windows: List[List[float]] = []
+    for t in timestamps:
+        if windows and t - windows[-1][-1] <= WINDOW_MERGE_GAP:
+            windows[-1].append(t)
+        else:
+            windows.append([t])
+    return windows
+
+
+def extract_frames_to_bytes(
+    video_path: str,
+    timestamps: List[float],
+    keyframes_only: bool = False,
+) -> List[Tuple[float, bytes]]:
+    """
+    Extract frames as in-memory JPEG bytes in one ffmpeg process.
+    
+    Timestamps closer than WINDOW_MERGE_GAP share a decode window; each
+    window is one input seek, split into one branch per timestamp that keeps
+    the first frame at or after it, and all branches are concatenated and
+    streamed as JPEGs over stdout. Every timestamp yields its own frame, so
+    frames pair with timestamps by position; the only frames that can be
+    missing are past the end of the video, i.e. a suffix.
+    
+    With keyframes_only, each timestamp instead yields the keyframe at or
+    before it and nothing else is decoded. Several times cheaper, and
+    keyframes are the least compressed frames, but the frame can be up to
+    one GOP early - fine for candidate sampling, not for exact moments.
+    
+    Args:
+        video_path: Path to video file
+        timestamps: Timestamps in seconds
+        keyframes_only: Snap to preceding keyframes instead of exact frames
+    
+    Returns:
+        List of (timestamp, jpeg_bytes) for the frames that could be extracted,
+        in ascending timestamp order (blank/tiny frames are left out)
+    """
+    wanted = sorted({round(max(0.0, t), 3) for t in timestamps})
+    if not wanted:
+        return []
+    
+    cmd = [ffmpeg_binary(), '-loglevel', 'error']
+    filters = []
+    labels = []
+    if keyframes_only:
+        for i, t in enumerate(wanted):
+            cmd += ['-skip_frame', 'nokey', '-noaccurate_seek', '-ss', f"{t:.3f}", '-i', video_path]
+            filters.append(f"[{i}:v:0]trim=end_frame=1[w{i}]")
+            labels.append(f"w{i}")
+    else:
+        windows = _plan_windows(wanted)
+        for i, window in enumerate(windows):
+            # Seek just before the window; -copyts keeps t on the original timeline
+            start = max(0.0, window[0] - 0.1)
+            cmd += ['-ss', f"{start:.3f}", '-t', f"{window[-1] - start + 0.2:.3f}", '-copyts', '-i', video_path]
+            window_filters, window_labels = _window_filters(i, window)
+            filters += window_filters
+            labels += window_labels
+    # Renumber pts after concat: single-frame segments would otherwise collide
+    filters.append(f"{''.join(f'[{label}]' for label in labels)}concat=n={len(labels)}:v=1:a=0,setpts=N/TB[out]")
+    cmd += [
+        '-filter_complex', ";".join(filters),
+        '-map', '[out]',
+        '-vsync', '0',
+        '-f', 'image2pipe', '-c:v', 'mjpeg', '-q:v', '2',
+        'pipe:1'
+    ]
+    
+    try:
+        process = subprocess.run(cmd, check=True, capture_output=True)
+    except Exception as e:
+        logger.error(f"In-memory frame extraction failed: {e}")
+        return []
+    
+    # mjpeg output is a plain concatenation of JPEGs; SOI markers cannot occur
+    # inside entropy-coded data (0xFF is byte-stuffed), so split on them
+    data = process.stdout
+    starts = []
+    pos = data.find(JPEG_SOI)
+    while pos != -1:
+        starts.append(pos)
+        pos = data.find(JPEG_SOI, pos + 2)
+    frames = [data[a:b] for a, b in zip(starts, starts[1:] + [len(data)])]
+    
+    # One frame per timestamp in time order; any missing ones are past the end
+    # of the video. Drop blank frames only after pairing, so the rest keep
+    # their own timestamps.
+    return [(t, frame) for t, frame in zip(wanted, frames) if len(frame) > MIN_FRAME_BYTES]
+
+
+def extract_frames_at_times(video_path: str, timestamps: List[float], keyframes_only: bool = False) -> List[str]:
     """
     Extract multiple frames from video at specified timestamps.
     
     Args:
         video_path: Path to video file
         timestamps: List of timestamps in seconds to extract frames at
+        keyframes_only: Snap to preceding keyframes (see extract_frames_to_bytes)
     
     Returns:
         List of paths to successfully extracted frames
     """
-    frame_paths = []
     video_path_obj = Path(video_path)
     
     # Create frames directory if it doesn't exist
     frames_dir = Path("/app/temp/frames") if Path("/app/temp/frames").exists() else Path("temp/frames")
     frames_dir.mkdir(parents=True, exist_ok=True)
     
-    # Extract each frame
-    for i, timestamp in enumerate(timestamps):
-        # Generate output path
-        output_path = frames_dir / f"{video_path_obj.stem}_frame_{i}_{int(timestamp*10)}.jpg"
-        
-        # Extract frame
-        if extract_frame(video_path, timestamp, str(output_path)):
-            frame_paths.append(str(output_path))
+    # Unique per call: cached videos all share the stem "video", and concurrent
+    # pipelines must not overwrite or delete each other's frames
+    prefix = f"{video_path_obj.parent.name}_{video_path_obj.stem}_{uuid.uuid4().hex[:12]}"
+    output_paths = [
+        str(frames_dir / f"{prefix}_frame_{i}_{int(timestamp*10)}.jpg")
+        for i, timestamp in enumerate(timestamps)
+    ]
+    
+    # One ffmpeg process for all timestamps
+    if keyframes_only:
+        frames = dict(extract_frames_to_bytes(video_path, timestamps, keyframes_only=True))
+        ok = []
+        for timestamp, output_path in zip(timestamps, output_paths):
+            data = frames.get(round(max(0.0, timestamp), 3))
+            if data:
+                Path(output_path).write_bytes(data)
+            ok.append(bool(data))
+    else:
+        ok = extract_frames_batch(video_path, timestamps, output_paths)
+    
+    # Retry failed frames on their own (e.g. a bad timestamp broke the batch)
+    ok = [done or extract_frame(video_path, t, out) for done, t, out in zip(ok, timestamps, output_paths)]
+    
+    frame_paths = []
+    for i, (timestamp, output_path) in enumerate(zip(timestamps, output_paths)):
+        if ok[i]:
+            frame_paths.append(output_path)
             logger.info(f"Extracted frame {i+1}/{len(timestamps)} at {timestamp:.1f}s")
         else:
             logger.warning(f"Failed to extract frame at {timestamp:.1f}s")
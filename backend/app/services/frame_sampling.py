@@ -0,0 +1,216 @@
+"""
+Scene-change-aware candidate frame sampling.
+
+get_optimal_frame_times / get_fallback_frame_times place six frames at fixed
+offsets around the spoken mention, so several often land on cuts or on the
+same shot. Here one low-resolution greyscale decode pass (a few fps, 64x112)
+around the mention gives, per sampled frame:
+- scene change: histogram distance to the previous sample (cuts score high)
+- motion: mean absolute pixel difference to the neighbouring samples
+
+Samples are split into shots at cuts; within each shot the most stable
+frame away from the cut edges is the candidate, weighted by closeness to the
+mention. Distinct shots win first, then at most a second frame per shot;
+a single-shot video gets `count` evenly spaced samples instead.
+The result is timestamps plus scores, best first, so frame extraction and
+scoring (frame_scoring.py) see fewer, better candidates. Settings come from
+`frame_sampling` in config/scraping_settings.yaml.
+"""
+import logging
+import math
+import subprocess
+from typing import Dict, List, Optional
+import numpy as np
+from ..utils.config_loader import config
+from ..utils.ffmpeg import ffmpeg_binary
+from .wine_timing import get_optimal_frame_times, get_fallback_frame_times
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 64
+SAMPLE_HEIGHT = 112
+HIST_BINS = 32
+
+DEFAULTS = {
+    "enabled": True,
+    "count": 6,                 # candidates returned (evenly spaced when there is a single shot)
+    "fps": 4,                   # samples per second in the analysis pass
+    "window_before": 4.0,       # seconds analysed before the mention
+    "window_after": 10.0,       # seconds analysed after the mention
+    "max_scan_seconds": 180,    # cap for whole-video scans when there is no mention
+    "cut_threshold": 0.35,      # histogram distance (0-1) that counts as a cut
+    "edge_margin": 0.25,        # seconds skipped after/before a cut
+    "motion_scale": 0.05,       # mean abs difference at which stability drops to 1/e
+    "proximity_sigma": 3.0,     # seconds; how fast candidates lose weight away from the mention
+    "min_gap": 1.5,             # seconds between two candidates from the same shot
+    "max_per_shot": 2,
+}
+
+
+def _settings() -> Dict:
+    return {**DEFAULTS, **(config.scraping_settings.get("frame_sampling", {}) or {})}
+
+
+def _decode_gray(video_path: str, start: float, duration: float, fps: float) -> np.ndarray:
+    """Low-res greyscale samples of [start, start + duration) in one ffmpeg pass."""
+    cmd = [
+        ffmpeg_binary(), '-loglevel', 'error',
+        '-ss', f"{start:.3f}", '-t', f"{duration:.3f}", '-i', video_path,
+        '-an',
+        '-vf', f'fps={fps},scale={SAMPLE_WIDTH}:{SAMPLE_HEIGHT},format=gray',
+        '-f', 'rawvideo', 'pipe:1'
+    ]
+    process = subprocess.run(cmd, check=True, capture_output=True)
+    frame_bytes = SAMPLE_WIDTH * SAMPLE_HEIGHT
+    count = len(process.stdout) // frame_bytes
+    return np.frombuffer(process.stdout[:count * frame_bytes], dtype=np.uint8).reshape(count, SAMPLE_HEIGHT, SAMPLE_WIDTH)
+
+
+def _scene_and_motion(frames: np.ndarray):
+    """Per-sample scene-change score (vs previous) and motion (vs neighbours)."""
+    n = frames.shape[0]
+    scene = np.zeros(n, dtype=np.float64)
+    motion = np.zeros(n, dtype=np.float64)
+    if n < 2:
+        return scene, motion
+
+    bins = (frames >> 3).astype(np.int64).reshape(n, -1) + (np.arange(n) * HIST_BINS)[:, None]
+    hist = np.bincount(bins.ravel(), minlength=n * HIST_BINS).reshape(n, HIST_BINS)
+    hist = hist / hist.sum(axis=1, keepdims=True)
+    scene[1:] = 0.5 * np.abs(hist[1:] - hist[:-1]).sum(axis=1)
+
+    diff = np.abs(frames[1:].astype(np.float32) - frames[:-1].astype(np.float32)).mean(axis=(1, 2)) / 255.0
+    # Average of the differences on both sides; the ends only have one
+    motion[:-1] += diff
+    motion[1:] += diff
+    motion[1:-1] /= 2
+    return scene, motion
+
+
+def sample_candidate_frames(
+    video_path: str,
+    mention_time: Optional[float],
+    video_duration: float,
+    count: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Pick stable, distinct-shot candidate timestamps near a wine mention.
+
+    Args:
+        video_path: Path to video file
+        mention_time: Mention timestamp from find_wine_mention_with_signal,
+                      or None to scan the whole video
+        video_duration: Video length in seconds
+        count: Candidates to return (default: frame_sampling.count)
+
+    Returns:
+        [{'time', 'score', 'stability', 'motion', 'scene_change', 'shot'}]
+        best first; empty if the video could not be decoded
+    """
+    settings = _settings()
+    count = count or int(settings["count"])
+    fps = float(settings["fps"])
+
+    if mention_time is not None:
+        start = max(0.0, mention_time - float(settings["window_before"]))
+        end = min(video_duration, mention_time + float(settings["window_after"]))
+        target = mention_time + 0.75  # same anchor as get_optimal_frame_times
+    else:
+        start = min(1.0, video_duration / 4)
+        end = min(video_duration, start + float(settings["max_scan_seconds"]))
+        target = None
+    if end - start < 1.0 / fps:
+        return []
+
+    try:
+        frames = _decode_gray(video_path, start, end - start, fps)
+    except Exception as e:
+        logger.warning(f"Scene sampling decode failed: {e}")
+        return []
+    n = frames.shape[0]
+    if n == 0:
+        return []
+
+    times = start + np.arange(n) / fps
+    scene, motion = _scene_and_motion(frames)
+    cuts = scene > float(settings["cut_threshold"])
+    shot_ids = np.cumsum(cuts)
+
+    stability = np.exp(-motion / float(settings["motion_scale"]))
+    if target is None:
+        proximity = np.ones(n)
+    else:
+        sigma = float(settings["proximity_sigma"])
+        proximity = np.exp(-0.5 * ((times - target) / sigma) ** 2)
+    score = stability * (0.3 + 0.7 * proximity)
+
+    # Samples right next to a cut are mid-transition (fades, motion blur)
+    margin = max(1, int(math.ceil(float(settings["edge_margin"]) * fps)))
+    near_cut = np.zeros(n, dtype=bool)
+    for idx in np.flatnonzero(cuts):
+        near_cut[max(0, idx - margin):idx + margin] = True
+    eligible = ~near_cut
+    if not eligible.any():
+        eligible = np.ones(n, dtype=bool)
+
+    picked: List[int] = []
+    if not cuts.any():
+        # Single shot (one continuous take): nothing to choose between, so
+        # spread `count` samples evenly like the fixed-offset baseline did
+        pool = np.flatnonzero(eligible)
+        picked = sorted({int(pool[j]) for j in np.linspace(0, len(pool) - 1, min(count, len(pool))).round().astype(int)})
+    else:
+        # First pass: the best sample of each shot; second pass: extra samples
+        # from the strongest shots, spaced at least min_gap apart
+        order = [int(i) for i in np.argsort(-score, kind="stable") if eligible[i]]
+        per_shot: Dict[int, int] = {}
+        for i in order:
+            if len(picked) >= count:
+                break
+            if shot_ids[i] not in per_shot:
+                picked.append(i)
+                per_shot[shot_ids[i]] = 1
+        min_gap = float(settings["min_gap"])
+        for i in order:
+            if len(picked) >= count:
+                break
+            if i in picked or per_shot.get(shot_ids[i], 0) >= int(settings["max_per_shot"]):
+                continue
+            if all(abs(times[i] - times[j]) >= min_gap for j in picked):
+                picked.append(i)
+                per_shot[shot_ids[i]] = per_shot.get(shot_ids[i], 0) + 1
+
+    picked.sort(key=lambda i: -score[i])
+    candidates = []
+    for i in picked:
+        shot_start = int(np.flatnonzero(shot_ids == shot_ids[i])[0])
+        candidates.append({
+            "time": round(float(times[i]), 2),
+            "score": float(score[i]),
+            "stability": float(stability[i]),
+            "motion": float(motion[i]),
+            "scene_change": float(scene[shot_start]),
+            "shot": int(shot_ids[i]),
+        })
+    logger.debug(
+        f"Scene sampling {start:.1f}-{end:.1f}s: {int(cuts.sum())} cuts, "
+        f"candidates {[(c['time'], round(c['score'], 2)) for c in candidates]}"
+    )
+    return candidates
+
+
+def candidate_frame_times(video_path: str, mention_time: Optional[float], video_duration: float) -> List[float]:
+    """
+    Frame timestamps to extract, best first.
+
+    Uses sample_candidate_frames, and falls back to the fixed offsets of
+    get_optimal_frame_times / get_fallback_frame_times when sampling is
+    disabled or the video cannot be decoded.
+    """
+    if _settings()["enabled"]:
+        candidates = sample_candidate_frames(video_path, mention_time, video_duration)
+        if candidates:
+            return [c["time"] for c in candidates]
+    if mention_time is not None:
+        return get_optimal_frame_times(mention_time, video_duration)
+    return get_fallback_frame_times(video_duration)
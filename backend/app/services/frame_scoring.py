@@ -0,0 +1,230 @@
+"""
+Frame quality scoring for wine images.
+
+Candidate frames (see frame_extractor.extract_frames_at_times and the
+timestamps from wine_timing.get_optimal_frame_times) are decoded into one
+NumPy batch and scored together:
+- sharpness: variance of the Laplacian (blurry and transition frames score low)
+- exposure: distance of mean brightness from mid-grey, minus clipped pixels
+- colour entropy: Shannon entropy of a 512-bin RGB histogram (flat, empty
+  frames score low)
+- perceptual hash: 64-bit DCT hash, used to drop near-duplicate frames
+
+Frames are ranked by a weighted score plus a small bonus for timing priority,
+near-duplicates are dropped, and only the best few are uploaded. Weights and
+limits come from `frame_scoring` in config/scraping_settings.yaml.
+"""
+import logging
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from ..utils.config_loader import config
+from ..utils.ffmpeg import ffmpeg_binary
+
+logger = logging.getLogger(__name__)
+
+# Frames are scored at a fixed portrait size; both sides are multiples of
+# HASH_SIZE so the hash downsample is a plain block mean
+SCORE_WIDTH = 160
+SCORE_HEIGHT = 288
+HASH_SIZE = 32
+HASH_BITS = 8
+
+DEFAULTS = {
+    "enabled": True,
+    "max_frames": 4,            # frames uploaded per wine
+    "min_score": 0.2,           # frames below this are dropped (the best one is always kept)
+    "dedup_hamming": 8,         # hash distance (of 64 bits) at or below which frames are duplicates
+    "weights": {
+        "sharpness": 0.45,
+        "exposure": 0.3,
+        "entropy": 0.15,
+        "priority": 0.1,        # bonus for earlier timing candidates
+    },
+}
+
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _settings() -> Dict:
+    configured = config.scraping_settings.get("frame_scoring", {}) or {}
+    merged = {**DEFAULTS, **configured}
+    merged["weights"] = {**DEFAULTS["weights"], **(configured.get("weights") or {})}
+    return merged
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    return np.cos(np.pi * (2 * x + 1) * k / (2 * n)).astype(np.float32)
+
+
+_DCT = _dct_matrix(HASH_SIZE)
+
+
+def decode_frames(images: List[bytes]) -> np.ndarray:
+    """
+    Decode JPEG images into one RGB batch with a single ffmpeg process.
+
+    Args:
+        images: JPEG bytes per frame
+
+    Returns:
+        uint8 array of shape (N, SCORE_HEIGHT, SCORE_WIDTH, 3)
+    """
+    if not images:
+        return np.zeros((0, SCORE_HEIGHT, SCORE_WIDTH, 3), dtype=np.uint8)
+    cmd = [
+        ffmpeg_binary(), '-loglevel', 'error',
+        '-f', 'image2pipe', '-c:v', 'mjpeg', '-i', 'pipe:0',
+        '-vf', f'scale={SCORE_WIDTH}:{SCORE_HEIGHT}',
+        '-vsync', '0',
+        '-pix_fmt', 'rgb24', '-f', 'rawvideo', 'pipe:1'
+    ]
+    process = subprocess.run(cmd, input=b"".join(images), check=True, capture_output=True)
+    frame_bytes = SCORE_WIDTH * SCORE_HEIGHT * 3
+    count = len(process.stdout) // frame_bytes
+    if count != len(images):
+        raise ValueError(f"Decoded {count} of {len(images)} frames")
+    return np.frombuffer(process.stdout, dtype=np.uint8).reshape(count, SCORE_HEIGHT, SCORE_WIDTH, 3)
+
+
+def _perceptual_hash(gray: np.ndarray) -> np.ndarray:
+    n, h, w = gray.shape
+    small = gray.reshape(n, HASH_SIZE, h // HASH_SIZE, HASH_SIZE, w // HASH_SIZE).mean(axis=(2, 4))
+    coeffs = np.einsum("ij,njk,lk->nil", _DCT, small, _DCT)[:, :HASH_BITS, :HASH_BITS].reshape(n, -1)
+    # Median of the AC coefficients; the DC term only tracks brightness
+    median = np.median(coeffs[:, 1:], axis=1, keepdims=True)
+    return coeffs > median
+
+
+def score_frames(frames: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Quality metrics for a batch of decoded frames, all computed vectorized.
+
+    Args:
+        frames: uint8 array (N, H, W, 3) from decode_frames
+
+    Returns:
+        {'sharpness', 'exposure', 'entropy'} float arrays in [0, 1], the raw
+        'laplacian_var', 'brightness' (0-255) and 'phash' (N, 64) bool array
+    """
+    n = frames.shape[0]
+    gray = frames.astype(np.float32) @ _LUMA
+
+    # 4-neighbour Laplacian on the interior
+    lap = (
+        4 * gray[:, 1:-1, 1:-1]
+        - gray[:, :-2, 1:-1] - gray[:, 2:, 1:-1]
+        - gray[:, 1:-1, :-2] - gray[:, 1:-1, 2:]
+    )
+    lap_var = lap.reshape(n, -1).var(axis=1)
+    # Relative to the sharpest candidate: frames of one video share resolution
+    # and encoder, so the ratio is comparable where absolute values are not
+    sharpness = lap_var / max(float(lap_var.max()), 1e-6) if n else lap_var
+
+    flat = gray.reshape(n, -1)
+    brightness = flat.mean(axis=1)
+    clipped = ((flat < 10) | (flat > 245)).mean(axis=1)
+    exposure = np.clip(1 - np.abs(brightness - 128) / 128, 0, 1) * (1 - clipped)
+
+    # 8 levels per channel -> 512 bins, one bincount for the whole batch
+    q = (frames >> 5).astype(np.int64)
+    bins = (q[..., 0] * 64 + q[..., 1] * 8 + q[..., 2]).reshape(n, -1)
+    bins += (np.arange(n) * 512)[:, None]
+    hist = np.bincount(bins.ravel(), minlength=n * 512).reshape(n, 512).astype(np.float64)
+    p = hist / hist.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entropy = np.where(p > 0, -p * np.log2(p), 0).sum(axis=1) / 9.0
+
+    return {
+        "sharpness": sharpness,
+        "exposure": exposure,
+        "entropy": entropy,
+        "laplacian_var": lap_var,
+        "brightness": brightness,
+        "phash": _perceptual_hash(gray),
+    }
+
+
+def hamming_matrix(hashes: np.ndarray) -> np.ndarray:
+    """Pairwise Hamming distances between perceptual hashes."""
+    return (hashes[:, None, :] != hashes[None, :, :]).sum(axis=2)
+
+
+def rank_frames(images: List[bytes], max_frames: Optional[int] = None) -> List[Dict]:
+    """
+    Rank candidate frames best-first and drop near-duplicates.
+
+    Args:
+        images: JPEG bytes per frame, in timing priority order
+        max_frames: Keep at most this many (default: frame_scoring.max_frames)
+
+    Returns:
+        [{'index', 'score', 'sharpness', 'exposure', 'entropy'}] best first,
+        where index points into `images`
+    """
+    if not images:
+        return []
+    settings = _settings()
+    weights = settings["weights"]
+    max_frames = max_frames or int(settings["max_frames"])
+
+    metrics = score_frames(decode_frames(images))
+    n = len(images)
+    priority = 1 - np.arange(n) / max(1, n - 1)
+    score = (
+        weights["sharpness"] * metrics["sharpness"]
+        + weights["exposure"] * metrics["exposure"]
+        + weights["entropy"] * metrics["entropy"]
+        + weights["priority"] * priority
+    )
+    distances = hamming_matrix(metrics["phash"])
+
+    kept: List[int] = []
+    for i in np.argsort(-score, kind="stable"):
+        if len(kept) >= max_frames:
+            break
+        if kept and score[i] < settings["min_score"]:
+            break
+        if any(distances[i, j] <= settings["dedup_hamming"] for j in kept):
+            continue
+        kept.append(int(i))
+
+    return [
+        {
+            "index": i,
+            "score": float(score[i]),
+            "sharpness": float(metrics["sharpness"][i]),
+            "exposure": float(metrics["exposure"][i]),
+            "entropy": float(metrics["entropy"][i]),
+        }
+        for i in kept
+    ]
+
+
+def rank_frame_files(frame_paths: List[str], max_frames: Optional[int] = None) -> List[str]:
+    """
+    rank_frames for extracted frame files. Returns the kept paths best first.
+
+    With scoring disabled (frame_scoring.enabled: false) or on a decode
+    error, the paths come back unchanged, capped at max_frames.
+    """
+    settings = _settings()
+    limit = max_frames or int(settings["max_frames"])
+    paths = [str(p) for p in frame_paths if Path(p).exists()]
+    if not settings["enabled"] or len(paths) <= 1:
+        return paths[:limit]
+    try:
+        ranked = rank_frames([Path(p).read_bytes() for p in paths], limit)
+    except Exception as e:
+        logger.warning(f"Frame scoring failed, keeping timing order: {e}")
+        return paths[:limit]
+    for rank in ranked:
+        logger.info(
+            f"Frame {Path(paths[rank['index']]).name}: score {rank['score']:.2f} "
+            f"(sharp {rank['sharpness']:.2f}, exposure {rank['exposure']:.2f}, entropy {rank['entropy']:.2f})"
+        )
+    logger.info(f"Kept {len(ranked)}/{len(paths)} frames after scoring and de-duplication")
+    return [paths[rank["index"]] for rank in ranked]
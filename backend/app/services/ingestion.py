@@ -0,0 +1,323 @@
+"""
+TikTok post ingestion pipeline.
+
+Runs the full add-a-post flow (oEmbed metadata, download, Whisper, GPT
+extraction, frame extraction, Cloudinary upload, save) for one URL, or for
+many URLs at once. Every blocking stage runs in a worker thread so the event
+loop stays free; only the Mongo calls run on the loop.
+
+Each stage has its own concurrency cap (downloads, ASR, LLM, ffmpeg,
+uploads), shared by every pipeline in the process, so a bulk run keeps all
+stages busy without flooding TikTok or the OpenAI/Cloudinary APIs. Caps come
+from `ingestion` in config/scraping_settings.yaml.
+"""
+import asyncio
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+from pymongo.errors import DuplicateKeyError
+from ..utils.config_loader import config
+from .wine_cache import wine_cache
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[str, str], Awaitable[None]]
+
+
+# Stage -> max concurrent calls when not configured
+DEFAULT_STAGE_LIMITS = {
+    "download": 6,
+    "asr": 8,
+    "llm": 8,
+    "ffmpeg": 4,
+    "upload": 8,
+}
+DEFAULT_PIPELINES = 16
+
+
+class IngestionError(Exception):
+    """A pipeline step failed in a way worth reporting to the admin as-is."""
+
+
+async def _noop_progress(stage: str, message: str) -> None:
+    return None
+
+
+def _settings() -> Dict:
+    return config.scraping_settings.get("ingestion", {}) or {}
+
+
+class StageLimits:
+    """Per-stage semaphores plus a thread pool big enough to fill all of them."""
+
+    def __init__(self, limits: Dict[str, int]):
+        self.limits = {stage: max(1, int(n)) for stage, n in limits.items()}
+        self._semaphores = {stage: asyncio.Semaphore(n) for stage, n in self.limits.items()}
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(self.limits.values()),
+            thread_name_prefix="ingestion",
+        )
+
+    async def run(self, stage: str, fn, *args):
+        """Run a blocking call in the pool once a slot for its stage is free."""
+        async with self._semaphores[stage]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+
+
+_stage_limits: Optional[StageLimits] = None
+
+
+def stage_limits() -> StageLimits:
+    """Process-wide stage limits, built from settings on first use."""
+    global _stage_limits
+    if _stage_limits is None:
+        limits = dict(DEFAULT_STAGE_LIMITS)
+        limits.update(_settings().get("concurrency", {}) or {})
+        _stage_limits = StageLimits(limits)
+    return _stage_limits
+
+
+async def ingest_tiktok_post(db, tiktok_url: str, progress: Optional[ProgressCallback] = None) -> Dict:
+    """
+    Process a single TikTok URL and extract wines.
+
+    Args:
+        db: Motor database
+        tiktok_url: TikTok video URL
+        progress: Optional async callback (stage, message) for status updates
+
+    Returns:
+        Summary dict: status, message, wines_added, wines
+    """
+    from ..scrapers.tiktok_oembed_scraper import TikTokOEmbedScraper
+    from .video_downloader import TikTokVideoDownloader
+    from .transcription import transcribe_video_audio, prompt_context_terms, influencer_history
+    from .wine_extractor import extract_wines_from_caption_and_transcription
+    from .frame_extractor import extract_frames_at_times
+    from .frame_scoring import rank_frame_files
+    from .wine_timing import find_wine_mention_with_signal
+    from .frame_sampling import candidate_frame_times
+    from .cloudinary_upload import get_uploader
+
+    progress = progress or _noop_progress
+    limits = stage_limits()
+
+    # 1. Fetch video metadata
+    await progress("metadata", "Fetching video metadata")
+    scraper = TikTokOEmbedScraper()
+    video_data = await limits.run("download", scraper.get_video_data, tiktok_url)
+    if not video_data:
+        raise IngestionError("Failed to fetch TikTok video data")
+
+    caption = video_data.get("caption", "")
+
+    # 2. Download the video once; ASR audio is derived from it
+    await progress("download", "Downloading video")
+    downloader = TikTokVideoDownloader()
+
+    media = await limits.run("download", downloader.acquire_media, tiktok_url)
+    if not media:
+        raise IngestionError("Failed to download video")
+    audio_path, video_path = media["audio_path"], media["video_path"]
+
+    # 3. Transcribe audio
+    await progress("transcribe", "Transcribing audio with Whisper")
+    # Caption tokens and the influencer's earlier wines seed the speculative second pass
+    history = await influencer_history(db, video_data.get("author_name"))
+    context_terms = prompt_context_terms(caption, history)
+    transcription_result = await limits.run("asr", transcribe_video_audio, audio_path, context_terms)
+    if not transcription_result or transcription_result.get("status") != "success":
+        raise IngestionError("Transcription failed")
+
+    transcription_text = transcription_result.get("text", "")
+    segments = transcription_result.get("segments", [])
+
+    # 4. Pre-filter: wines are only kept with an explicitly named supermarket,
+    # so skip the LLM when neither caption nor transcript names one
+    mention = config.supermarket_filter.first_supermarket(caption, transcription_text)
+    pre_filter = (config.scraping_settings.get("cost_optimization", {}) or {}).get("pre_filter_videos", True)
+    if mention:
+        logger.info(f"Supermarket mention: {mention.supermarket} ('{mention.alias}' at {mention.start})")
+    elif pre_filter:
+        return {
+            "status": "no_wines",
+            "message": "No supermarket mentioned in caption or transcript",
+            "wines_added": 0
+        }
+
+    # 5. Extract wines
+    await progress("extract", "Extracting wine data with AI")
+    wines = await limits.run("llm", extract_wines_from_caption_and_transcription, caption, transcription_text)
+
+    if not wines:
+        return {
+            "status": "no_wines",
+            "message": "No wines found in this video",
+            "wines_added": 0
+        }
+
+    wines_added = 0
+
+    # 6. Process each wine
+    for wine_data in wines:
+        # Check if this video already has a wine (one wine per video)
+        # Using post_url as unique identifier allows safe editing of all fields
+        existing = await db.wines.find_one({
+            "post_url": tiktok_url
+        })
+
+        if existing:
+            continue  # Skip duplicates
+
+        # Find optimal frame times using signal words
+        wine_name = wine_data["name"]
+        timestamp, method = find_wine_mention_with_signal(wine_name, segments)
+
+        video_duration = segments[-1]['end'] if segments else 30.0
+        # Stable, distinct shots near the mention (whole video if not found)
+        frame_times = await limits.run(
+            "ffmpeg", candidate_frame_times, video_path, timestamp or None, video_duration
+        )
+
+        # Extract frames
+        await progress("frames", f"Extracting frames for {wine_name}")
+        frame_paths = await limits.run("ffmpeg", extract_frames_at_times, video_path, frame_times)
+        # Keep the sharpest, best exposed, distinct frames
+        frame_paths = await limits.run("ffmpeg", rank_frame_files, frame_paths)
+
+        # Upload to Cloudinary
+        # Generate a temporary wine_id for uploads (will be replaced by MongoDB _id)
+        await progress("upload", f"Uploading {len(frame_paths)} images to Cloudinary")
+        temp_wine_id = hashlib.md5(f"{tiktok_url}_{wine_data['name']}".encode()).hexdigest()[:16]
+
+        # A new wine: nothing is stored under its id yet, so no listing
+        uploader = get_uploader()
+        uploaded = await asyncio.gather(*(
+            limits.run("upload", uploader.upload_image, frame_path, temp_wine_id, i)
+            for i, frame_path in enumerate(frame_paths)
+        ))
+        image_urls = [url for url in uploaded if url]
+
+        # Save to database
+        await progress("save", "Saving to database")
+        wine_doc = {
+            "name": wine_data["name"],
+            "supermarket": wine_data["supermarket"],
+            "wine_type": wine_data["wine_type"],
+            "image_urls": image_urls,
+            "rating": wine_data.get("rating"),
+            "description": wine_data.get("description"),
+            "influencer_source": video_data.get("author_name", "manual_add") + "_tiktok",
+            "post_url": tiktok_url,
+            "date_found": datetime.now(timezone.utc),
+            "in_stock": None,
+            "last_checked": None
+        }
+
+        try:
+            insert_result = await db.wines.insert_one(wine_doc)
+        except DuplicateKeyError:
+            continue  # Added concurrently by another pipeline
+        await wine_cache.refresh(db, insert_result.inserted_id)
+        wines_added += 1
+
+    return {
+        "status": "success",
+        "message": f"Successfully added {wines_added} wine(s)",
+        "wines_added": wines_added,
+        "wines": [{"name": w["name"], "supermarket": w["supermarket"]} for w in wines]
+    }
+
+
+async def find_known_urls(db, urls: List[str], include_processed: bool = True) -> Set[str]:
+    """
+    URLs that already have a wine (or were already processed by the scraper),
+    found with one $in query over both collections.
+    """
+    if not urls:
+        return set()
+    pipeline = [
+        {"$match": {"post_url": {"$in": urls}}},
+        {"$project": {"_id": 0, "url": "$post_url"}},
+    ]
+    if include_processed:
+        pipeline.append({"$unionWith": {"coll": "processed_videos", "pipeline": [
+            {"$match": {"video_url": {"$in": urls}}},
+            {"$project": {"_id": 0, "url": "$video_url"}},
+        ]}})
+    return {doc["url"] async for doc in db.wines.aggregate(pipeline)}
+
+
+async def ingest_tiktok_posts(
+    db,
+    tiktok_urls: Iterable[str],
+    progress: Optional[ProgressCallback] = None,
+    pipelines: Optional[int] = None,
+    include_processed: bool = True,
+) -> Dict:
+    """
+    Process many TikTok URLs concurrently.
+
+    Args:
+        db: Motor database
+        tiktok_urls: TikTok video URLs (duplicates and blanks are ignored)
+        progress: Optional async callback (stage, message) for status updates
+        pipelines: URLs in flight at once (default from settings)
+        include_processed: Also skip URLs already in processed_videos
+
+    Returns:
+        Summary dict: status, message, counts and one result per URL
+    """
+    progress = progress or _noop_progress
+    pipelines = max(1, int(pipelines or _settings().get("pipelines", DEFAULT_PIPELINES)))
+
+    urls = list(dict.fromkeys(u.strip() for u in tiktok_urls if u and u.strip()))
+    await progress("dedup", f"Checking {len(urls)} URL(s) against the database")
+    known = await find_known_urls(db, urls, include_processed)
+    todo = [u for u in urls if u not in known]
+
+    results: Dict[str, Dict] = {
+        u: {"url": u, "status": "skipped", "wines_added": 0, "error": None} for u in known
+    }
+    counts = {"done": 0, "wines_added": 0, "failed": 0}
+    pool = asyncio.Semaphore(pipelines)
+
+    await progress("ingest", f"Processing {len(todo)} URL(s), {len(known)} already known")
+
+    async def run(url: str) -> None:
+        async with pool:
+            entry = {"url": url, "status": "failed", "wines_added": 0, "error": None}
+            try:
+                outcome = await ingest_tiktok_post(db, url)
+                entry["status"] = outcome["status"]
+                entry["wines_added"] = outcome.get("wines_added", 0)
+            except IngestionError as e:
+                entry["error"] = str(e)
+            except Exception as e:
+                logger.error(f"Bulk ingestion failed for {url}: {e}")
+                entry["error"] = str(e)
+            results[url] = entry
+
+            counts["done"] += 1
+            counts["wines_added"] += entry["wines_added"]
+            counts["failed"] += entry["status"] == "failed"
+            await progress(
+                "ingest",
+                f"{counts['done']}/{len(todo)} processed, {counts['wines_added']} wine(s) added, {counts['failed']} failed",
+            )
+
+    await asyncio.gather(*(run(u) for u in todo))
+
+    return {
+        "status": "success",
+        "message": f"Processed {len(todo)} URL(s), added {counts['wines_added']} wine(s)",
+        "total": len(urls),
+        "skipped": len(known),
+        "processed": len(todo),
+        "failed": counts["failed"],
+        "wines_added": counts["wines_added"],
+        "results": [results[u] for u in urls],
+    }
@@ -21,7 +21,7 @@ async def mark_stale_wines():
     
     result = await db.wines.update_many(
         {"date_found": {"$lt": thirty_days_ago}, "in_stock": {"$ne": False}},
-        {"$set": {"in_stock": False}}
+        {"$set": {"in_stock": False}, "$currentDate": {"updated_at": True}}
     )
     
     print(f"Marked {result.modified_count} old wines as potentially out of stock")
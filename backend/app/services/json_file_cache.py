@@ -0,0 +1,102 @@
+"""
+Directory of JSON entries keyed by a hex digest, shared by the transcription
+and extraction caches.
+
+Each entry is one file, `root/<key[:2]>/<key>.json`, written to a temp file
+and renamed into place, so scripts, the API and CI runs can share a directory
+without locks. Subclasses name their settings section in
+config/scraping_settings.yaml (`dir`, `enabled`) and define how keys are
+derived; everything else lives here.
+"""
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from ..utils.config_loader import config
+
+logger = logging.getLogger(__name__)
+
+
+class JsonFileCache:
+    # Section in scraping_settings.yaml and directory name under temp/
+    settings_section = ""
+    label = "cache"
+
+    def __init__(self, root: Optional[Path] = None):
+        settings = config.scraping_settings.get(self.settings_section, {}) or {}
+        self.root = Path(root) if root else self._default_root(settings)
+        self.enabled = bool(settings.get("enabled", True))
+        self.hits = 0
+        self.misses = 0
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _default_root(self, settings: Dict) -> Path:
+        if settings.get("dir"):
+            return Path(settings["dir"])
+        base = Path("/app/temp") if Path("/app/temp").exists() else Path("temp")
+        return base / self.settings_section
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def _entries(self) -> Iterator[Tuple[Path, Optional[Dict]]]:
+        """(path, entry) for every file; entry is None when it cannot be read."""
+        for path in self.root.glob("*/*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    yield path, json.load(f)
+            except (json.JSONDecodeError, OSError):
+                yield path, None
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached entry for a key, or None."""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable {self.label} entry {key}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict) -> None:
+        """Store an entry; `key` and `cached_at` are added."""
+        if not self.enabled:
+            return
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({**entry, "key": key, "cached_at": datetime.now(timezone.utc).isoformat()}, f, ensure_ascii=False, default=str)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write {self.label} entry {key}: {e}")
+
+    def stats(self) -> Dict:
+        files = list(self.root.glob("*/*.json"))
+        return {
+            "root": str(self.root),
+            "entries": len(files),
+            "bytes": sum(p.stat().st_size for p in files),
+        }
+
+    def clear(self) -> int:
+        """Delete all entries. Returns the number removed."""
+        removed = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
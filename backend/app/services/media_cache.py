@@ -0,0 +1,261 @@
+"""
+Persistent media cache for downloaded TikTok audio and video.
+
+Files are keyed by TikTok video id plus format ("audio", "video", "pcm16k")
+and kept across runs, so re-transcription and frame re-extraction never
+download the same video twice. A JSON manifest next to the files records size, duration,
+sha256 checksum, fetched_at, last access time and post date per entry. When
+the cache grows past its byte budget the least recently used entries are
+evicted, except entries handed out in the last `evict_grace_seconds`: another
+pipeline may still be reading them.
+
+Shared by TikTokVideoDownloader, so every script and the admin pipeline use
+the same cache. The API, scripts and CI runs may use one directory at once:
+every manifest read-modify-write (and the file moves and evictions that go
+with it) happens under an exclusive flock on `manifest.lock`, plus a thread
+lock within the process. Location and budget come from `media_cache` in
+config/scraping_settings.yaml.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+from ..utils.config_loader import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, the thread lock still covers one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_MB = 4096
+# Entries accessed this recently are in use by some pipeline and never evicted
+DEFAULT_EVICT_GRACE_SECONDS = 600
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = "manifest.lock"
+
+_VIDEO_ID_RE = re.compile(r"/video/(\d+)")
+
+
+def video_id_from_url(video_url: str) -> str:
+    """TikTok video id from a URL (falls back to the last path segment)."""
+    match = _VIDEO_ID_RE.search(video_url or "")
+    if match:
+        return match.group(1)
+    return (video_url or "").split("#")[0].split("?")[0].rstrip("/").split("/")[-1]
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _default_root() -> Path:
+    configured = (config.scraping_settings.get("media_cache", {}) or {}).get("dir")
+    if configured:
+        return Path(configured)
+    return Path("/app/temp/media_cache") if Path("/app/temp").exists() else Path("temp/media_cache")
+
+
+class MediaCache:
+    def __init__(self, root: Optional[Path] = None, max_bytes: Optional[int] = None):
+        settings = config.scraping_settings.get("media_cache", {}) or {}
+        self.root = Path(root) if root else _default_root()
+        self.max_bytes = max_bytes if max_bytes is not None else int(settings.get("max_mb", DEFAULT_MAX_MB)) * 1024 * 1024
+        self.enabled = bool(settings.get("enabled", True))
+        self.evict_grace = timedelta(seconds=float(settings.get("evict_grace_seconds", DEFAULT_EVICT_GRACE_SECONDS)))
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive access to the manifest across threads and processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.root / LOCK_NAME, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def key(video_id: str, fmt: str) -> str:
+        return f"{video_id}:{fmt}"
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, manifest: Dict[str, Dict]) -> None:
+        # Write-then-rename so a crash never leaves a half-written manifest
+        tmp = self.manifest_path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+
+    def contains(self, path) -> bool:
+        """Whether a file lives inside the cache (callers must not delete it)."""
+        try:
+            return Path(path).resolve().is_relative_to(self.root.resolve())
+        except Exception:
+            return False
+
+    def get(self, video_id: str, fmt: str) -> Optional[Dict]:
+        """
+        Cached entry for a video id and format, or None.
+
+        Entries whose file vanished or changed size are dropped.
+        """
+        if not self.enabled:
+            return None
+        key = self.key(video_id, fmt)
+        with self._locked():
+            manifest = self._load()
+            entry = manifest.get(key)
+            if not entry:
+                return None
+            path = self.root / entry["file"]
+            if not path.exists() or path.stat().st_size != entry.get("size"):
+                manifest.pop(key, None)
+                self._save(manifest)
+                return None
+            entry["last_access"] = _now_iso()
+            self._save(manifest)
+        return {**entry, "path": str(path)}
+
+    def put(
+        self,
+        video_id: str,
+        fmt: str,
+        src_path: str,
+        duration: Optional[float] = None,
+        post_date: Optional[datetime] = None,
+    ) -> Dict:
+        """
+        Move a freshly downloaded file into the cache and record it.
+
+        Returns:
+            Manifest entry with the cached `path`
+        """
+        src = Path(src_path)
+        # Keep compound suffixes (".norm.wav") so callers can still recognise the file
+        file_name = f"{video_id}/{fmt}{''.join(src.suffixes)}"
+        dest = self.root / file_name
+        sha256 = _sha256(src)
+        # Move under the lock too, so another process's eviction of an older
+        # entry for the same key cannot delete the file we just put there
+        with self._locked():
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if src.resolve() != dest.resolve():
+                shutil.move(str(src), str(dest))
+
+            now = _now_iso()
+            entry = {
+                "video_id": video_id,
+                "format": fmt,
+                "file": file_name,
+                "size": dest.stat().st_size,
+                "duration": duration,
+                "sha256": sha256,
+                "post_date": post_date.isoformat() if post_date else None,
+                "fetched_at": now,
+                "last_access": now,
+            }
+            manifest = self._load()
+            manifest[self.key(video_id, fmt)] = entry
+            self._evict(manifest, self.max_bytes, keep=self.key(video_id, fmt))
+            self._save(manifest)
+        return {**entry, "path": str(dest)}
+
+    def _evict(self, manifest: Dict[str, Dict], budget: int, keep: Optional[str] = None) -> List[str]:
+        """
+        Drop least recently used entries until the cache fits `budget` bytes.
+        Entries accessed within evict_grace may still be open elsewhere and are
+        kept, even if that leaves the cache over budget for a while.
+        """
+        total = sum(e.get("size", 0) for e in manifest.values())
+        cutoff = (datetime.now(timezone.utc) - self.evict_grace).isoformat()
+        evicted = []
+        for key, entry in sorted(manifest.items(), key=lambda kv: kv[1].get("last_access") or ""):
+            if total <= budget:
+                break
+            if (entry.get("last_access") or "") >= cutoff:
+                # Sorted oldest first: everything from here on is in use
+                break
+            if key == keep:
+                continue
+            path = self.root / entry["file"]
+            try:
+                path.unlink(missing_ok=True)
+                if path.parent != self.root and not any(path.parent.iterdir()):
+                    path.parent.rmdir()
+            except OSError as e:
+                logger.warning(f"Could not evict {path}: {e}")
+                continue
+            total -= entry.get("size", 0)
+            del manifest[key]
+            evicted.append(key)
+        if evicted:
+            logger.info(f"Media cache evicted {len(evicted)} entries")
+        return evicted
+
+    def prune(self, max_bytes: Optional[int] = None) -> List[str]:
+        """Evict down to `max_bytes` (default: the configured budget)."""
+        with self._locked():
+            manifest = self._load()
+            evicted = self._evict(manifest, self.max_bytes if max_bytes is None else max_bytes)
+            self._save(manifest)
+        return evicted
+
+    def stats(self) -> Dict:
+        manifest = self._load()
+        by_format: Dict[str, Dict] = {}
+        for entry in manifest.values():
+            fmt = by_format.setdefault(entry["format"], {"entries": 0, "bytes": 0})
+            fmt["entries"] += 1
+            fmt["bytes"] += entry.get("size", 0)
+        return {
+            "root": str(self.root),
+            "entries": len(manifest),
+            "bytes": sum(e.get("size", 0) for e in manifest.values()),
+            "max_bytes": self.max_bytes,
+            "by_format": by_format,
+        }
+
+
+_media_cache: Optional[MediaCache] = None
+_media_cache_lock = threading.Lock()
+
+
+def get_media_cache() -> MediaCache:
+    """Process-wide media cache, created on first use."""
+    global _media_cache
+    with _media_cache_lock:
+        if _media_cache is None:
+            _media_cache = MediaCache()
+        return _media_cache
@@ -7,6 +7,7 @@ import requests
 import tempfile
 from openai import OpenAI
 from ..config import settings
+from ..utils.config_loader import config
 
 client = OpenAI(api_key=settings.openai_api_key)
 
@@ -57,9 +58,8 @@ def caption_has_enough_info(caption: str) -> bool:
     
     caption_lower = caption.lower()
     
-    # Check if it mentions supermarket
-    supermarkets = ['albert heijn', 'ah', 'appie', 'jumbo', 'lidl', 'aldi', 'hema', 'dirk', 'plus']
-    has_supermarket = any(sm in caption_lower for sm in supermarkets)
+    # Check if it mentions a specific supermarket (shared compiled pre-filter)
+    has_supermarket = config.supermarket_filter.first_supermarket(caption) is not None
     
     # Check if it has wine details (name or variety)
     wine_details = ['malbec', 'chardonnay', 'sauvignon', 'merlot', 'cabernet', 
@@ -1,18 +1,26 @@
 """
 Audio Transcription Service
-Transcribes audio files using OpenAI Whisper API with lexicon-guided prompt
-and a selective two-pass strategy to improve proper-noun fidelity.
+Transcribes audio files with the configured ASR backend (OpenAI Whisper API
+or a local faster-whisper model, see asr_backends.py) using a lexicon-guided
+prompt and a selective two-pass strategy to improve proper-noun fidelity.
+Results are cached by audio content and prompt version (transcription_cache.py).
 """
+import hashlib
+import json
 import os
-from openai import OpenAI
-from typing import Dict, List
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
 import time
+import wave
 from mutagen.mp3 import MP3
-from ..config import settings
 from ..utils.config_loader import config
-from .audio_preprocess import simple_preprocess
-
-client = OpenAI(api_key=settings.openai_api_key)
+from ..utils.lexicon_matcher import fold
+from .audio_preprocess import simple_preprocess, vad_settings, vad_split
+from .transcription_cache import audio_fingerprint, get_transcription_cache
+from .asr_backends import get_asr_backend
 
 
 def get_audio_duration(audio_path: str) -> float:
@@ -26,6 +34,9 @@ def get_audio_duration(audio_path: str) -> float:
         Duration in seconds
     """
     try:
+        if audio_path.lower().endswith('.wav'):
+            with wave.open(audio_path, 'rb') as w:
+                return w.getnframes() / float(w.getframerate())
         audio = MP3(audio_path)
         return audio.info.length
     except Exception as e:
@@ -36,9 +47,12 @@ def get_audio_duration(audio_path: str) -> float:
         return estimated_duration
 
 
-def _build_initial_prompt(max_terms: int = 80) -> str:
+def _build_initial_prompt(max_terms: int = 80, compiled=None) -> str:
     """Build a concise initial prompt from the YAML lexicon."""
-    terms: List[str] = config.get_prompt_terms(max_items=max_terms)
+    if compiled is not None:
+        terms: List[str] = list(compiled.prompt_terms[:max_terms])
+    else:
+        terms = config.get_prompt_terms(max_items=max_terms)
     # Keep punctuation minimal; preserve diacritics
     if not terms:
         return ""
@@ -48,32 +62,162 @@ def _build_initial_prompt(max_terms: int = 80) -> str:
     )
 
 
+def _prompt_version(compiled) -> str:
+    """Hash of everything in the config that shapes a transcript: prompt, lexicon, asr settings."""
+    payload = json.dumps(
+        [_build_initial_prompt(compiled=compiled), compiled.lexicon, compiled.scraping_settings.get('asr', {})],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+
+# Compiled once per config version instead of on every transcription
+config.register_compiler("asr_initial_prompt", lambda compiled: _build_initial_prompt(compiled=compiled))
+config.register_compiler("asr_prompt_version", _prompt_version)
+
+
+def _two_pass_enabled() -> bool:
+    asr_cfg = config.scraping_settings.get('asr', {}) or {}
+    # Allow env override for experiments: ASR_ENABLE_TWO_PASS=0/1
+    env_override = os.getenv('ASR_ENABLE_TWO_PASS')
+    if env_override is not None:
+        return env_override.strip() not in ('0', 'false', 'False')
+    return bool(asr_cfg.get('enable_two_pass', True))
+
+
 def _should_second_pass(text: str) -> bool:
     """Heuristic to decide if a second pass could help."""
     if not text:
         return False
-    # Few lexicon hits => likely need help
-    hits = 0
-    folded_text = text.lower()
-    for term in config.get_prompt_terms(max_items=50):
-        t = term.lower()
-        if len(t) >= 4 and t in folded_text:
-            hits += 1
-            if hits >= 3:
-                break
+    # Few lexicon hits => likely need help (one automaton pass over the text)
+    hits = config.lexicon_matcher.count_prompt_hits(text, max_items=50, limit=3)
     has_enough_hits = hits >= 3
     # Look for likely corrupted proper nouns (sequences with many capitals/hyphens)
-    suspicious = any(part for part in text.split() if config.is_wine_like_token(part) and part.isupper())
+    suspicious = any(part for part in text.split() if part.isupper() and config.is_wine_like_token(part))
     return not has_enough_hits or suspicious
 
 
-def transcribe_audio_file(audio_path: str, retry_count: int = 1) -> Dict:
+def _speculative_enabled() -> bool:
+    asr_cfg = config.scraping_settings.get('asr', {}) or {}
+    return bool(asr_cfg.get('speculative_second_pass', False))
+
+
+def _remove_when_done(path: str, futures: List[Future]) -> None:
+    """Remove a temp dir now, or once the last of futures (still reading it) finishes."""
+    running = [f for f in futures if not f.done()]
+    if not running:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    lock = threading.Lock()
+    left = [len(running)]
+
+    def finished(_):
+        with lock:
+            left[0] -= 1
+            last = left[0] == 0
+        if last:
+            shutil.rmtree(path, ignore_errors=True)
+
+    for f in running:
+        f.add_done_callback(finished)
+
+
+def _enriched_prompt(candidates: List[str]) -> str:
+    """Second-pass prompt: top lexicon terms plus up to 20 candidate proper nouns."""
+    enriched_terms = config.get_prompt_terms(max_items=60) + candidates[:20]
+    # Deduplicate preserving order
+    seen = set()
+    enriched_terms_dedup = []
+    for t in enriched_terms:
+        if t not in seen:
+            seen.add(t)
+            enriched_terms_dedup.append(t)
+    return (
+        "Herhaal transcriptie met aandacht voor eigennamen. Bewaar accenten en verander de spelling van merknamen niet. Termen: "
+        + ", ".join(enriched_terms_dedup)
+    )
+
+
+def prompt_context_terms(caption: str = "", history: Optional[List[str]] = None, limit: int = 20) -> List[str]:
+    """
+    Proper-noun candidates known before transcription, for the speculative
+    second pass: wine-like caption tokens (hashtags unwrapped, mentions and
+    links skipped), then wine names previously found for the influencer.
+    """
+    terms: List[str] = []
+    for word in (caption or "").split():
+        if word.startswith('@') or '://' in word:
+            continue
+        token = word.lstrip('#').strip('.,:;!?()[]{}\"\'')
+        if config.is_wine_like_token(token) and token not in terms:
+            terms.append(token)
+    for name in history or []:
+        if name and name not in terms:
+            terms.append(name)
+    return terms[:limit]
+
+
+async def influencer_history(db, handle: str, limit: int = 20) -> List[str]:
+    """Names of the wines most recently found for an influencer (for prompt_context_terms)."""
+    if db is None or not handle:
+        return []
+    try:
+        cursor = db.wines.find({"influencer_source": f"{handle}_tiktok"}, {"name": 1}).sort("date_found", -1).limit(limit)
+        return [doc["name"] async for doc in cursor if doc.get("name")]
+    except Exception as e:
+        print(f"    Warning: could not load wine history for @{handle}: {e}")
+        return []
+
+
+def _transcribe_chunks(
+    backend, chunks: list, prompt: str, concurrency: int,
+    cancel: Optional[threading.Event] = None, usage: Optional[Dict] = None
+) -> Dict:
+    """Transcribe VAD chunks concurrently and stitch them back onto the original timeline."""
+    lock = threading.Lock()
+
+    def one(chunk) -> Dict:
+        # Chunks not started before a cancel are never sent
+        if cancel is not None and cancel.is_set():
+            return {'text': '', 'segments': []}
+        if usage is not None:
+            with lock:
+                usage['seconds'] += chunk.duration
+        return backend.transcribe(chunk.path, prompt=prompt, language="nl", cancel=cancel)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        responses = list(pool.map(one, chunks))
+    texts = []
+    segments = []
+    for chunk, response in zip(chunks, responses):
+        if (response['text'] or '').strip():
+            texts.append(response['text'].strip())
+        for seg in response['segments'] or []:
+            seg = dict(seg)
+            seg['start'] = round(chunk.to_original(float(seg['start'])), 3)
+            seg['end'] = round(chunk.to_original(float(seg['end'])), 3)
+            seg['id'] = len(segments)
+            segments.append(seg)
+    return {'text': ' '.join(texts), 'segments': segments}
+
+
+def transcribe_audio_file(
+    audio_path: str,
+    retry_count: int = 1,
+    use_cache: bool = True,
+    context_terms: Optional[List[str]] = None
+) -> Dict:
     """
-    Transcribe audio using OpenAI Whisper API
+    Transcribe audio with the ASR backend selected by `asr.provider`
     
     Args:
         audio_path: Path to audio file
         retry_count: Number of retries on failure (default: 1)
+        use_cache: Return a cached transcript of the same audio and prompt
+                   version instead of calling the API (default: True)
+        context_terms: Proper nouns known up front (prompt_context_terms);
+                       with asr.speculative_second_pass the second pass
+                       starts alongside pass 1 using them
     
     Returns:
         {
@@ -92,6 +236,8 @@ def transcribe_audio_file(audio_path: str, retry_count: int = 1) -> Dict:
         'segments': []  # Store timing segments for frame extraction
     }
     
+    vad_dir = None
+    pass2_running: List[Future] = []
     try:
         # Preprocess audio (loudness normalize to mono 16k wav)
         processed_path = simple_preprocess(audio_path)
@@ -99,34 +245,95 @@ def transcribe_audio_file(audio_path: str, retry_count: int = 1) -> Dict:
         duration = get_audio_duration(audio_path)
         result['duration'] = duration
         
-        print(f"    Transcribing audio ({duration:.1f}s)...")
+        # Config version this transcription ran with (lexicon/prompt tuning)
+        config_version = config.version
+        two_pass_enabled = _two_pass_enabled()
+        backend = get_asr_backend()
+
+        # Same audio + prompt version + model (+ context terms, which prompt the
+        # speculative pass) => same transcript; skip the API
+        speculative = two_pass_enabled and _speculative_enabled()
+        cache = get_transcription_cache()
+        cache_key = None
+        if use_cache and cache.enabled:
+            try:
+                prompt_version = f"{config.artifact('asr_prompt_version')}:{'two-pass' if two_pass_enabled else 'one-pass'}"
+                cache_key = cache.key(
+                    audio_fingerprint(processed_path), prompt_version, backend.model_id,
+                    (context_terms or ()) if speculative else (),
+                )
+                cached = cache.get(cache_key)
+            except Exception as e:
+                print(f"    Warning: transcription cache unavailable: {e}")
+                cached = None
+            if cached:
+                result.update({
+                    'text': cached.get('text', ''),
+                    'segments': cached.get('segments', []),
+                    'metrics': {**(cached.get('metrics') or {}), 'cache_hit': True},
+                    'status': 'success',
+                })
+                print(f"    Transcription cache hit ({duration:.1f}s audio, {len(result['text'])} characters)")
+                return result
+
+        # VAD: drop non-speech and split long audio into concurrently transcribed chunks
+        vad_cfg = vad_settings()
+        vad_dir = tempfile.mkdtemp(prefix="vad_")
+        try:
+            chunks = vad_split(processed_path, vad_dir, vad_cfg)
+        except Exception as e:
+            print(f"    Warning: VAD failed, sending whole audio: {e}")
+            chunks = None
+        asr_seconds = sum(c.duration for c in chunks) if chunks else duration
+
+        def run_asr(prompt: str, usage: Dict, cancel: Optional[threading.Event] = None) -> Dict:
+            """One ASR pass; usage['seconds'] counts the audio actually sent."""
+            if chunks:
+                return _transcribe_chunks(backend, chunks, prompt, int(vad_cfg['concurrency']), cancel, usage)
+            if cancel is not None and cancel.is_set():
+                return {'text': '', 'segments': []}
+            usage['seconds'] += asr_seconds
+            return backend.transcribe(processed_path, prompt=prompt, language="nl", cancel=cancel)
+
+        if chunks:
+            print(f"    Transcribing {asr_seconds:.1f}s of speech in {len(chunks)} chunk(s) ({duration:.1f}s audio)...")
+        else:
+            print(f"    Transcribing audio ({duration:.1f}s)...")
         t0 = time.perf_counter()
-        pass1_len = 0
-        pass2_len = 0
-        used_pass2 = False
+        usage1 = {'seconds': 0.0}
+        usage2 = {'seconds': 0.0}
         
         # Attempt transcription with retries
         attempts = 0
         max_attempts = retry_count + 1
         
         while attempts < max_attempts:
+            pass2_pool = None
+            pass2_future = None
+            cancel = threading.Event()
             try:
                 attempts += 1
+                pass1_len = 0
+                pass2_len = 0
+                used_pass2 = False
+                pass2_ms = None
+                pass2_cancelled = False
                 
+                # Speculative mode: pass 2 starts now with a prompt built from what is
+                # known before transcription, and is cancelled if pass 1 is good enough
+                if speculative:
+                    pass2_pool = ThreadPoolExecutor(max_workers=1)
+                    pass2_started = time.perf_counter()
+                    pass2_future = pass2_pool.submit(run_asr, _enriched_prompt(list(context_terms or [])), usage2, cancel)
+
                 # Pass 1: baseline with lexicon-guided initial prompt
-                initial_prompt = _build_initial_prompt()
-                with open(processed_path, "rb") as audio_file:
-                    transcript_response = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file,
-                        response_format="verbose_json",  # Get timestamps for frame extraction!
-                        language="nl",  # Dutch language hint
-                        prompt=initial_prompt if initial_prompt else None
-                    )
-                
-                # Extract text and segments
-                transcript = transcript_response.text
-                segments = transcript_response.segments if hasattr(transcript_response, 'segments') else []
+                initial_prompt = config.artifact("asr_initial_prompt")
+                # Text plus timestamped segments (for frame extraction), Dutch language hint
+                pass1_started = time.perf_counter()
+                response = run_asr(initial_prompt, usage1)
+                pass1_ms = int((time.perf_counter() - pass1_started) * 1000)
+                transcript = response['text']
+                segments = response['segments']
                 
                 # Success!
                 result['text'] = transcript
@@ -135,46 +342,31 @@ def transcribe_audio_file(audio_path: str, retry_count: int = 1) -> Dict:
                 pass1_len = len(transcript)
                 print(f"    Transcribed: {pass1_len} characters")
                 # Decide if we should attempt a selective second pass
-                asr_cfg = config.scraping_settings.get('asr', {}) or {}
-                # Allow env override for experiments: ASR_ENABLE_TWO_PASS=0/1
-                env_override = os.getenv('ASR_ENABLE_TWO_PASS')
-                if env_override is not None:
-                    two_pass_enabled = env_override.strip() not in ('0', 'false', 'False')
-                else:
-                    two_pass_enabled = bool(asr_cfg.get('enable_two_pass', True))
                 if two_pass_enabled and _should_second_pass(transcript):
-                    # Enrich prompt with candidate tokens from pass 1
-                    words = [w.strip('.,:;!()[]{}\"\'') for w in transcript.split()]
-                    candidates = []
-                    for w in words:
-                        if config.is_wine_like_token(w) and w not in candidates:
-                            candidates.append(w)
-                            if len(candidates) >= 30:
-                                break
-                    enriched_terms = config.get_prompt_terms(max_items=60) + candidates[:20]
-                    # Deduplicate preserving order
-                    seen = set()
-                    enriched_terms_dedup = []
-                    for t in enriched_terms:
-                        if t not in seen:
-                            seen.add(t)
-                            enriched_terms_dedup.append(t)
-                    enriched_prompt = (
-                        "Herhaal transcriptie met aandacht voor eigennamen. Bewaar accenten en verander de spelling van merknamen niet. Termen: "
-                        + ", ".join(enriched_terms_dedup)
-                    )
-                    print("    Second pass: enriched prompt applied")
-                    with open(processed_path, "rb") as audio_file:
-                        transcript2_response = client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            response_format="verbose_json",
-                            language="nl",
-                            prompt=enriched_prompt
-                        )
+                    response2 = None
+                    if pass2_future is not None:
+                        try:
+                            response2 = pass2_future.result()
+                            pass2_ms = int((time.perf_counter() - pass2_started) * 1000)
+                            print("    Second pass: speculative result used")
+                        except Exception as e:
+                            print(f"    Speculative second pass failed ({e}), running it serially")
+                    if response2 is None:
+                        # Enrich prompt with candidate tokens from pass 1
+                        words = [w.strip('.,:;!()[]{}\"\'') for w in transcript.split()]
+                        candidates = []
+                        for w in words:
+                            if config.is_wine_like_token(w) and w not in candidates:
+                                candidates.append(w)
+                                if len(candidates) >= 30:
+                                    break
+                        print("    Second pass: enriched prompt applied")
+                        pass2_started = time.perf_counter()
+                        response2 = run_asr(_enriched_prompt(candidates), usage2)
+                        pass2_ms = int((time.perf_counter() - pass2_started) * 1000)
                     # Extract text and segments from second pass
-                    transcript2 = transcript2_response.text
-                    segments2 = transcript2_response.segments if hasattr(transcript2_response, 'segments') else segments
+                    transcript2 = response2['text']
+                    segments2 = response2['segments'] or segments
                     
                     # Prefer longer transcript if it adds useful content
                     if transcript2 and len(transcript2) >= len(transcript) * 0.95:
@@ -183,42 +375,28 @@ def transcribe_audio_file(audio_path: str, retry_count: int = 1) -> Dict:
                         pass2_len = len(transcript2)
                         used_pass2 = True
                         print(f"    Second pass accepted ({pass2_len} chars)")
+                elif pass2_future is not None:
+                    # Pass 1 is good enough: stop the speculative pass (unsent chunks are skipped)
+                    cancel.set()
+                    pass2_future.cancel()
+                    pass2_cancelled = True
+                    print("    Second pass not needed: speculative pass cancelled")
                 # Metrics
                 final_text = result['text'] or ''
                 elapsed_ms = int((time.perf_counter() - t0) * 1000)
-                # Lexicon hits (unique term presence, len>=4)
-                folded = final_text.lower()
-                terms = [t for t in config.get_prompt_terms(max_items=200) if len(t) >= 4]
-                unique_hits = 0
-                for t in terms:
-                    if t.lower() in folded:
-                        unique_hits += 1
+                # Lexicon hits (unique term presence, len>=4), one automaton pass
+                matcher = config.lexicon_matcher
+                unique_hits = matcher.count_prompt_hits(final_text, max_items=200)
                 per_k = (unique_hits / max(1, len(final_text))) * 1000.0
-                # OOV rate among wine-like tokens
+                # OOV rate among wine-like tokens: not an exact accent-folded prompt term
                 words = [w.strip('.,:;!()[]{}\"\'') for w in final_text.split()]
                 wine_like = [w for w in words if config.is_wine_like_token(w)]
-                in_lex = 0
-                for w in wine_like:
-                    if config.is_wine_like_token(w):
-                        # Reuse lexicon membership heuristic
-                        if config.is_wine_like_token(w):
-                            # Treat token as in lexicon if exact accent-folded match exists in any list
-                            # Already handled inside is_wine_like_token via lexicon check when exact
-                            # Here we approximate by checking presence of folded in folded text of terms
-                            pass
                 total_wlt = len(wine_like)
-                # Approximate oov: if token isn't substring of any term (accent-folded), count as OOV
-                def _fold(s: str) -> str:
-                    import unicodedata
-                    return ''.join(c for c in unicodedata.normalize('NFKD', s) if not unicodedata.combining(c)).lower()
-                folded_terms = set(_fold(t) for t in terms)
-                oov = 0
-                for w in wine_like:
-                    if _fold(w) not in folded_terms:
-                        oov += 1
+                folded_terms = matcher.folded_prompt_terms(200)
+                oov = sum(1 for w in wine_like if fold(w) not in folded_terms)
                 oov_rate = (oov / total_wlt) if total_wlt else 0.0
 
-                version = 'whisper-1+two-pass+norm'
+                version = f'{backend.model_id}+two-pass+norm'
                 result['metrics'] = {
                     'version': version,
                     'pass1_chars': pass1_len,
@@ -227,34 +405,64 @@ def transcribe_audio_file(audio_path: str, retry_count: int = 1) -> Dict:
                     'lexicon_hits': unique_hits,
                     'lexicon_hits_per_1k': per_k,
                     'oov_rate': oov_rate,
-                    'runtime_ms': elapsed_ms
+                    'runtime_ms': elapsed_ms,
+                    'config_version': config_version,
+                    'vad_chunks': len(chunks) if chunks else 0,
+                    'asr_seconds': round(asr_seconds, 2),  # audio sent per pass (after VAD trimming)
+                    # Per-mode latency and cost (billed = audio actually sent, all attempts)
+                    'asr_mode': 'speculative' if speculative else 'serial',
+                    'pass1_ms': pass1_ms,
+                    'pass2_ms': pass2_ms,
+                    'pass2_cancelled': pass2_cancelled,
+                    'billed_seconds': round(usage1['seconds'] + usage2['seconds'], 2),
+                    'cost_usd': round((usage1['seconds'] + usage2['seconds']) / 60 * backend.cost_per_minute, 5)
                 }
+                if cache_key:
+                    cache.put(cache_key, {
+                        'text': result['text'],
+                        'segments': result['segments'],
+                        'metrics': result['metrics'],
+                        'duration': duration,
+                        'model': backend.model_id,
+                    })
                 return result
                 
             except Exception as e:
+                cancel.set()
                 if attempts < max_attempts:
                     print(f"    Transcription attempt {attempts} failed, retrying...")
                 else:
                     raise e
+            finally:
+                if pass2_pool is not None:
+                    # Don't wait for a cancelled request that is already in flight;
+                    # vad_dir is removed once it finishes (_remove_when_done)
+                    if pass2_future is not None and not pass2_future.cancel() and not pass2_future.done():
+                        pass2_running.append(pass2_future)
+                    pass2_pool.shutdown(wait=False)
         
     except Exception as e:
         error_msg = str(e)
         result['error'] = error_msg
         result['status'] = 'failed'
         print(f"    Transcription failed: {error_msg}")
+    finally:
+        if vad_dir:
+            _remove_when_done(vad_dir, pass2_running)
     
     return result
 
 
-def transcribe_video_audio(audio_path: str) -> Dict:
+def transcribe_video_audio(audio_path: str, context_terms: Optional[List[str]] = None) -> Dict:
     """
     Convenience function: transcribe video audio with default retry
     
     Args:
         audio_path: Path to audio file
+        context_terms: Optional proper nouns for the speculative second pass
     
     Returns:
         Transcription result dict
     """
-    return transcribe_audio_file(audio_path, retry_count=1)
+    return transcribe_audio_file(audio_path, retry_count=1, context_terms=context_terms)
 
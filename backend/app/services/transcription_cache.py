@@ -0,0 +1,71 @@
+"""
+Content-addressed transcription cache.
+
+A transcription is keyed by what actually determines it:
+- the normalized audio: sha256 of the 16k mono PCM samples (WAV header
+  excluded), so re-downloads and re-encodes of the same clip hit
+- the ASR prompt version: hash of the compiled prompt, lexicon and `asr`
+  settings (see `asr_prompt_version` in transcription.py), so lexicon or
+  prompt changes miss and re-transcribe
+- the model name
+- the context terms, when the speculative second pass is prompted with them
+
+Entries (text, segments, metrics, duration) are JSON files on local disk
+(json_file_cache.py), so scripts, the API and CI runs can share one
+directory. transcribe_audio_file consults the cache before any
+API call, which makes re-transcription, retries and CI re-runs free.
+Location comes from `transcription_cache` in config/scraping_settings.yaml.
+"""
+import hashlib
+import threading
+import wave
+from typing import Optional, Sequence
+from .json_file_cache import JsonFileCache
+
+
+def audio_fingerprint(audio_path: str) -> str:
+    """
+    sha256 of the audio samples. For WAV only the PCM frames and format are
+    hashed (not the header metadata); other formats hash the whole file.
+    """
+    digest = hashlib.sha256()
+    try:
+        with wave.open(audio_path, "rb") as w:
+            digest.update(f"{w.getnchannels()}:{w.getsampwidth()}:{w.getframerate()}".encode())
+            while True:
+                frames = w.readframes(1 << 18)
+                if not frames:
+                    break
+                digest.update(frames)
+        return digest.hexdigest()
+    except (wave.Error, EOFError):
+        digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptionCache(JsonFileCache):
+    settings_section = "transcription_cache"
+    label = "transcription cache"
+
+    @staticmethod
+    def key(fingerprint: str, prompt_version: str, model: str, context_terms: Sequence[str] = ()) -> str:
+        material = f"{fingerprint}:{prompt_version}:{model}"
+        if context_terms:
+            material += ":" + "|".join(sorted(set(context_terms)))
+        return hashlib.sha256(material.encode()).hexdigest()
+
+
+_transcription_cache: Optional[TranscriptionCache] = None
+_transcription_cache_lock = threading.Lock()
+
+
+def get_transcription_cache() -> TranscriptionCache:
+    """Process-wide transcription cache, created on first use."""
+    global _transcription_cache
+    with _transcription_cache_lock:
+        if _transcription_cache is None:
+            _transcription_cache = TranscriptionCache()
+        return _transcription_cache
@@ -1,16 +1,43 @@
 """
 TikTok Video Downloader
-Downloads TikTok videos using yt-dlp for audio transcription
+Downloads TikTok videos using yt-dlp for audio transcription.
+`acquire_media` fetches a video once and derives the ASR audio from it.
+Downloads go through the persistent media cache (see media_cache.py), so a
+video is only fetched from TikTok once per format.
 """
 import os
 import yt_dlp
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from .audio_preprocess import extract_asr_audio
+from .media_cache import get_media_cache, video_id_from_url
+from ..utils.ffmpeg import find_ffmpeg_location
+
+
+def _post_date_from_info(info: Dict) -> Optional[datetime]:
+    """Post date from yt-dlp info (timestamp, else upload_date YYYYMMDD)."""
+    try:
+        if info.get('timestamp'):
+            return datetime.fromtimestamp(info['timestamp'], tz=timezone.utc)
+        if info.get('upload_date'):
+            return datetime.strptime(str(info['upload_date']), '%Y%m%d').replace(tzinfo=timezone.utc)
+    except Exception:
+        pass
+    return None
+
+
+def _parse_post_date(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except ValueError:
+        return None
 
 
 class TikTokVideoDownloader:
     def __init__(self):
         self.download_dir = "temp/videos"
         os.makedirs(self.download_dir, exist_ok=True)
+        self.media_cache = get_media_cache()
     
     def download_with_ytdlp(self, video_url: str) -> Optional[tuple]:
         """
@@ -24,21 +51,15 @@ class TikTokVideoDownloader:
         """
         try:
             # Extract video ID from URL for filename
-            video_id = video_url.split('/')[-1]
+            video_id = video_id_from_url(video_url)
+            
+            cached = self.media_cache.get(video_id, "audio")
+            if cached:
+                print(f"    Using cached audio: {cached['path']}")
+                return (cached["path"], _parse_post_date(cached.get("post_date")))
             
             # Find ffmpeg location (Windows WinGet installation)
-            ffmpeg_location = None
-            import glob
-            possible_paths = [
-                r"C:\Users\tanst\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_*\ffmpeg-*\bin",
-                r"C:\Program Files\ffmpeg\bin",
-                r"C:\ffmpeg\bin"
-            ]
-            for pattern in possible_paths:
-                matches = glob.glob(pattern)
-                if matches:
-                    ffmpeg_location = matches[0]
-                    break
+            ffmpeg_location = find_ffmpeg_location()
             
             # yt-dlp options
             ydl_opts = {
@@ -70,18 +91,12 @@ class TikTokVideoDownloader:
                 if os.path.exists(audio_file):
                     print(f"    Downloaded: {audio_file}")
                     # Determine post date from info
-                    post_dt = None
-                    try:
-                        if info.get('timestamp'):
-                            from datetime import datetime, timezone
-                            post_dt = datetime.fromtimestamp(info['timestamp'], tz=timezone.utc)
-                        elif info.get('upload_date'):
-                            # upload_date is YYYYMMDD
-                            s = str(info['upload_date'])
-                            from datetime import datetime, timezone
-                            post_dt = datetime.strptime(s, '%Y%m%d').replace(tzinfo=timezone.utc)
-                    except Exception:
-                        post_dt = None
+                    post_dt = _post_date_from_info(info)
+                    if self.media_cache.enabled:
+                        audio_file = self.media_cache.put(
+                            video_id, "audio", audio_file,
+                            duration=info.get('duration'), post_date=post_dt
+                        )["path"]
                     return (audio_file, post_dt)
                 else:
                     print(f"    Warning: Expected file not found: {audio_file}")
@@ -115,22 +130,68 @@ class TikTokVideoDownloader:
         Returns:
             Path to downloaded video file, or None if failed
         """
+        fetched = self._fetch_video(video_url)
+        return fetched["path"] if fetched else None
+    
+    def acquire_media(self, video_url: str) -> Optional[Dict]:
+        """
+        Fetch a video once and derive everything the pipeline needs from it.
+        
+        The video file is used as-is for frame extraction, and one ffmpeg pass
+        decodes its audio track straight to loudness-normalized 16k mono PCM
+        for ASR (no intermediate MP3). Both are kept in the media cache.
+        
+        Args:
+            video_url: TikTok video URL
+        
+        Returns:
+            {'video_path', 'audio_path', 'post_date', 'duration'} or None if failed
+        """
+        fetched = self._fetch_video(video_url)
+        if not fetched:
+            return None
+        video_id = video_id_from_url(video_url)
+        
+        cached = self.media_cache.get(video_id, "pcm16k")
+        if cached:
+            audio_path = cached["path"]
+        else:
+            out_path = f"{self.download_dir}/{video_id}.norm.wav"
+            try:
+                extract_asr_audio(fetched["path"], out_path)
+            except Exception as e:
+                print(f"    Error extracting audio from video: {e}")
+                return None
+            audio_path = out_path
+            if self.media_cache.enabled:
+                audio_path = self.media_cache.put(
+                    video_id, "pcm16k", out_path,
+                    duration=fetched.get("duration"), post_date=fetched.get("post_date")
+                )["path"]
+        
+        return {
+            "video_path": fetched["path"],
+            "audio_path": audio_path,
+            "post_date": fetched.get("post_date"),
+            "duration": fetched.get("duration"),
+        }
+    
+    def _fetch_video(self, video_url: str) -> Optional[Dict]:
+        """Download (or reuse the cached) video. Returns {'path', 'post_date', 'duration'}."""
         try:
-            video_id = video_url.split('/')[-1]
+            video_id = video_id_from_url(video_url)
+            
+            cached = self.media_cache.get(video_id, "video")
+            if cached:
+                print(f"    Using cached video: {cached['path']}")
+                return {
+                    "path": cached["path"],
+                    "post_date": _parse_post_date(cached.get("post_date")),
+                    "duration": cached.get("duration"),
+                }
             
             # Find ffmpeg location
-            ffmpeg_location = None
-            import glob
-            possible_paths = [
-                r"C:\Users\tanst\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_*\ffmpeg-*\bin",
-                r"C:\Program Files\ffmpeg\bin",
-                r"C:\ffmpeg\bin"
-            ]
-            for pattern in possible_paths:
-                matches = glob.glob(pattern)
-                if matches:
-                    ffmpeg_location = matches[0]
-                    break
+            ffmpeg_location = find_ffmpeg_location()
             
             # yt-dlp options for full video
             ydl_opts = {
@@ -153,7 +214,13 @@ class TikTokVideoDownloader:
                 
                 if os.path.exists(video_file):
                     print(f"    Downloaded video: {video_file}")
-                    return video_file
+                    post_dt = _post_date_from_info(info)
+                    if self.media_cache.enabled:
+                        video_file = self.media_cache.put(
+                            video_id, "video", video_file,
+                            duration=info.get('duration'), post_date=post_dt
+                        )["path"]
+                    return {"path": video_file, "post_date": post_dt, "duration": info.get('duration')}
                 else:
                     print(f"    Warning: Video file not found: {video_file}")
                     return None
@@ -163,7 +230,9 @@ class TikTokVideoDownloader:
             return None
     
     def cleanup_audio_file(self, audio_path: str):
-        """Remove audio file after successful transcription"""
+        """Remove audio file after successful transcription (cached files are kept)"""
+        if self.media_cache.contains(audio_path):
+            return
         try:
             if os.path.exists(audio_path):
                 os.remove(audio_path)
@@ -172,7 +241,9 @@ class TikTokVideoDownloader:
             print(f"    Warning: Could not remove {audio_path}: {e}")
     
     def cleanup_video_file(self, video_path: str):
-        """Remove video file after frame extraction"""
+        """Remove video file after frame extraction (cached files are kept)"""
+        if self.media_cache.contains(video_path):
+            return
         try:
             if os.path.exists(video_path):
                 os.remove(video_path)
@@ -0,0 +1,235 @@
+"""
+In-process read model of the wines collection.
+
+The catalogue changes a few times a day but is listed on every page view, so
+we keep every wine pre-serialized in memory and group the rows per
+(supermarket, wine_type) filter combination. The public listing endpoint then
+becomes a dictionary lookup instead of a Mongo round-trip.
+
+The model is kept fresh in two ways:
+- Admin writes patch it directly (refresh/remove after the Mongo write)
+- A Mongo change stream catches writes made elsewhere (scripts, jobs).
+  Change streams need a replica set; on a standalone server (the
+  docker-compose setup) the watcher falls back to polling every
+  `wine_read_model.poll_interval_seconds` and rebuilds when the document
+  count, newest _id or newest `updated_at` changes. Every wine update sets
+  `updated_at` (`$currentDate`), so in-place edits are seen too.
+"""
+import asyncio
+import logging
+import uuid
+from typing import Dict, List, Optional, Tuple
+from bson import ObjectId
+from ..models import WineResponse
+from ..utils.config_loader import config
+from .wine_search import WineSearchIndex
+
+logger = logging.getLogger(__name__)
+
+ViewKey = Tuple[Optional[str], Optional[str]]
+
+
+def serialize_wine(wine: Dict) -> Dict:
+    """Convert a Mongo wine document into a WineResponse-shaped dict."""
+    return WineResponse(
+        id=str(wine["_id"]),
+        name=wine["name"],
+        supermarket=wine["supermarket"],
+        wine_type=wine["wine_type"],
+        image_url=wine.get("image_url"),
+        image_urls=wine.get("image_urls"),
+        rating=wine.get("rating"),
+        influencer_source=wine["influencer_source"],
+        post_url=wine["post_url"],
+        date_found=wine["date_found"],
+        in_stock=wine.get("in_stock"),
+        description=wine.get("description")
+    ).model_dump()
+
+
+def _sort_key(wine: Dict):
+    # Newest first, ties broken by id so the order is stable across rebuilds
+    return (wine["date_found"], wine["id"])
+
+
+class WineCatalogCache:
+    def __init__(self):
+        self._wines: Dict[str, Dict] = {}
+        self._views: Dict[ViewKey, List[Dict]] = {}
+        self._search = WineSearchIndex()
+        self._watch_task: Optional[asyncio.Task] = None
+        # Catalogue version: a per-process token plus a counter bumped on every
+        # change, so versions never repeat across restarts
+        self._generation = uuid.uuid4().hex[:8]
+        self._revision = 0
+        self.ready = False
+
+    @property
+    def version(self) -> str:
+        """Opaque catalogue version, changes whenever the read model changes."""
+        return f"{self._generation}.{self._revision}"
+
+    def _invalidate(self) -> None:
+        self._views = {}
+        self._revision += 1
+
+    async def rebuild(self, db) -> int:
+        """Load the full wines collection and swap it in atomically."""
+        wines = {}
+        async for doc in db.wines.find({}):
+            try:
+                wine = serialize_wine(doc)
+            except Exception as e:
+                logger.warning(f"Skipping wine {doc.get('_id')} in read model: {e}")
+                continue
+            wines[wine["id"]] = wine
+        self._wines = wines
+        self._search.rebuild(wines.values())
+        self._invalidate()
+        self.ready = True
+        logger.info(f"Wine read model built with {len(wines)} wines")
+        return len(wines)
+
+    def upsert(self, doc: Dict) -> None:
+        """Insert or replace a single wine from its Mongo document."""
+        try:
+            wine = serialize_wine(doc)
+        except Exception as e:
+            logger.warning(f"Could not patch wine {doc.get('_id')} into read model: {e}")
+            return
+        self._wines[wine["id"]] = wine
+        self._search.add(wine)
+        self._invalidate()
+
+    def remove(self, wine_id) -> None:
+        """Drop a wine from the read model (no-op if unknown)."""
+        if self._wines.pop(str(wine_id), None) is not None:
+            self._search.remove(str(wine_id))
+            self._invalidate()
+
+    async def refresh(self, db, wine_id) -> None:
+        """Re-read one wine after a write and patch it in (or out)."""
+        obj_id = wine_id if isinstance(wine_id, ObjectId) else ObjectId(str(wine_id))
+        doc = await db.wines.find_one({"_id": obj_id})
+        if doc:
+            self.upsert(doc)
+        else:
+            self.remove(obj_id)
+
+    def get(self, supermarket: Optional[str] = None, wine_type: Optional[str] = None) -> List[Dict]:
+        """Return the pre-serialized, newest-first wines for a filter combination."""
+        key = (supermarket, wine_type)
+        view = self._views.get(key)
+        if view is None:
+            view = [
+                w for w in self._wines.values()
+                if (supermarket is None or w["supermarket"] == supermarket)
+                and (wine_type is None or w["wine_type"] == wine_type)
+            ]
+            view.sort(key=_sort_key, reverse=True)
+            self._views[key] = view
+        return view
+
+    def search(
+        self,
+        query: str,
+        supermarket: Optional[str] = None,
+        wine_type: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """Full-text/fuzzy search over the read model, best match first."""
+        results = []
+        for wine_id, _score in self._search.search(query, limit=0):
+            wine = self._wines.get(wine_id)
+            if wine is None:
+                continue
+            if supermarket is not None and wine["supermarket"] != supermarket:
+                continue
+            if wine_type is not None and wine["wine_type"] != wine_type:
+                continue
+            results.append(wine)
+            if len(results) >= limit:
+                break
+        return results
+
+    async def _watch(self, db) -> None:
+        """Apply changes from the wines change stream until cancelled."""
+        try:
+            async with db.wines.watch(full_document="updateLookup") as stream:
+                logger.info("Watching wines change stream")
+                async for change in stream:
+                    op = change.get("operationType")
+                    if op in ("insert", "update", "replace"):
+                        doc = change.get("fullDocument")
+                        if doc:
+                            self.upsert(doc)
+                        else:
+                            self.remove(change["documentKey"]["_id"])
+                    elif op == "delete":
+                        self.remove(change["documentKey"]["_id"])
+                    elif op in ("drop", "rename", "invalidate"):
+                        await self.rebuild(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Standalone mongod has no change streams
+            logger.warning(f"Wines change stream unavailable, polling for changes instead: {e}")
+        await self._poll(db)
+
+    async def _fingerprint(self, db):
+        """
+        (count, newest _id, newest updated_at): three index-backed reads.
+        Inserts move the _id, deletes the count, updates the updated_at.
+        """
+        count = await db.wines.estimated_document_count()
+        newest = await db.wines.find_one({}, {"_id": 1}, sort=[("_id", -1)])
+        touched = await db.wines.find_one({"updated_at": {"$exists": True}}, {"updated_at": 1}, sort=[("updated_at", -1)])
+        return (
+            count,
+            newest["_id"] if newest else None,
+            touched["updated_at"] if touched else None,
+        )
+
+    async def _poll(self, db) -> None:
+        """Rebuild whenever the collection fingerprint changes, until cancelled."""
+        settings = config.scraping_settings.get("wine_read_model", {}) or {}
+        interval = float(settings.get("poll_interval_seconds", 15))
+        if interval <= 0:
+            return
+        # None: the first tick rebuilds once, covering writes since start()
+        fingerprint = None
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                current = await self._fingerprint(db)
+                if current != fingerprint:
+                    if fingerprint is not None:
+                        logger.info("Wines collection changed, rebuilding read model")
+                    await self.rebuild(db)
+                    fingerprint = current
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Wine read model poll failed: {e}")
+
+    async def start(self, db) -> None:
+        """Build the read model and start following the change stream (or polling)."""
+        try:
+            await self.rebuild(db)
+        except Exception as e:
+            logger.error(f"Could not build wine read model: {e}")
+            return
+        self._watch_task = asyncio.create_task(self._watch(db))
+
+    async def stop(self) -> None:
+        if self._watch_task:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+
+# Global instance
+wine_cache = WineCatalogCache()
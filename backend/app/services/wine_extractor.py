@@ -1,18 +1,34 @@
+import copy
+import hashlib
 import json
 import re
 import logging
 from openai import OpenAI
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from ..config import settings
 from ..utils.config_loader import config
+from .extraction_cache import get_extraction_cache
 
 logger = logging.getLogger(__name__)
 
 client = OpenAI(api_key=settings.openai_api_key)
 
-# Load from YAML configuration
-SUPERMARKETS = config.get_supermarket_list()
-WINE_TYPES = config.wine_keywords['wine_types']
+# Manual tag in front of PROMPT_VERSION / BATCH_PROMPT_VERSION (defined below
+# the prompt builders).
+# Template edits change the version on their own; bump the tag when
+# _validate_wines or _normalize_rating change meaning.
+PROMPT_TAG = "v1"
+
+GPT_DEFAULTS = {
+    "model": "gpt-4o-mini",
+    "temperature": 0.3,
+    "max_tokens": 1000,
+    "batch_size": 8,            # videos per request in extract_wines_batch
+}
+
+# Output budget per item in a batched request (one wine + reasoning)
+BATCH_TOKENS_PER_ITEM = 350
+BATCH_MAX_TOKENS = 16000
 
 
 BANNED_RATING_PHRASES = {
@@ -83,44 +99,13 @@ def _normalize_rating(rating: Optional[str], description: Optional[str]) -> Opti
     return candidate
 
 
-def extract_wines_from_caption_and_transcription(
-    caption: str, 
-    transcription: Optional[str] = None
-) -> List[Dict]:
-    """
-    Extract wines from combined caption + transcription
-    Falls back to caption-only if no transcription
-    
-    Args:
-        caption: TikTok video caption
-        transcription: Video audio transcription (optional)
-    
-    Returns:
-        List of wine dictionaries
-    """
-    if transcription and len(transcription.strip()) > 20:
-        # Combine both sources for maximum information
-        combined_text = f"""Video Caption: {caption}
+def _gpt_settings() -> Dict:
+    return {**GPT_DEFAULTS, **(config.scraping_settings.get("gpt", {}) or {})}
 
-Video Transcription (spoken content): {transcription}"""
-        print("    Using caption + transcription")
-    else:
-        # Fallback to caption only
-        combined_text = caption
-        print("    Using caption only (no transcription)")
-    
-    return extract_wines_from_text(combined_text)
 
-
-def extract_wines_from_text(text: str) -> List[Dict]:
-    """
-    Extract wine information from text using GPT-4o-mini
-    Returns list of wine dictionaries
-    """
-    if not text or len(text.strip()) < 10:
-        return []
-    
-    prompt = f"""Extract ONLY RECOMMENDED/GOOD wines from this Dutch TikTok content about supermarket wines.
+def _rules_prompt(supermarkets: List[str]) -> str:
+    """Extraction rules shared by single and batched requests."""
+    return f"""Extract ONLY RECOMMENDED/GOOD wines from this Dutch TikTok content about supermarket wines.
 
 You may receive both a short caption and a longer transcription of what was spoken in the video.
 Use ALL available information to extract wine details.
@@ -162,7 +147,7 @@ NEGATIVE OVERRIDES:
 - If the earliest candidate is later criticized (bijv. matig/slecht/skip/niet aan te raden), discard it and continue searching for a later positive winner
 
 SUPERMARKET VALIDATION (CRITICAL - STRICTLY ENFORCE):
-- The wine MUST be purchased/available at one of these specific supermarkets: {', '.join(SUPERMARKETS)}
+- The wine MUST be purchased/available at one of these specific supermarkets: {', '.join(supermarkets)}
 - The supermarket name MUST be explicitly stated in the context of THIS SPECIFIC WINE
 - Accept aliases ONLY when mentioned: AH/Appie = Albert Heijn, but must be explicitly stated
 - REJECT if:
@@ -175,13 +160,14 @@ SUPERMARKET VALIDATION (CRITICAL - STRICTLY ENFORCE):
 - Treat "Plus"/"PLUS" case-sensitively; ignore generic "plus"
 
 RUIS NEGEREN:
-- Negeer intros/outros, disclaimers, CTA's en muziek‑only gedeelten; focus op evaluatie en conclusie
+- Negeer intros/outros, disclaimers, CTA's en muziek‑only gedeelten; focus op evaluatie en conclusie"""
 
-Text: {text}
 
-Extract the SINGLE BEST RECOMMENDED wine with:
+def _fields_prompt(supermarkets: List[str]) -> str:
+    """What to extract per video."""
+    return f"""Extract the SINGLE BEST RECOMMENDED wine with:
 1. Exact wine name (brand, variety, year if mentioned). If brand is unclear, provide the canonical appellation/region + style instead
-2. Supermarket (must be one of: {', '.join(SUPERMARKETS)})
+2. Supermarket (must be one of: {', '.join(supermarkets)})
    - Accept aliases: AH/Appie = Albert Heijn, but the alias must be explicitly mentioned
 3. Wine type (red, white, rose, or sparkling)
 4. RATING: A short, enthusiastic phrase (max 3–6 words) capturing the influencer's verdict
@@ -194,13 +180,14 @@ Extract the SINGLE BEST RECOMMENDED wine with:
    - Prefer verbatim quotes from the transcript/caption; otherwise paraphrase faithfully
    - Include taste notes, characteristics, or why it's recommended
    - Can be longer (10-20 words) to capture the full flavor profile or recommendation reasoning
-   - Examples: "Vol en fruitig met mooie tannines, perfect bij rood vlees", "Verrassend fris en kruidig voor de prijs"
+   - Examples: "Vol en fruitig met mooie tannines, perfect bij rood vlees", "Verrassend fris en kruidig voor de prijs\""""
+
 
-Return a valid JSON object with this structure:
-{{
+SINGLE_OUTPUT_FORMAT = """Return a valid JSON object with this structure:
+{
   "wines": [ /* array with 0 or 1 wine object */ ],
   "reasoning": "Brief explanation of your extraction decision"
-}}
+}
 
 The wine object (if present) should have these exact keys: name, supermarket, wine_type, rating, description
 
@@ -211,49 +198,237 @@ REASONING field guidelines:
 - Be specific about the decision factor
 
 Example output when wine found:
-{{
+{
   "wines": [
-    {{
+    {
       "name": "Côtes du Rhône",
       "supermarket": "Jumbo",
       "wine_type": "red",
       "rating": "Mooi in balans",
       "description": "Soepele rode wijn met fijne kruidigheid en zacht fruit, goede prijs-kwaliteit verhouding"
-    }}
+    }
   ],
   "reasoning": "Wine is clearly recommended with positive attributes and explicitly sold at Jumbo"
-}}
+}
 
 Example output when NO wine found:
-{{
+{
   "wines": [],
   "reasoning": "No supermarket was explicitly mentioned for this wine"
-}}"""
+}"""
+
+BATCH_OUTPUT_FORMAT = """Return a valid JSON object with this structure:
+{
+  "results": [
+    {
+      "id": "<item id>",
+      "wines": [ /* array with 0 or 1 wine object for THIS item */ ],
+      "reasoning": "Brief explanation of your extraction decision for this item"
+    }
+  ]
+}
+
+Return exactly ONE entry per item, with the item's id copied exactly.
+Each wine object (if present) should have these exact keys: name, supermarket, wine_type, rating, description
+
+REASONING field guidelines:
+- If wine extracted: Explain WHY this wine is recommended
+- If NO wine: Explain WHAT is missing (e.g., "No supermarket mentioned" or "Wine criticized, not recommended")
+- Keep it brief (1-2 sentences max)"""
+
+
+def _system_prompt(supermarkets: List[str]) -> str:
+    return f"You are a wine data extraction expert for Dutch supermarket wines. CRITICAL RULE: Only extract wines if the supermarket is EXPLICITLY mentioned by name. Valid supermarkets: {', '.join(supermarkets)}. If the text mentions 'wijnwinkel' (wine shop) or generic 'supermarkt' without specifying which one, return []. NEVER guess which supermarket - it must be clearly stated in the text. Correct and normalize misheard wine names (preserve accents), prefer canonical names when brand is unclear, never invent brands. Return valid JSON only."
+
+
+def _build_prompt(text: str, supermarkets: List[str]) -> str:
+    return f"{_rules_prompt(supermarkets)}\n\nText: {text}\n\n{_fields_prompt(supermarkets)}\n\n{SINGLE_OUTPUT_FORMAT}"
+
+
+def _build_batch_prompt(items: List[Tuple[str, str]], supermarkets: List[str]) -> str:
+    """One prompt for several videos: shared rules once, then every item by id."""
+    blocks = "\n\n".join(f'=== Item id="{item_id}" ===\n{text}' for item_id, text in items)
+    return (
+        f"{_rules_prompt(supermarkets)}\n\n"
+        f"BATCH MODE: below are {len(items)} SEPARATE videos. Apply every rule to each item independently; "
+        f"never use information from one item for another.\n\n"
+        f"{blocks}\n\n"
+        f"For EACH item: {_fields_prompt(supermarkets)}\n\n"
+        f"{BATCH_OUTPUT_FORMAT}"
+    )
+
+
+def _template_fingerprint(template: str) -> str:
+    """Hash of a template rendered with placeholder inputs."""
+    return hashlib.sha1(template.encode("utf-8")).hexdigest()[:8]
+
+
+# Part of the extraction cache key: editing a template invalidates its entries.
+# Batch answers are keyed separately, so single extractions never serve them.
+PROMPT_VERSION = f"{PROMPT_TAG}-{_template_fingerprint(_build_prompt('<TEXT>', ['<SUPERMARKET>']))}"
+BATCH_PROMPT_VERSION = (
+    f"{PROMPT_TAG}-batch-{_template_fingerprint(_build_batch_prompt([('<ID>', '<TEXT>')], ['<SUPERMARKET>']))}"
+)
+
+
+def _combine_caption_and_transcription(caption: str, transcription: Optional[str]) -> str:
+    if transcription and len(transcription.strip()) > 20:
+        # Combine both sources for maximum information
+        return f"""Video Caption: {caption}
+
+Video Transcription (spoken content): {transcription}"""
+    # Fallback to caption only
+    return caption
+
+
+def _parse_json_content(content: str):
+    """Parse a JSON completion, tolerating markdown code fences."""
+    result = content.strip()
+    # Remove markdown code blocks if present
+    if result.startswith("```json"):
+        result = result[7:]  # Remove ```json
+    if result.startswith("```"):
+        result = result[3:]  # Remove ```
+    if result.endswith("```"):
+        result = result[:-3]  # Remove trailing ```
+    return json.loads(result.strip())
+
+
+def _validate_wines(wines: List[Dict], supermarkets: List[str], wine_types: List[str]) -> List[Dict]:
+    """Validate LLM wines against the config, keep at most one, normalize its rating."""
+    # Debug: log what LLM actually returned
+    if wines:
+        print(f"    LLM returned {len(wines)} wine(s):")
+        for wine in wines:
+            print(f"      - Name: {wine.get('name')}")
+            print(f"        Supermarket: {wine.get('supermarket')} (valid: {wine.get('supermarket') in supermarkets})")
+            print(f"        Type: {wine.get('wine_type')} (valid: {wine.get('wine_type') in wine_types})")
+
+    # Validate and clean results (enforce max 1 winner)
+    valid_wines = []
+    for wine in wines:
+        if not isinstance(wine, dict):
+            continue
+        # Normalize wine_type: rosé → rose (remove accent)
+        wine_type = (wine.get("wine_type") or "").lower()
+        if wine_type == "rosé":
+            wine_type = "rose"
+        wine["wine_type"] = wine_type
+
+        if (wine.get("name") and
+            wine.get("supermarket") in supermarkets and
+            wine.get("wine_type") in wine_types):
+            valid_wines.append(wine)
+        else:
+            # Log why this wine was rejected
+            if not wine.get("name"):
+                print(f"    ❌ Rejected: Missing name")
+            elif wine.get("supermarket") not in supermarkets:
+                print(f"    ❌ Rejected: Invalid supermarket '{wine.get('supermarket')}' (must be one of: {supermarkets})")
+            elif wine.get("wine_type") not in wine_types:
+                print(f"    ❌ Rejected: Invalid wine_type '{wine.get('wine_type')}' (must be one of: {wine_types})")
+
+    if len(valid_wines) > 1:
+        valid_wines = valid_wines[:1]
+
+    # Normalize ratings to avoid numeric scores and clichés
+    for w in valid_wines:
+        w["rating"] = _normalize_rating(w.get("rating"), w.get("description"))
+    return valid_wines
+
+
+def _cache_key(text: str, gpt: Dict, system_prompt: str, prompt_version: str = PROMPT_VERSION) -> str:
+    return get_extraction_cache().key(gpt["model"], gpt["temperature"], system_prompt, prompt_version, text)
+
+
+def _cached_wines(key: str, supermarkets: List[str], wine_types: List[str]) -> Optional[List[Dict]]:
+    """Validated wines from a cached extraction, or None on a miss."""
+    entry = get_extraction_cache().get(key)
+    if entry is None:
+        return None
+    print(f"    Extraction cache hit (prompt {entry.get('prompt_version')}): {entry.get('reasoning')}")
+    # Re-validate the raw candidates so wine_type config changes still apply
+    return _validate_wines(entry.get("candidates", []) or [], supermarkets, wine_types)
+
+
+def _store_extraction(key: str, gpt: Dict, raw_response: str, reasoning: str,
+                      candidates: List[Dict], wines: List[Dict], mode: str) -> None:
+    get_extraction_cache().put(key, {
+        "prompt_version": BATCH_PROMPT_VERSION if mode == "batch" else PROMPT_VERSION,
+        "model": gpt["model"],
+        "temperature": gpt["temperature"],
+        "mode": mode,
+        "raw_response": raw_response,
+        "reasoning": reasoning,
+        "candidates": candidates,
+        "wines": wines,
+    })
+
+
+def extract_wines_from_caption_and_transcription(
+    caption: str, 
+    transcription: Optional[str] = None
+) -> List[Dict]:
+    """
+    Extract wines from combined caption + transcription
+    Falls back to caption-only if no transcription
+    
+    Args:
+        caption: TikTok video caption
+        transcription: Video audio transcription (optional)
+    
+    Returns:
+        List of wine dictionaries
+    """
+    if transcription and len(transcription.strip()) > 20:
+        print("    Using caption + transcription")
+    else:
+        print("    Using caption only (no transcription)")
+    
+    return extract_wines_from_text(_combine_caption_and_transcription(caption, transcription))
+
+
+def extract_wines_from_text(text: str, use_cache: bool = True) -> List[Dict]:
+    """
+    Extract wine information from text using GPT-4o-mini
+    Returns list of wine dictionaries
+
+    Results are cached by model, temperature, prompts and text; use_cache=False
+    forces a fresh call (the result is still stored).
+    """
+    if not text or len(text.strip()) < 10:
+        return []
+    
+    # One config snapshot for the whole call; picks up YAML edits without a restart
+    compiled = config.compiled
+    supermarkets = compiled.supermarket_list
+    wine_types = compiled.wine_types
+    gpt = _gpt_settings()
+    system_prompt = _system_prompt(supermarkets)
+    cache_key = _cache_key(text, gpt, system_prompt)
+    if use_cache:
+        cached = _cached_wines(cache_key, supermarkets, wine_types)
+        if cached is not None:
+            return cached
+    
+    prompt = _build_prompt(text, supermarkets)
+    result = ""
 
     try:
         response = client.chat.completions.create(
-            model="gpt-4o-mini",
+            model=gpt["model"],
             messages=[
-                {"role": "system", "content": f"You are a wine data extraction expert for Dutch supermarket wines. CRITICAL RULE: Only extract wines if the supermarket is EXPLICITLY mentioned by name. Valid supermarkets: {', '.join(SUPERMARKETS)}. If the text mentions 'wijnwinkel' (wine shop) or generic 'supermarkt' without specifying which one, return []. NEVER guess which supermarket - it must be clearly stated in the text. Correct and normalize misheard wine names (preserve accents), prefer canonical names when brand is unclear, never invent brands. Return valid JSON only."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3,
-            max_tokens=1000
+            temperature=gpt["temperature"],
+            max_tokens=gpt["max_tokens"]
         )
         
         result = response.choices[0].message.content.strip()
         
-        # Remove markdown code blocks if present
-        if result.startswith("```json"):
-            result = result[7:]  # Remove ```json
-        if result.startswith("```"):
-            result = result[3:]  # Remove ```
-        if result.endswith("```"):
-            result = result[:-3]  # Remove trailing ```
-        result = result.strip()
-        
         # Parse JSON response
-        response_obj = json.loads(result)
+        response_obj = _parse_json_content(result)
         
         # Handle both old format (array) and new format (object with wines + reasoning)
         if isinstance(response_obj, list):
@@ -272,42 +447,9 @@ Example output when NO wine found:
         print(f"    LLM Reasoning: {reasoning}")
         logger.info(f"Wine extraction reasoning: {reasoning}")
         
-        # Debug: log what LLM actually returned
-        if wines:
-            print(f"    LLM returned {len(wines)} wine(s):")
-            for wine in wines:
-                print(f"      - Name: {wine.get('name')}")
-                print(f"        Supermarket: {wine.get('supermarket')} (valid: {wine.get('supermarket') in SUPERMARKETS})")
-                print(f"        Type: {wine.get('wine_type')} (valid: {wine.get('wine_type') in WINE_TYPES})")
-        
-        # Validate and clean results (enforce max 1 winner)
-        valid_wines = []
-        for wine in wines:
-            # Normalize wine_type: rosé → rose (remove accent)
-            wine_type = wine.get("wine_type", "").lower()
-            if wine_type == "rosé":
-                wine_type = "rose"
-            wine["wine_type"] = wine_type
-            
-            if (wine.get("name") and 
-                wine.get("supermarket") in SUPERMARKETS and 
-                wine.get("wine_type") in WINE_TYPES):
-                valid_wines.append(wine)
-            else:
-                # Log why this wine was rejected
-                if not wine.get("name"):
-                    print(f"    ❌ Rejected: Missing name")
-                elif wine.get("supermarket") not in SUPERMARKETS:
-                    print(f"    ❌ Rejected: Invalid supermarket '{wine.get('supermarket')}' (must be one of: {SUPERMARKETS})")
-                elif wine.get("wine_type") not in WINE_TYPES:
-                    print(f"    ❌ Rejected: Invalid wine_type '{wine.get('wine_type')}' (must be one of: {WINE_TYPES})")
-        
-        if len(valid_wines) > 1:
-            valid_wines = valid_wines[:1]
-
-        # Normalize ratings to avoid numeric scores and clichés
-        for w in valid_wines:
-            w["rating"] = _normalize_rating(w.get("rating"), w.get("description"))
+        candidates = copy.deepcopy(wines) if isinstance(wines, list) else []
+        valid_wines = _validate_wines(wines, supermarkets, wine_types)
+        _store_extraction(cache_key, gpt, result, reasoning, candidates, valid_wines, "single")
 
         print(f"Extracted {len(valid_wines)} wines from text")
         return valid_wines
@@ -320,3 +462,109 @@ Example output when NO wine found:
         print(f"Error extracting wines: {e}")
         return []
 
+
+def _extract_batch(items: List[Tuple[str, str]]) -> Dict[str, List[Dict]]:
+    """One chat completion for a batch of (id, text); missing items fall back to single requests."""
+    compiled = config.compiled
+    supermarkets = compiled.supermarket_list
+    wine_types = compiled.wine_types
+    gpt = _gpt_settings()
+    system_prompt = _system_prompt(supermarkets)
+
+    results: Dict[str, List[Dict]] = {}
+    by_id = dict(items)
+    try:
+        response = client.chat.completions.create(
+            model=gpt["model"],
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": _build_batch_prompt(items, supermarkets)}
+            ],
+            temperature=gpt["temperature"],
+            max_tokens=min(BATCH_MAX_TOKENS, 200 + BATCH_TOKENS_PER_ITEM * len(items)),
+            response_format={"type": "json_object"}
+        )
+        response_obj = _parse_json_content(response.choices[0].message.content)
+        entries = response_obj.get("results", []) if isinstance(response_obj, dict) else []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            item_id = str(entry.get("id", ""))
+            if item_id not in by_id or item_id in results:
+                continue
+            reasoning = entry.get("reasoning", "No reasoning provided")
+            print(f"    [{item_id}] LLM Reasoning: {reasoning}")
+            logger.info(f"Wine extraction reasoning ({item_id}): {reasoning}")
+            wines = entry.get("wines", []) or []
+            candidates = copy.deepcopy(wines) if isinstance(wines, list) else []
+            results[item_id] = _validate_wines(wines, supermarkets, wine_types)
+            # Batch key: later batched runs hit it, single extractions do not
+            _store_extraction(
+                _cache_key(by_id[item_id], gpt, system_prompt, BATCH_PROMPT_VERSION), gpt,
+                json.dumps(entry, ensure_ascii=False), reasoning, candidates, results[item_id], "batch"
+            )
+    except Exception as e:
+        print(f"Batch extraction failed ({len(items)} items), falling back to single requests: {e}")
+
+    missing = [item_id for item_id, _ in items if item_id not in results]
+    if missing and len(missing) < len(items):
+        print(f"    {len(missing)} item(s) missing from batch response, extracting individually")
+    for item_id in missing:
+        results[item_id] = extract_wines_from_text(by_id[item_id])
+    return results
+
+
+def extract_wines_batch(items: List[Dict], batch_size: Optional[int] = None, use_cache: bool = True) -> Dict[str, List[Dict]]:
+    """
+    Extract wines for many videos, packing several into each request.
+
+    The shared instructions (~1.5k tokens) are sent once per batch instead of
+    once per video; every item goes through the same validation and
+    _normalize_rating as extract_wines_from_text.
+
+    Args:
+        items: [{'id', 'caption', 'transcription'}] with unique ids
+        batch_size: Videos per request (default: gpt.batch_size)
+        use_cache: Serve unchanged videos from the extraction cache
+
+    Returns:
+        {id: [wine dicts]} for every item
+    """
+    gpt = _gpt_settings()
+    batch_size = max(1, int(batch_size or gpt["batch_size"]))
+    compiled = config.compiled
+    system_prompt = _system_prompt(compiled.supermarket_list)
+    results: Dict[str, List[Dict]] = {}
+    texts: List[Tuple[str, str]] = []
+    hits = 0
+    for item in items:
+        item_id = str(item["id"])
+        text = _combine_caption_and_transcription(item.get("caption") or "", item.get("transcription"))
+        if not text or len(text.strip()) < 10:
+            results[item_id] = []
+            continue
+        if use_cache:
+            # A single-request answer for the same text is as good as a batch one
+            cached = None
+            for version in (PROMPT_VERSION, BATCH_PROMPT_VERSION):
+                cached = _cached_wines(
+                    _cache_key(text, gpt, system_prompt, version), compiled.supermarket_list, compiled.wine_types
+                )
+                if cached is not None:
+                    break
+            if cached is not None:
+                results[item_id] = cached
+                hits += 1
+                continue
+        texts.append((item_id, text))
+    if hits:
+        print(f"Extraction cache: {hits}/{len(items)} videos already extracted")
+
+    for offset in range(0, len(texts), batch_size):
+        batch = texts[offset:offset + batch_size]
+        if len(batch) == 1:
+            results[batch[0][0]] = extract_wines_from_text(batch[0][1], use_cache=use_cache)
+        else:
+            print(f"Extracting batch of {len(batch)} videos ({offset + len(batch)}/{len(texts)})")
+            results.update(_extract_batch(batch))
+    return results
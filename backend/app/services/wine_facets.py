@@ -0,0 +1,74 @@
+"""
+Faceted wine counts for the frontend filters.
+
+All counts come from a single $facet aggregation and are cached until the
+catalogue version of the wine read model changes, so filters cost one
+aggregation per catalogue write instead of one query per filter.
+"""
+from typing import Dict, List, Optional
+from .wine_cache import wine_cache
+
+FACET_FIELDS = ["supermarket", "wine_type", "influencer_source", "in_stock"]
+
+_cached_version: Optional[str] = None
+_cached_facets: Optional[Dict] = None
+
+
+def _count_by(*fields: str) -> List[Dict]:
+    group_id = {f: f"${f}" for f in fields} if len(fields) > 1 else f"${fields[0]}"
+    return [
+        {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+        {"$sort": {"count": -1}},
+    ]
+
+
+def _pipeline() -> List[Dict]:
+    facets = {f: _count_by(f) for f in FACET_FIELDS}
+    # Cross counts so a selected supermarket can show per-type counts and vice versa
+    facets["supermarket_wine_type"] = _count_by("supermarket", "wine_type")
+    facets["total"] = [{"$count": "count"}]
+    return [{"$facet": facets}]
+
+
+def _shape(raw: Dict) -> Dict:
+    result = {
+        "total": raw["total"][0]["count"] if raw.get("total") else 0,
+    }
+    for field in FACET_FIELDS:
+        result[field] = [{"value": row["_id"], "count": row["count"]} for row in raw.get(field, [])]
+    result["supermarket_wine_type"] = [
+        {
+            "supermarket": row["_id"].get("supermarket"),
+            "wine_type": row["_id"].get("wine_type"),
+            "count": row["count"],
+        }
+        for row in raw.get("supermarket_wine_type", [])
+    ]
+    return result
+
+
+async def get_wine_facets(db) -> Dict:
+    """Return facet counts, recomputing only after a catalogue write."""
+    global _cached_version, _cached_facets
+
+    # Without a built read model there is no version to key on; always recompute
+    version = wine_cache.version if wine_cache.ready else None
+    if version is not None and version == _cached_version and _cached_facets is not None:
+        return _cached_facets
+
+    raw = {}
+    async for doc in db.wines.aggregate(_pipeline()):
+        raw = doc
+    facets = _shape(raw)
+
+    if version is not None:
+        _cached_version, _cached_facets = version, facets
+    return facets
+
+
+def count_for(facets: Dict, field: str, value) -> int:
+    """Count for one facet value (0 when absent)."""
+    for row in facets.get(field, []):
+        if row["value"] == value:
+            return row["count"]
+    return 0
@@ -0,0 +1,188 @@
+"""
+In-memory full-text and fuzzy search over wines.
+
+An inverted index over name, description, rating and supermarket with the
+same accent folding as the lexicon matcher (`lexicon_matcher.fold`), plus a trigram index over the
+vocabulary so misspellings ("Cote du Rhone" vs "Côtes du Rhône") still
+match. The index is owned by the wine read model and patched per wine on
+every write, so queries never touch Mongo.
+"""
+import re
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+from ..utils.lexicon_matcher import fold
+
+# Field weights: a hit in the name counts more than one in the description
+FIELD_WEIGHTS = {
+    "name": 3.0,
+    "supermarket": 2.0,
+    "rating": 1.0,
+    "description": 1.0,
+}
+
+# Tokens shorter than this only match exactly (no trigram fuzziness)
+MIN_FUZZY_LENGTH = 4
+# Dice coefficient over padded trigrams needed to count as a fuzzy hit
+FUZZY_THRESHOLD = 0.5
+# Share of query tokens a wine must match to be returned
+MIN_COVERAGE = 0.5
+# Memoised query-token expansions (LRU); bounds memory against random queries
+MAX_EXPANSIONS = 4096
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    # Same accent folding as the lexicon matcher
+    return _TOKEN_RE.findall(fold(text or ""))
+
+
+def trigrams(token: str) -> Set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class WineSearchIndex:
+    def __init__(self):
+        # token -> wine_id -> best field weight for that token
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        # trigram -> tokens in the vocabulary containing it
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        # wine_id -> tokens indexed for it (for removal)
+        self._doc_tokens: Dict[str, Set[str]] = {}
+        # Query-token expansions (LRU, MAX_EXPANSIONS), cleared whenever the vocabulary changes
+        self._expansions: "OrderedDict[str, List[Tuple[str, float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def clear(self) -> None:
+        self._postings = defaultdict(dict)
+        self._trigrams = defaultdict(set)
+        self._doc_tokens = {}
+        self._expansions = OrderedDict()
+
+    def add(self, wine: Dict) -> None:
+        """Index (or re-index) a serialized wine."""
+        wine_id = wine["id"]
+        if wine_id in self._doc_tokens:
+            self.remove(wine_id)
+
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(wine.get(field) or ""):
+                if weight > weights.get(token, 0.0):
+                    weights[token] = weight
+
+        for token, weight in weights.items():
+            if token not in self._postings:
+                for gram in trigrams(token):
+                    self._trigrams[gram].add(token)
+                self._expansions.clear()
+            self._postings[token][wine_id] = weight
+        self._doc_tokens[wine_id] = set(weights)
+
+    def remove(self, wine_id: str) -> None:
+        tokens = self._doc_tokens.pop(wine_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(wine_id, None)
+            if not postings:
+                del self._postings[token]
+                for gram in trigrams(token):
+                    grams = self._trigrams.get(gram)
+                    if grams is not None:
+                        grams.discard(token)
+                        if not grams:
+                            del self._trigrams[gram]
+                self._expansions.clear()
+
+    def rebuild(self, wines: Iterable[Dict]) -> None:
+        self.clear()
+        for wine in wines:
+            self.add(wine)
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Vocabulary tokens matching a query token, with similarity 0..1."""
+        cached = self._expansions.get(token)
+        if cached is not None:
+            self._expansions.move_to_end(token)
+            return cached
+
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = 1.0
+
+        if len(token) >= MIN_FUZZY_LENGTH:
+            query_grams = trigrams(token)
+            shared: Dict[str, int] = defaultdict(int)
+            for gram in query_grams:
+                for candidate in self._trigrams.get(gram, ()):
+                    shared[candidate] += 1
+            for candidate, common in shared.items():
+                if candidate in matches:
+                    continue
+                # Prefix hits ("chard" -> "chardonnay") are useful while typing
+                if candidate.startswith(token):
+                    matches[candidate] = 0.9
+                    continue
+                dice = 2.0 * common / (len(query_grams) + len(candidate))
+                if dice >= FUZZY_THRESHOLD:
+                    matches[candidate] = dice
+
+        expansion = sorted(matches.items(), key=lambda kv: -kv[1])
+        self._expansions[token] = expansion
+        if len(self._expansions) > MAX_EXPANSIONS:
+            self._expansions.popitem(last=False)
+        return expansion
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[str, float]]:
+        """
+        Rank wine ids for a free-text query.
+
+        Returns:
+            List of (wine_id, score), best first
+        """
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens:
+            return []
+
+        # Per query token: (similarity, postings) for every vocabulary match
+        per_token = []
+        for token in query_tokens:
+            hits = [(similarity, self._postings[candidate]) for candidate, similarity in self._expand(token)]
+            per_token.append((sum(len(p) for _, p in hits), hits))
+        per_token.sort(key=lambda item: item[0])
+
+        needed = max(1, int(len(query_tokens) * MIN_COVERAGE + 0.5))
+        # A wine matching `needed` tokens must hit at least one of the rarest
+        # (n - needed + 1) tokens, so only those postings are walked; frequent
+        # tokens are then probed per candidate instead of scanned.
+        pivot = len(per_token) - needed + 1
+        candidates: Set[str] = set()
+        for _, hits in per_token[:pivot]:
+            for _, postings in hits:
+                candidates.update(postings)
+
+        ranked = []
+        for wine_id in candidates:
+            score = 0.0
+            matched = 0
+            for _, hits in per_token:
+                best = 0.0
+                for similarity, postings in hits:
+                    weight = postings.get(wine_id)
+                    if weight is not None and similarity * weight > best:
+                        best = similarity * weight
+                if best:
+                    score += best
+                    matched += 1
+            if matched >= needed:
+                ranked.append((wine_id, score))
+
+        ranked.sort(key=lambda kv: -kv[1])
+        return ranked[:limit] if limit else ranked
@@ -1,10 +1,94 @@
 """
 YAML Configuration Loader
 Loads all keyword and configuration files
+
+The YAML files in backend/config are compiled into one immutable
+CompiledConfig snapshot: the raw dicts plus everything derived from them
+(supermarket list and alias map, the supermarket pre-filter, ordered prompt
+terms, the lexicon matcher, and artifacts other modules register with
+`register_compiler`, such as the ASR prompt). Each snapshot carries a
+version id (hash of the file contents).
+
+`reload()` builds a new snapshot and swaps it in with one assignment, so
+readers always see a consistent set. `start_watching()` polls the files and
+reloads on change, so lexicon and alias edits apply without a restart; a
+YAML error keeps the previous snapshot.
 """
+import hashlib
+import logging
+import threading
 import yaml
 import os
-from typing import Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .lexicon_matcher import LexiconMatcher, fold
+from .supermarket_filter import SupermarketFilter
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILES = ['supermarkets.yaml', 'wine_keywords.yaml', 'scraping_settings.yaml', 'lexicon.yaml']
+
+DEFAULT_LEXICON = {
+    'supermarkets': [],
+    'brands': [],
+    'grapes': [],
+    'regions': [],
+    'wine_terms': []
+}
+
+PROMPT_TERM_CATEGORIES = ['supermarkets', 'brands', 'grapes', 'regions', 'wine_terms']
+
+
+class CompiledConfig:
+    """Immutable snapshot of the YAML config and its precomputed artifacts."""
+
+    def __init__(self, raw: Dict[str, Dict], version: str, compilers: Dict[str, Callable]):
+        self.version = version
+        self.supermarkets: Dict = raw['supermarkets.yaml']
+        self.wine_keywords: Dict = raw['wine_keywords.yaml']
+        self.scraping_settings: Dict = raw['scraping_settings.yaml'] or {}
+        self.lexicon: Dict = raw.get('lexicon.yaml') or dict(DEFAULT_LEXICON)
+
+        entries = self.supermarkets.get('supermarkets', []) or []
+        self.supermarket_list: List[str] = [sm['name'] for sm in entries]
+        self.wine_types: List[str] = list(self.wine_keywords.get('wine_types', []) or [])
+        self.alias_map: Dict[str, str] = {}
+        keywords: List[str] = []
+        for sm in entries:
+            for alias in sm.get('aliases', []) or []:
+                self.alias_map.setdefault(alias.lower().strip(), sm['name'])
+                keywords.append(alias)
+        keywords.extend(self.supermarkets.get('general_keywords', []) or [])
+        self.supermarket_keywords: List[str] = keywords
+        self.supermarket_filter = SupermarketFilter(self.supermarkets)
+
+        # Ordered, deduplicated prompt terms (O(n) with a seen-set), capped by asr.prompt_terms_max
+        seen = set()
+        terms: List[str] = []
+        for key in PROMPT_TERM_CATEGORIES:
+            for item in self.lexicon.get(key, []) or []:
+                if item and item not in seen:
+                    seen.add(item)
+                    terms.append(item)
+        settings_max = (self.scraping_settings.get('asr', {}) or {}).get('prompt_terms_max')
+        if isinstance(settings_max, int) and settings_max > 0:
+            terms = terms[:settings_max]
+        self.prompt_terms: Tuple[str, ...] = tuple(terms)
+        self.lexicon_matcher = LexiconMatcher(self.lexicon, list(self.prompt_terms))
+
+        self._artifacts: Dict[str, Any] = {}
+        self._artifact_lock = threading.Lock()
+        for name, compiler in compilers.items():
+            self._artifacts[name] = compiler(self)
+
+    def artifact(self, name: str, compiler: Callable) -> Any:
+        """A registered artifact; compiled on first use for compilers registered after load."""
+        try:
+            return self._artifacts[name]
+        except KeyError:
+            with self._artifact_lock:
+                if name not in self._artifacts:
+                    self._artifacts[name] = compiler(self)
+                return self._artifacts[name]
 
 
 class ConfigLoader:
@@ -13,70 +97,159 @@ class ConfigLoader:
             os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
             'config'
         )
-        self._supermarkets = None
-        self._wine_keywords = None
-        self._scraping_settings = None
-        self._lexicon = None
-    
+        self._compiled: Optional[CompiledConfig] = None
+        self._compilers: Dict[str, Callable] = {}
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+
     def load_yaml(self, filename: str) -> Dict:
         """Load a YAML file from config directory"""
         filepath = os.path.join(self.config_dir, filename)
         with open(filepath, 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
-    
+
+    def _file_fingerprint(self) -> Tuple:
+        stamp = []
+        for filename in CONFIG_FILES:
+            try:
+                st = os.stat(os.path.join(self.config_dir, filename))
+                stamp.append((filename, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stamp.append((filename, None, None))
+        return tuple(stamp)
+
+    def _compile(self) -> CompiledConfig:
+        raw: Dict[str, Dict] = {}
+        digest = hashlib.sha1()
+        for filename in CONFIG_FILES:
+            filepath = os.path.join(self.config_dir, filename)
+            try:
+                with open(filepath, 'rb') as f:
+                    content = f.read()
+            except FileNotFoundError:
+                if filename == 'lexicon.yaml':
+                    # Provide safe defaults if file missing
+                    continue
+                raise
+            digest.update(filename.encode() + b'\0' + content + b'\0')
+            raw[filename] = yaml.safe_load(content.decode('utf-8'))
+        return CompiledConfig(raw, digest.hexdigest()[:12], dict(self._compilers))
+
+    @property
+    def compiled(self) -> CompiledConfig:
+        """Current snapshot (loaded on first use). Hold on to it for a consistent view."""
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._fingerprint = self._file_fingerprint()
+                    self._compiled = self._compile()
+                compiled = self._compiled
+        return compiled
+
+    @property
+    def version(self) -> str:
+        """Version id of the current snapshot"""
+        return self.compiled.version
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompile if any config file changed (or always with force).
+
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        with self._lock:
+            fingerprint = self._file_fingerprint()
+            if not force and self._compiled is not None and fingerprint == self._fingerprint:
+                return False
+            try:
+                compiled = self._compile()
+            except Exception as e:
+                # Half-saved or invalid YAML: keep serving the previous snapshot
+                logger.error(f"Config reload failed, keeping version {self._compiled.version if self._compiled else None}: {e}")
+                return False
+            self._fingerprint = fingerprint
+            if self._compiled is not None and compiled.version == self._compiled.version:
+                return False
+            previous = self._compiled.version if self._compiled else None
+            self._compiled = compiled
+        logger.info(f"Config reloaded: {previous} -> {compiled.version}")
+        print(f"🔄 Config reloaded (version {compiled.version})")
+        return True
+
+    def start_watching(self, interval: Optional[float] = None) -> None:
+        """Poll backend/config/*.yaml in a daemon thread and reload on change"""
+        if self._watcher is not None:
+            return
+        settings = self.scraping_settings.get('config_reload', {}) or {}
+        if not settings.get('enabled', True):
+            return
+        interval = interval or float(settings.get('interval_seconds', 5))
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.reload()
+                except Exception as e:
+                    logger.warning(f"Config watcher error: {e}")
+
+        self._watcher = threading.Thread(target=watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop_watching.set()
+        self._watcher = None
+
+    def register_compiler(self, name: str, compiler: Callable[[CompiledConfig], Any]) -> None:
+        """
+        Register an artifact derived from the config (e.g. a prompt string).
+        It is compiled with every snapshot, so reads are precomputed and
+        always match the snapshot's version. The compiler must read only the
+        snapshot it is given, not the loader (which is mid-swap).
+        """
+        self._compilers[name] = compiler
+
+    def artifact(self, name: str) -> Any:
+        """Current value of a registered artifact"""
+        return self.compiled.artifact(name, self._compilers[name])
+
     @property
     def supermarkets(self) -> Dict:
         """Load supermarket configuration"""
-        if self._supermarkets is None:
-            self._supermarkets = self.load_yaml('supermarkets.yaml')
-        return self._supermarkets
-    
+        return self.compiled.supermarkets
+
     @property
     def wine_keywords(self) -> Dict:
         """Load wine keywords configuration"""
-        if self._wine_keywords is None:
-            self._wine_keywords = self.load_yaml('wine_keywords.yaml')
-        return self._wine_keywords
-    
+        return self.compiled.wine_keywords
+
     @property
     def scraping_settings(self) -> Dict:
         """Load scraping settings"""
-        if self._scraping_settings is None:
-            self._scraping_settings = self.load_yaml('scraping_settings.yaml')
-        return self._scraping_settings
+        return self.compiled.scraping_settings
 
     @property
     def lexicon(self) -> Dict:
         """Load wine lexicon configuration"""
-        if self._lexicon is None:
-            try:
-                self._lexicon = self.load_yaml('lexicon.yaml')
-            except FileNotFoundError:
-                # Provide safe defaults if file missing
-                self._lexicon = {
-                    'supermarkets': [],
-                    'brands': [],
-                    'grapes': [],
-                    'regions': [],
-                    'wine_terms': []
-                }
-        return self._lexicon
+        return self.compiled.lexicon
+
+    @property
+    def lexicon_matcher(self) -> LexiconMatcher:
+        """Precompiled lexicon index (folded-term set + prompt-term automaton)"""
+        return self.compiled.lexicon_matcher
+
+    @property
+    def supermarket_filter(self) -> SupermarketFilter:
+        """Compiled supermarket pre-filter (one regex over all aliases)"""
+        return self.compiled.supermarket_filter
 
     def get_prompt_terms(self, max_items: int = 80) -> list:
-        """Collect top-N prompt terms from lexicon, deduplicated preserving order."""
-        # Allow override from settings
-        settings_max = (self.scraping_settings.get('asr', {}) or {}).get('prompt_terms_max')
-        if isinstance(settings_max, int) and settings_max > 0:
-            max_items = min(max_items, settings_max)
-        terms = []
-        for key in ['supermarkets', 'brands', 'grapes', 'regions', 'wine_terms']:
-            items = self.lexicon.get(key, []) or []
-            for item in items:
-                if item and item not in terms:
-                    terms.append(item)
-                if len(terms) >= max_items:
-                    return terms[:max_items]
-        return terms[:max_items]
+        """Top-N prompt terms from lexicon, deduplicated preserving order (precomputed)."""
+        return list(self.compiled.prompt_terms[:max_items])
 
     def _strip_accents(self, s: str) -> str:
         import unicodedata
@@ -97,47 +270,34 @@ class ConfigLoader:
             return False
         has_upper = any(c.isupper() for c in stripped)
         has_dash = '-' in stripped or '’' in stripped or '\'' in stripped
+        if has_upper or has_dash:
+            return True
+        # Lexicon membership (accent-folded, precompiled set)
+        folded = fold(stripped)
+        if folded in self.lexicon_matcher.folded_lexicon:
+            return True
         # Accent presence
-        accent_fold_changed = self._strip_accents(stripped) != stripped
-        # Lexicon approx membership
-        folded = self._strip_accents(stripped).lower()
-        for key in ['brands', 'grapes', 'regions', 'wine_terms', 'supermarkets']:
-            for entry in self.lexicon.get(key, []) or []:
-                if self._strip_accents(str(entry)).lower() == folded:
-                    return True
-        return has_upper or has_dash or accent_fold_changed
-    
+        return folded != stripped.lower()
+
     def get_supermarket_list(self) -> List[str]:
         """Get list of supermarket names"""
-        return [sm['name'] for sm in self.supermarkets['supermarkets']]
-    
+        return list(self.compiled.supermarket_list)
+
+    def get_wine_types(self) -> List[str]:
+        """Get list of valid wine types"""
+        return list(self.compiled.wine_types)
+
     def get_all_supermarket_keywords(self) -> List[str]:
         """Get all supermarket keywords including aliases"""
-        keywords = []
-        
-        # Add all aliases from each supermarket
-        for sm in self.supermarkets['supermarkets']:
-            keywords.extend(sm['aliases'])
-        
-        # Add general keywords
-        keywords.extend(self.supermarkets.get('general_keywords', []))
-        
-        return keywords
-    
+        return list(self.compiled.supermarket_keywords)
+
     def normalize_supermarket_name(self, alias: str) -> str:
         """
         Convert supermarket alias to official name
         e.g., "ah" -> "Albert Heijn"
         """
-        alias_lower = alias.lower().strip()
-        
-        for sm in self.supermarkets['supermarkets']:
-            if alias_lower in [a.lower() for a in sm['aliases']]:
-                return sm['name']
-        
-        return alias  # Return as-is if no match
+        return self.compiled.alias_map.get(alias.lower().strip(), alias)  # As-is if no match
 
 
 # Global instance
 config = ConfigLoader()
-
@@ -0,0 +1,31 @@
+"""
+ffmpeg discovery
+Locates ffmpeg once per process (Windows WinGet install paths, else PATH).
+"""
+import glob
+import os
+from functools import lru_cache
+from typing import Optional
+
+WINDOWS_FFMPEG_PATHS = [
+    r"C:\Users\tanst\AppData\Local\Microsoft\WinGet\Packages\Gyan.FFmpeg_*\ffmpeg-*\bin",
+    r"C:\Program Files\ffmpeg\bin",
+    r"C:\ffmpeg\bin"
+]
+
+
+@lru_cache(maxsize=None)
+def find_ffmpeg_location() -> Optional[str]:
+    """Directory containing ffmpeg on Windows installs, or None to use PATH."""
+    for pattern in WINDOWS_FFMPEG_PATHS:
+        matches = glob.glob(pattern)
+        if matches:
+            return matches[0]
+    return None
+
+
+@lru_cache(maxsize=None)
+def ffmpeg_binary() -> str:
+    """Executable to invoke for ffmpeg."""
+    location = find_ffmpeg_location()
+    return os.path.join(location, "ffmpeg.exe") if location else "ffmpeg"
@@ -0,0 +1,127 @@
+"""
+Precompiled lexicon index.
+
+Built once from lexicon.yaml (see ConfigLoader.lexicon_matcher) instead of
+re-folding and scanning every lexicon entry per token:
+- a set of accent-folded, lowercased entries for exact membership
+  (is_wine_like_token, OOV counting)
+- an Aho-Corasick automaton over the lowercased ASR prompt terms, so all
+  prompt-term hits in a transcript are found in one pass over the text
+"""
+import unicodedata
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+# Prompt terms shorter than this are too ambiguous to count as hits
+MIN_HIT_LENGTH = 4
+
+LEXICON_CATEGORIES = ['brands', 'grapes', 'regions', 'wine_terms', 'supermarkets']
+
+
+def fold(text: str) -> str:
+    """Accent-fold and lowercase ("Côtes" -> "cotes")."""
+    return ''.join(
+        c for c in unicodedata.normalize('NFKD', text)
+        if not unicodedata.combining(c)
+    ).lower()
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; `find` reports which patterns occur in a text."""
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[str]] = [set()]
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build_links()
+
+    def _add(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            node = nxt
+        self._out[node].add(pattern)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._out[child] |= self._out[self._fail[child]]
+
+    def find(self, text: str) -> Set[str]:
+        """Patterns occurring anywhere in `text`."""
+        found: Set[str] = set()
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+class LexiconMatcher:
+    def __init__(self, lexicon: Dict[str, List[str]], prompt_terms: List[str]):
+        """
+        Args:
+            lexicon: Loaded lexicon.yaml (category -> entries)
+            prompt_terms: Full ordered prompt term list (ConfigLoader.get_prompt_terms);
+                          "top N" queries below refer to its first N entries
+        """
+        self.folded_lexicon: FrozenSet[str] = frozenset(
+            fold(str(entry))
+            for key in LEXICON_CATEGORIES
+            for entry in (lexicon.get(key, []) or [])
+            if entry
+        )
+        self.prompt_terms = list(prompt_terms)
+        self._lowered = [t.lower() for t in self.prompt_terms]
+        self._automaton = AhoCorasick(t for t in self._lowered if len(t) >= MIN_HIT_LENGTH)
+        self._folded_prompt_cache: Dict[int, FrozenSet[str]] = {}
+
+    def contains(self, token: str) -> bool:
+        """Exact accent-folded membership in any lexicon category."""
+        return fold(token) in self.folded_lexicon
+
+    def prompt_hits(self, text: str) -> Set[str]:
+        """Lowercased prompt terms (len >= MIN_HIT_LENGTH) occurring in `text`, one pass."""
+        return self._automaton.find(text.lower())
+
+    def count_prompt_hits(self, text: str, max_items: int, limit: int = 0) -> int:
+        """
+        Number of the first `max_items` prompt terms (len >= MIN_HIT_LENGTH)
+        that occur in `text`, optionally stopping at `limit`.
+        """
+        hits = self.prompt_hits(text)
+        count = 0
+        for term in self._lowered[:max_items]:
+            if len(term) >= MIN_HIT_LENGTH and term in hits:
+                count += 1
+                if limit and count >= limit:
+                    break
+        return count
+
+    def folded_prompt_terms(self, max_items: int) -> FrozenSet[str]:
+        """Accent-folded first `max_items` prompt terms (len >= MIN_HIT_LENGTH)."""
+        cached = self._folded_prompt_cache.get(max_items)
+        if cached is None:
+            cached = frozenset(fold(t) for t in self.prompt_terms[:max_items] if len(t) >= MIN_HIT_LENGTH)
+            self._folded_prompt_cache[max_items] = cached
+        return cached
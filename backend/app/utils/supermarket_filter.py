@@ -0,0 +1,120 @@
+"""
+Compiled supermarket pre-filter.
+
+Built once per config snapshot from supermarkets.yaml (see
+ConfigLoader.supermarket_filter) and shared by every ingestion path
+(smart_scraper, tiktok_audio, CI pipeline, admin ingestion). All aliases and
+general keywords go into a single alternation regex:
+- word boundaries, so "ah" no longer matches inside "yeah" or "ahh"
+- whitespace inside an alias matches any run of whitespace
+- an optional '#' prefix, and multi-word aliases also match as one hashtag
+  ("#albertheijn")
+- per-alias case rules: aliases listed under `case_sensitive` for a
+  supermarket (e.g. Plus/PLUS) only match those exact spellings, everything
+  else is case-insensitive
+
+A match reports the supermarket (None for general keywords such as
+"supermarkt"), the alias and its offset in the text.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+
+class SupermarketMatch(NamedTuple):
+    supermarket: Optional[str]   # official name; None for general keywords
+    alias: str                   # text as it appears in the caption
+    start: int
+    end: int
+
+
+def _alias_pattern(alias: str) -> str:
+    return r"\s+".join(re.escape(word) for word in alias.split())
+
+
+class SupermarketFilter:
+    def __init__(self, supermarkets_config: Dict):
+        """
+        Args:
+            supermarkets_config: Loaded supermarkets.yaml
+        """
+        # lowercased, whitespace-collapsed alias -> supermarket (None = general)
+        self._lookup: Dict[str, Optional[str]] = {}
+        # exact spelling -> supermarket for case-sensitive aliases
+        self._exact: Dict[str, str] = {}
+
+        for sm in supermarkets_config.get('supermarkets', []) or []:
+            name = sm['name']
+            exact = [str(a).strip() for a in sm.get('case_sensitive', []) or [] if str(a).strip()]
+            exact_lower = {a.lower() for a in exact}
+            for spelling in exact:
+                self._exact.setdefault(spelling, name)
+            for alias in sm.get('aliases', []) or []:
+                key = self._key(alias)
+                if key and key not in exact_lower:
+                    self._lookup.setdefault(key, name)
+        for keyword in supermarkets_config.get('general_keywords', []) or []:
+            key = self._key(keyword)
+            if key:
+                self._lookup.setdefault(key, None)
+
+        insensitive = set(self._lookup)
+        # Hashtags drop the spaces: "#albertheijn", "#plussupermarkt"
+        for key, name in list(self._lookup.items()):
+            if ' ' in key:
+                joined = key.replace(' ', '')
+                self._lookup.setdefault(joined, name)
+                insensitive.add('#' + joined)
+        exact_all = set(self._exact)
+
+        # Longest first: at one position the alternation takes the first branch
+        # that matches, so "albert heijn" wins over "ah"
+        alternatives = [
+            _alias_pattern(k) for k in sorted(insensitive, key=len, reverse=True)
+        ]
+        branches = []
+        if alternatives:
+            branches.append("(?i:" + "|".join(alternatives) + ")")
+        if exact_all:
+            branches.append("|".join(_alias_pattern(a) for a in sorted(exact_all, key=len, reverse=True)))
+        self._pattern = (
+            re.compile(r"(?<![\w#])#?(?:" + "|".join(branches) + r")(?!\w)") if branches else None
+        )
+
+    @staticmethod
+    def _key(alias: str) -> str:
+        return ' '.join(str(alias).lower().split())
+
+    def _match(self, m: "re.Match") -> SupermarketMatch:
+        text = m.group(0)
+        bare = text.lstrip('#')
+        collapsed = ' '.join(bare.split())
+        if collapsed in self._exact:
+            supermarket = self._exact[collapsed]
+        else:
+            key = collapsed.lower()
+            supermarket = self._lookup.get(key, self._lookup.get('#' + key))
+        return SupermarketMatch(supermarket, text, m.start(), m.end())
+
+    def search(self, text: str) -> Optional[SupermarketMatch]:
+        """First supermarket mention in `text`, or None."""
+        if not text or self._pattern is None:
+            return None
+        m = self._pattern.search(text)
+        return self._match(m) if m else None
+
+    def find_all(self, text: str) -> List[SupermarketMatch]:
+        """All non-overlapping supermarket mentions in `text`, in order."""
+        if not text or self._pattern is None:
+            return []
+        return [self._match(m) for m in self._pattern.finditer(text)]
+
+    def first_supermarket(self, *texts: str) -> Optional[SupermarketMatch]:
+        """
+        First mention of a specific supermarket (general keywords skipped),
+        trying each text in order (e.g. caption, then transcript).
+        """
+        for text in texts:
+            for match in self.find_all(text):
+                if match.supermarket:
+                    return match
+        return None
@@ -29,8 +29,10 @@ from app.services.video_downloader import TikTokVideoDownloader
 from app.services.transcription import transcribe_video_audio
 from app.services.wine_extractor import extract_wines_from_caption_and_transcription
 from app.services.frame_extractor import extract_frames_at_times
-from app.services.wine_timing import find_wine_mention_with_signal, get_optimal_frame_times, get_fallback_frame_times
-from app.services.cloudinary_upload import upload_wine_image
+from app.services.frame_scoring import rank_frame_files
+from app.services.wine_timing import find_wine_mention_with_signal
+from app.services.frame_sampling import candidate_frame_times
+from app.services.cloudinary_upload import get_uploader
 
 
 async def process_tiktok_url(db, tiktok_url: str) -> int:
@@ -59,24 +61,17 @@ async def process_tiktok_url(db, tiktok_url: str) -> int:
         print(f"✓ Video by @{author}")
         print(f"  Caption: {caption[:100]}...")
         
-        # 2. Download video (both audio for transcription and full video for frames)
+        # 2. Download video once (audio for transcription is derived from it)
         print("\n📥 Downloading video...")
         downloader = TikTokVideoDownloader()
         
-        # Download audio for transcription
-        audio_result = downloader.download_video_audio(tiktok_url)
-        if not audio_result:
-            print("❌ Failed to download audio")
-            return 0
-        audio_path, post_date = audio_result
-        print(f"✓ Downloaded audio: {audio_path}")
-        
-        # Download full video for frame extraction
-        video_path = downloader.download_full_video(tiktok_url)
-        if not video_path:
+        media = downloader.acquire_media(tiktok_url)
+        if not media:
             print("❌ Failed to download video")
             return 0
+        audio_path, video_path = media["audio_path"], media["video_path"]
         print(f"✓ Downloaded video: {video_path}")
+        print(f"✓ Extracted audio: {audio_path}")
         
         # 3. Transcribe audio
         print("\n🎤 Transcribing audio with Whisper...")
@@ -126,18 +121,18 @@ async def process_tiktok_url(db, tiktok_url: str) -> int:
             
             if timestamp:
                 print(f"  ✓ Found mention at {timestamp:.1f}s (method: {method})")
-                video_duration = segments[-1]['end'] if segments else 30.0
-                frame_times = get_optimal_frame_times(timestamp, video_duration)
             else:
-                print(f"  ⚠️  Wine not found in transcription, using fallback")
-                video_duration = segments[-1]['end'] if segments else 30.0
-                frame_times = get_fallback_frame_times(video_duration)
+                print(f"  ⚠️  Wine not found in transcription, scanning whole video")
+            video_duration = segments[-1]['end'] if segments else 30.0
+            frame_times = candidate_frame_times(video_path, timestamp or None, video_duration)
             
             print(f"  📸 Extracting {len(frame_times)} frames at: {[f'{t:.1f}s' for t in frame_times]}")
             
             # Extract frames
             frame_paths = extract_frames_at_times(video_path, frame_times)
             print(f"  ✓ Extracted {len(frame_paths)} frames")
+            frame_paths = rank_frame_files(frame_paths)
+            print(f"  ✓ Kept {len(frame_paths)} best frames")
             
             # Upload to Cloudinary
             print(f"  ☁️  Uploading to Cloudinary...")
@@ -146,8 +141,8 @@ async def process_tiktok_url(db, tiktok_url: str) -> int:
             temp_wine_id = hashlib.md5(f"{tiktok_url}_{wine_data['name']}".encode()).hexdigest()[:16]
             
             image_urls = []
-            for j, frame_path in enumerate(frame_paths):
-                cloudinary_url = upload_wine_image(frame_path, temp_wine_id, j)
+            uploaded = get_uploader().upload_wine_images(frame_paths, temp_wine_id, new_wine=True)
+            for j, cloudinary_url in enumerate(uploaded):
                 if cloudinary_url:
                     image_urls.append(cloudinary_url)
                     print(f"    ✓ Uploaded frame {j+1}/{len(frame_paths)}")
@@ -0,0 +1,86 @@
+"""
+Bulk-add TikTok posts to the database.
+
+Skips URLs that already have a wine or are already in processed_videos (one
+$in query), then runs the rest through the ingestion pipeline concurrently.
+Per-stage limits (downloads, ASR, LLM, ffmpeg, uploads) come from
+`ingestion` in config/scraping_settings.yaml.
+
+Usage:
+    python scripts/bulk_add_posts.py <url1> <url2> ...
+    python scripts/bulk_add_posts.py --file urls.txt [--pipelines 16] [--reprocess-processed-videos]
+"""
+import argparse
+import asyncio
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.services.ingestion import ingest_tiktok_posts
+
+
+def read_urls(path: str) -> list:
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk-add TikTok posts")
+    parser.add_argument("urls", nargs="*", help="TikTok video URLs")
+    parser.add_argument("--file", help="File with one URL per line (# comments allowed)")
+    parser.add_argument("--pipelines", type=int, default=None, help="URLs in flight at once (default from settings)")
+    parser.add_argument(
+        "--reprocess-processed-videos",
+        action="store_true",
+        help="Also process URLs already in processed_videos (only URLs with a wine are skipped)",
+    )
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.file:
+        try:
+            urls.extend(read_urls(args.file))
+        except FileNotFoundError:
+            print(f"Error: File not found: {args.file}")
+            sys.exit(1)
+    if not urls:
+        parser.print_usage()
+        sys.exit(1)
+
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client.vinly
+
+    async def progress(stage: str, message: str) -> None:
+        print(f"  [{stage}] {message}")
+
+    started = time.perf_counter()
+    summary = await ingest_tiktok_posts(
+        db,
+        urls,
+        progress,
+        pipelines=args.pipelines,
+        include_processed=not args.reprocess_processed_videos,
+    )
+    elapsed = time.perf_counter() - started
+
+    failures = [r for r in summary["results"] if r["status"] == "failed"]
+    if failures:
+        print("\nFailed:")
+        for r in failures:
+            print(f"  {r['url']}: {r['error']}")
+
+    print(f"\n{'='*70}")
+    print(f"  URLs: {summary['total']} ({summary['skipped']} skipped, {summary['processed']} processed, {summary['failed']} failed)")
+    print(f"  Wines added: {summary['wines_added']}")
+    print(f"  Time: {elapsed:.1f}s")
+    print(f"{'='*70}")
+
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
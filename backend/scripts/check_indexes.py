@@ -0,0 +1,35 @@
+"""
+Reconcile MongoDB indexes and print which are missing, drifted or unused.
+
+Same reconciliation the API runs at startup (see app/indexes.py).
+
+Usage:
+    python scripts/check_indexes.py
+"""
+import asyncio
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.indexes import ensure_indexes
+
+
+async def check_indexes():
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client.vinly
+    
+    report = await ensure_indexes(db)
+    
+    for collection, entry in report.items():
+        print(f"\n{collection}")
+        for key in ("created", "rebuilt", "failed", "undeclared", "unused"):
+            names = entry.get(key) or []
+            print(f"  {key:<11} {', '.join(names) if names else '-'}")
+    
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(check_indexes())
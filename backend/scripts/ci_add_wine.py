@@ -21,8 +21,11 @@ from app.services.video_downloader import TikTokVideoDownloader
 from app.services.transcription import transcribe_video_audio
 from app.services.wine_extractor import extract_wines_from_caption_and_transcription
 from app.services.frame_extractor import extract_frames_at_times
-from app.services.wine_timing import find_wine_mention_with_signal, get_optimal_frame_times, get_fallback_frame_times
-from app.services.cloudinary_upload import upload_wine_image
+from app.services.frame_scoring import rank_frame_files
+from app.services.wine_timing import find_wine_mention_with_signal
+from app.services.frame_sampling import candidate_frame_times
+from app.services.cloudinary_upload import get_uploader
+from app.utils.config_loader import config
 
 WINES_JSON = Path(__file__).parent.parent.parent / "docs" / "wines.json"
 
@@ -67,22 +70,17 @@ def process_url(tiktok_url: str) -> int:
     print(f"Video by @{author}")
     print(f"  Caption: {caption[:100]}...")
 
-    # 2. Download audio + video
+    # 2. Download video once; audio for transcription is derived from it
     print("\nDownloading video...")
     downloader = TikTokVideoDownloader()
 
-    audio_result = downloader.download_video_audio(tiktok_url)
-    if not audio_result:
-        print("Failed to download audio")
-        return 0
-    audio_path, post_date = audio_result
-    print(f"Downloaded audio: {audio_path}")
-
-    video_path = downloader.download_full_video(tiktok_url)
-    if not video_path:
+    media = downloader.acquire_media(tiktok_url)
+    if not media:
         print("Failed to download video")
         return 0
+    audio_path, video_path = media["audio_path"], media["video_path"]
     print(f"Downloaded video: {video_path}")
+    print(f"Extracted audio: {audio_path}")
 
     # 3. Transcribe
     print("\nTranscribing audio with Whisper...")
@@ -96,7 +94,16 @@ def process_url(tiktok_url: str) -> int:
     print(f"Transcribed {len(segments)} segments")
     print(f"  Text preview: {transcription_text[:150]}...")
 
-    # 4. Extract wines
+    # 4. Pre-filter: skip the LLM when no supermarket is named anywhere
+    mention = config.supermarket_filter.first_supermarket(caption, transcription_text)
+    pre_filter = (config.scraping_settings.get("cost_optimization", {}) or {}).get("pre_filter_videos", True)
+    if mention:
+        print(f"Supermarket mention: {mention.supermarket} ('{mention.alias}' at {mention.start})")
+    elif pre_filter:
+        print("No supermarket mentioned in caption or transcript")
+        return 0
+
+    # 5. Extract wines
     print("\nExtracting wine data...")
     extracted = extract_wines_from_caption_and_transcription(caption, transcription_text)
     if not extracted:
@@ -112,31 +119,31 @@ def process_url(tiktok_url: str) -> int:
     for i, wine_data in enumerate(extracted, 1):
         print(f"\nProcessing wine {i}/{len(extracted)}: {wine_data['name']}")
 
-        # 5. Frame extraction
+        # 6. Frame extraction
         wine_name = wine_data["name"]
         print("  Finding optimal frames...")
         timestamp, method = find_wine_mention_with_signal(wine_name, segments)
 
         if timestamp:
             print(f"  Found mention at {timestamp:.1f}s (method: {method})")
-            video_duration = segments[-1]["end"] if segments else 30.0
-            frame_times = get_optimal_frame_times(timestamp, video_duration)
         else:
-            print("  Wine not found in transcription, using fallback")
-            video_duration = segments[-1]["end"] if segments else 30.0
-            frame_times = get_fallback_frame_times(video_duration)
+            print("  Wine not found in transcription, scanning whole video")
+        video_duration = segments[-1]["end"] if segments else 30.0
+        frame_times = candidate_frame_times(video_path, timestamp or None, video_duration)
 
         print(f"  Extracting {len(frame_times)} frames at: {[f'{t:.1f}s' for t in frame_times]}")
         frame_paths = extract_frames_at_times(video_path, frame_times)
         print(f"  Extracted {len(frame_paths)} frames")
+        frame_paths = rank_frame_files(frame_paths)
+        print(f"  Kept {len(frame_paths)} best frames")
 
-        # 6. Upload to Cloudinary
+        # 7. Upload to Cloudinary
         print("  Uploading to Cloudinary...")
         temp_wine_id = hashlib.md5(f"{tiktok_url}_{wine_name}".encode()).hexdigest()[:16]
 
         image_urls = []
-        for j, frame_path in enumerate(frame_paths):
-            url = upload_wine_image(frame_path, temp_wine_id, j)
+        uploaded = get_uploader().upload_wine_images(frame_paths, temp_wine_id, new_wine=True)
+        for j, url in enumerate(uploaded):
             if url:
                 image_urls.append(url)
                 print(f"    Uploaded frame {j+1}/{len(frame_paths)}")
@@ -147,7 +154,7 @@ def process_url(tiktok_url: str) -> int:
             print("  No images uploaded, skipping wine")
             continue
 
-        # 7. Append to wines list
+        # 8. Append to wines list
         wine_id = uuid.uuid4().hex[:24]
         wine_entry = {
             "id": wine_id,
@@ -0,0 +1,71 @@
+"""
+Benchmark frame extraction: one ffmpeg process per frame vs batched.
+
+Extracts the usual six frames (get_optimal_frame_times around a mention, and
+get_fallback_frame_times) from a local video with each strategy in
+app/services/frame_extractor.py and checks the batched files are identical
+to the per-frame ones.
+
+Usage:
+  python scripts/dev/bench_frame_extraction.py <video_path> [duration_seconds] [mention_seconds] [rounds]
+"""
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.services.frame_extractor import extract_frame, extract_frames_batch, extract_frames_to_bytes
+from app.services.wine_timing import get_optimal_frame_times, get_fallback_frame_times
+
+
+def per_frame(video_path, timestamps, out_dir):
+    paths = [str(out_dir / f"single_{i}.jpg") for i in range(len(timestamps))]
+    for t, p in zip(timestamps, paths):
+        extract_frame(video_path, t, p)
+    return [Path(p).read_bytes() for p in paths]
+
+
+def batch(video_path, timestamps, out_dir):
+    paths = [str(out_dir / f"batch_{i}.jpg") for i in range(len(timestamps))]
+    extract_frames_batch(video_path, timestamps, paths)
+    return [Path(p).read_bytes() for p in paths]
+
+
+def timed(fn, rounds):
+    best = float("inf")
+    result = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, result
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    video_path = sys.argv[1]
+    duration = float(sys.argv[2]) if len(sys.argv) > 2 else 30.0
+    mention = float(sys.argv[3]) if len(sys.argv) > 3 else 10.0
+    rounds = int(sys.argv[4]) if len(sys.argv) > 4 else 3
+
+    out_dir = Path(tempfile.mkdtemp())
+    cases = {
+        "mention": get_optimal_frame_times(mention, duration),
+        "fallback": get_fallback_frame_times(duration),
+    }
+    print(f"{'case':<9} {'per-frame':>10} {'batch':>9} {'bytes':>9} {'keyframes':>10}  identical")
+    for name, timestamps in cases.items():
+        slow, single = timed(lambda: per_frame(video_path, timestamps, out_dir), rounds)
+        fast, batched = timed(lambda: batch(video_path, timestamps, out_dir), rounds)
+        piped, _ = timed(lambda: extract_frames_to_bytes(video_path, timestamps), rounds)
+        keys, _ = timed(lambda: extract_frames_to_bytes(video_path, timestamps, keyframes_only=True), rounds)
+        print(f"{name:<9} {slow:>8.0f}ms {fast:>7.0f}ms {piped:>7.0f}ms {keys:>8.0f}ms  {single == batched}")
+
+
+if __name__ == "__main__":
+    main()
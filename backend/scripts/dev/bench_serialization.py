@@ -0,0 +1,102 @@
+"""
+Benchmark wine list serialization: Pydantic/jsonable_encoder vs fast path.
+
+Compares the per-row WineResponse + jsonable_encoder + JSONResponse path the
+routers used to take against app/api/serialization.py on synthetic Mongo
+documents, and checks both produce identical bytes.
+
+Usage:
+  python scripts/dev/bench_serialization.py [rounds]
+"""
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.models import WineResponse
+from app.api.serialization import encode_wine_documents, dumps
+from app.services.wine_cache import serialize_wine
+
+SIZES = [100, 1000, 10000]
+
+
+def make_docs(n: int) -> list:
+    base = datetime(2025, 1, 1, 12, 0, 0)
+    supermarkets = ["Albert Heijn", "Jumbo", "LIDL", "ALDI", "Plus"]
+    types = ["red", "white", "rose", "sparkling"]
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Côtes du Rhône Villages {i}",
+            "supermarket": supermarkets[i % len(supermarkets)],
+            "wine_type": types[i % len(types)],
+            "image_urls": [f"https://res.cloudinary.com/demo/image/upload/vinly/wines/{i}_{j}.jpg" for j in range(6)],
+            "rating": "fruitig en fris",
+            "description": "Soepele rode wijn met fijne kruidigheid en zacht fruit, goede prijs-kwaliteit",
+            "influencer_source": "pepijn.wijn_tiktok",
+            "post_url": f"https://www.tiktok.com/@pepijn.wijn/video/{7000000000000000000 + i}",
+            "date_found": base - timedelta(minutes=i, microseconds=i),
+            "in_stock": None,
+            "last_checked": None,
+        }
+        for i in range(n)
+    ]
+
+
+def pydantic_path(docs: list) -> bytes:
+    wines = [
+        WineResponse(
+            id=str(w["_id"]),
+            name=w["name"],
+            supermarket=w["supermarket"],
+            wine_type=w["wine_type"],
+            image_url=w.get("image_url"),
+            image_urls=w.get("image_urls"),
+            rating=w.get("rating"),
+            influencer_source=w["influencer_source"],
+            post_url=w["post_url"],
+            date_found=w["date_found"],
+            in_stock=w.get("in_stock"),
+            description=w.get("description")
+        )
+        for w in docs
+    ]
+    return JSONResponse(jsonable_encoder(wines)).body
+
+
+def read_model_path(rows: list) -> bytes:
+    return dumps(rows)
+
+
+def timed(fn, arg, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'wines':>7} {'pydantic':>11} {'fast docs':>11} {'read model':>11} {'speedup':>8}")
+    for n in SIZES:
+        docs = make_docs(n)
+        rows = [serialize_wine(d) for d in docs]
+
+        assert pydantic_path(docs) == encode_wine_documents(docs), "fast path output differs"
+        assert pydantic_path(docs) == read_model_path(rows), "read model output differs"
+
+        slow = timed(pydantic_path, docs, rounds)
+        fast = timed(encode_wine_documents, docs, rounds)
+        cached = timed(read_model_path, rows, rounds)
+        print(f"{n:>7} {slow:>9.2f}ms {fast:>9.2f}ms {cached:>9.2f}ms {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
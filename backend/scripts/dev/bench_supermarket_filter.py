@@ -0,0 +1,92 @@
+"""
+Benchmark the supermarket pre-filter on stored captions.
+
+Loads captions from processed_videos and compares the old per-caption
+keyword scan (substring `any()` over every alias plus the Plus regexes) with
+the compiled filter in app/utils/supermarket_filter.py: throughput and the
+captions on which the two disagree (word boundaries make the compiled filter
+stricter, e.g. "ah" inside "yeah").
+
+Usage:
+  python scripts/dev/bench_supermarket_filter.py [limit] [rounds]
+"""
+import asyncio
+import re
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.utils.config_loader import config
+
+
+def legacy_is_supermarket(caption: str) -> bool:
+    """The keyword scan smart_scraper.is_supermarket_video used to do per caption."""
+    caption_lower = caption.lower()
+    supermarket_keywords = config.get_all_supermarket_keywords()
+    non_plus_keywords = [k for k in supermarket_keywords if k.lower() != 'plus']
+    has_non_plus_sm = any(k.lower() in caption_lower for k in non_plus_keywords)
+    has_plus_cs_word = bool(re.search(r"\b(Plus|PLUS)\b", caption))
+    has_plus_cs_hashtag = ('#Plus' in caption) or ('#PLUS' in caption)
+    has_supermarket_hashtag = any(tag in caption_lower for tag in ['#supermarktwijn', '#supermarkt'])
+    return has_non_plus_sm or has_plus_cs_word or has_plus_cs_hashtag or has_supermarket_hashtag
+
+
+def compiled_is_supermarket(caption: str) -> bool:
+    return config.supermarket_filter.search(caption) is not None
+
+
+def time_filter(fn, captions: list, rounds: int) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for caption in captions:
+            fn(caption)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_benchmark(captions: list, rounds: int = 5) -> None:
+    total_chars = sum(len(c) for c in captions)
+    print(f"Captions: {len(captions)} ({total_chars / 1e3:.0f}k chars), best of {rounds} rounds")
+    print()
+    results = {}
+    for label, fn in [("legacy keyword scan", legacy_is_supermarket), ("compiled filter", compiled_is_supermarket)]:
+        elapsed = time_filter(fn, captions, rounds)
+        results[label] = elapsed
+        rate = len(captions) / elapsed if elapsed else float("inf")
+        print(f"  {label:<20} {elapsed * 1000:8.1f} ms  {rate:12,.0f} captions/s  {total_chars / elapsed / 1e6:6.1f} MB/s")
+    speedup = results["legacy keyword scan"] / max(results["compiled filter"], 1e-9)
+    print(f"\n  Speedup: {speedup:.1f}x")
+
+    disagreements = [c for c in captions if legacy_is_supermarket(c) != compiled_is_supermarket(c)]
+    passed = sum(1 for c in captions if compiled_is_supermarket(c))
+    print(f"\nCompiled filter passes {passed}/{len(captions)} captions; {len(disagreements)} differ from the legacy scan")
+    for caption in disagreements[:10]:
+        match = config.supermarket_filter.search(caption)
+        legacy = legacy_is_supermarket(caption)
+        clean = caption.encode('ascii', 'ignore').decode('ascii').replace('\n', ' ')
+        print(f"  legacy={'pass' if legacy else 'skip'} compiled={match.alias if match else 'skip'}: {clean[:100]}")
+
+
+async def main(limit: int, rounds: int) -> None:
+    client = AsyncIOMotorClient(settings.mongodb_uri)
+    db = client.vinly
+    captions = []
+    async for doc in db.processed_videos.find({"caption": {"$nin": [None, ""]}}, {"caption": 1}).limit(limit):
+        captions.append(doc["caption"])
+    client.close()
+
+    if not captions:
+        print("No captions found in processed_videos.")
+        return
+    run_benchmark(captions, rounds)
+
+
+if __name__ == "__main__":
+    limit = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(limit, rounds))
@@ -21,9 +21,11 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
 from app.services.video_downloader import TikTokVideoDownloader
-from app.services.wine_timing import find_wine_mention_timestamp, get_optimal_frame_times, get_fallback_frame_times
-from app.services.frame_extractor import extract_frame, select_best_frame
-from app.services.cloudinary_upload import upload_wine_image
+from app.services.wine_timing import find_wine_mention_timestamp
+from app.services.frame_sampling import candidate_frame_times
+from app.services.frame_extractor import extract_frames_at_times
+from app.services.frame_scoring import rank_frame_files
+from app.services.cloudinary_upload import get_uploader
 
 
 async def enrich_wine_images(username: str = None, limit: int = None):
@@ -67,10 +69,6 @@ async def enrich_wine_images(username: str = None, limit: int = None):
         images_dir = Path(__file__).parent.parent / "static" / "wine_images"
         images_dir.mkdir(parents=True, exist_ok=True)
         
-        # Create temp frames directory
-        frames_dir = Path(__file__).parent.parent / "temp" / "frames"
-        frames_dir.mkdir(parents=True, exist_ok=True)
-        
         downloader = TikTokVideoDownloader()
         
         success_count = 0
@@ -108,10 +106,8 @@ async def enrich_wine_images(username: str = None, limit: int = None):
                 
                 if mention_time is not None:
                     print(f"  Found wine mention at {mention_time:.1f}s")
-                    frame_times = get_optimal_frame_times(mention_time, duration)
                 else:
-                    print(f"  Wine not found in transcript, using fallback times")
-                    frame_times = get_fallback_frame_times(duration)
+                    print(f"  Wine not found in transcript, scanning whole video")
                 
                 # Download full video
                 video_path = downloader.download_full_video(video_url)
@@ -121,21 +117,13 @@ async def enrich_wine_images(username: str = None, limit: int = None):
                     failed_count += 1
                     continue
                 
-                # Extract frames at optimal times
-                extracted_frames = []
-                for idx, timestamp in enumerate(frame_times):
-                    frame_path = frames_dir / f"{wine_id}_{idx}.jpg"
-                    if extract_frame(video_path, timestamp, str(frame_path)):
-                        extracted_frames.append(str(frame_path))
-                
+                # Extract frames at stable, distinct shots
+                frame_times = candidate_frame_times(video_path, mention_time, duration)
+                extracted_frames = extract_frames_at_times(video_path, frame_times)
                 print(f"  Extracted {len(extracted_frames)} frames")
                 
-                # Select all valid frames (up to 6)
-                valid_frames = []
-                for frame_path in extracted_frames:
-                    p = Path(frame_path)
-                    if p.exists() and p.stat().st_size > 10000:  # > 10KB
-                        valid_frames.append(frame_path)
+                # Best distinct frames by sharpness/exposure/colour
+                valid_frames = rank_frame_files(extracted_frames)
                 
                 if not valid_frames:
                     print("  [FAIL] No valid frames extracted")
@@ -146,8 +134,8 @@ async def enrich_wine_images(username: str = None, limit: int = None):
                 # Upload frames to Cloudinary and collect CDN URLs
                 print(f"  [UPLOAD] Uploading {len(valid_frames)} images to Cloudinary...")
                 saved_image_urls = []
-                for idx, frame_path in enumerate(valid_frames):
-                    cdn_url = upload_wine_image(Path(frame_path), wine_id, idx)
+                uploaded = get_uploader().upload_wine_images(valid_frames, wine_id)
+                for idx, cdn_url in enumerate(uploaded):
                     if cdn_url:
                         saved_image_urls.append(cdn_url)
                         print(f"    ✓ Image {idx+1}/{len(valid_frames)} uploaded")
@@ -168,8 +156,10 @@ async def enrich_wine_images(username: str = None, limit: int = None):
                 # Update wine with image URLs array
                 await db.wines.update_one(
                     {"_id": wine['_id']},
-                    {"$set": {"image_urls": saved_image_urls}}
+                    {"$set": {"image_urls": saved_image_urls}, "$currentDate": {"updated_at": True}}
                 )
+                # Old uploads under this wine's id are no longer referenced
+                get_uploader().delete_superseded(wine_id, saved_image_urls)
                 
                 print(f"  [SUCCESS] Saved {len(saved_image_urls)} images")
                 success_count += 1
@@ -5,6 +5,14 @@ This script finds videos that:
 - Have been transcribed (transcription_status = success)
 - Are wine content (passed supermarket filter)
 - Extracts wine data using caption + transcription
+
+Videos that already have a wine (by post_url) are skipped before any LLM
+call. The rest are sent several per request (extract_wines_batch); the batch
+size defaults to gpt.batch_size in config/scraping_settings.yaml.
+
+Usage:
+  python scripts/extract_wines.py [username] [--batch-size N]
+  (--batch-size 1 sends one request per video)
 """
 import asyncio
 import sys
@@ -15,15 +23,16 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
-from app.services.wine_extractor import extract_wines_from_caption_and_transcription
+from app.services.wine_extractor import extract_wines_batch
 
 
-async def extract_wines(username: str = None):
+async def extract_wines(username: str = None, batch_size: int = None):
     """
     Extract wines from transcribed videos
     
     Args:
         username: Optional - only process this TikTok user
+        batch_size: Videos per LLM request (default: gpt.batch_size)
     """
     
     print("\n" + "="*70)
@@ -58,16 +67,37 @@ async def extract_wines(username: str = None):
         return
     
     print(f"Found {total} videos with transcriptions")
+    
+    # One wine per video: skip videos that already have one before paying for extraction
+    video_urls = [v.get("video_url") for v in transcribed_videos if v.get("video_url")]
+    existing_urls = set()
+    async for wine in db.wines.find({"post_url": {"$in": video_urls}}, {"post_url": 1}):
+        existing_urls.add(wine["post_url"])
+    if existing_urls:
+        transcribed_videos = [v for v in transcribed_videos if v.get("video_url") not in existing_urls]
+        print(f"Skipping {total - len(transcribed_videos)} videos that already have a wine")
+        total = len(transcribed_videos)
+    
     print()
     print("="*70)
     
+    # Extract wines using caption + transcription, several videos per request
+    results = extract_wines_batch([
+        {
+            "id": str(i),
+            "caption": video.get("caption", "") or "",
+            "transcription": video.get("transcription", "") or "",
+        }
+        for i, video in enumerate(transcribed_videos, 1)
+    ], batch_size=batch_size)
+    
     wines_added = 0
     
     for i, video in enumerate(transcribed_videos, 1):
         video_url = video.get("video_url")
         video_id = video_url.split('/')[-1] if video_url else "unknown"
-        caption = video.get("caption", "")
-        transcription = video.get("transcription", "")
+        caption = video.get("caption", "") or ""
+        transcription = video.get("transcription", "") or ""
         
         print(f"\n{i}/{total}. Video: {video_id}")
         
@@ -75,8 +105,7 @@ async def extract_wines(username: str = None):
         print(f"    Caption: {caption_clean[:60]}...")
         print(f"    Transcription: {len(transcription)} characters")
         
-        # Extract wines using caption + transcription
-        wines = extract_wines_from_caption_and_transcription(caption, transcription)
+        wines = results.get(str(i), [])
         
         if wines:
             print(f"    Found {len(wines)} wine(s)!")
@@ -126,6 +155,12 @@ async def extract_wines(username: str = None):
 
 
 if __name__ == "__main__":
-    username = sys.argv[1] if len(sys.argv) > 1 else None
-    asyncio.run(extract_wines(username))
+    args = sys.argv[1:]
+    batch_size = None
+    if "--batch-size" in args:
+        idx = args.index("--batch-size")
+        batch_size = int(args[idx + 1])
+        del args[idx:idx + 2]
+    username = args[0] if args else None
+    asyncio.run(extract_wines(username, batch_size))
 
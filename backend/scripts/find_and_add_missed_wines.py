@@ -25,9 +25,11 @@ from app.scrapers.tiktok_oembed_scraper import TikTokOEmbedScraper
 from app.services.video_downloader import TikTokVideoDownloader
 from app.services.transcription import transcribe_video_audio
 from app.services.wine_extractor import extract_wines_from_caption_and_transcription
-from app.services.wine_timing import find_wine_mention_with_signal, get_optimal_frame_times, get_fallback_frame_times
+from app.services.wine_timing import find_wine_mention_with_signal
+from app.services.frame_sampling import candidate_frame_times
 from app.services.frame_extractor import extract_frames_at_times
-from app.services.cloudinary_upload import upload_wine_image
+from app.services.frame_scoring import rank_frame_files
+from app.services.cloudinary_upload import get_uploader
 import hashlib
 
 
@@ -136,21 +138,14 @@ async def process_single_url(tiktok_url: str, db, dry_run: bool = False):
         author = video_data.get("author_name", "unknown")
         print(f"  ✓ Video by @{author}")
         
-        # 2. Download video (both audio for transcription and full video for frames)
+        # 2. Download video once (audio for transcription is derived from it)
         downloader = TikTokVideoDownloader()
         
-        # Download audio for transcription
-        audio_result = downloader.download_video_audio(tiktok_url)
-        if not audio_result:
-            print("  ❌ Failed to download audio")
-            return 0
-        audio_path, post_date = audio_result
-        
-        # Download full video for frame extraction
-        video_path = downloader.download_full_video(tiktok_url)
-        if not video_path:
+        media = downloader.acquire_media(tiktok_url)
+        if not media:
             print("  ❌ Failed to download video")
             return 0
+        audio_path, video_path = media["audio_path"], media["video_path"]
         
         # 3. Transcribe audio
         print("  🎤 Transcribing...")
@@ -187,28 +182,23 @@ async def process_single_url(tiktok_url: str, db, dry_run: bool = False):
             wine_name = wine_data["name"]
             timestamp, method = find_wine_mention_with_signal(wine_name, segments)
             
+            video_duration = segments[-1]['end'] if segments else 30.0
+            frame_times = candidate_frame_times(video_path, timestamp or None, video_duration)
             if timestamp:
-                video_duration = segments[-1]['end'] if segments else 30.0
-                frame_times = get_optimal_frame_times(timestamp, video_duration)
                 print(f"  🔍 Found wine mention at {timestamp:.1f}s using: {method}")
             else:
-                video_duration = segments[-1]['end'] if segments else 30.0
-                frame_times = get_fallback_frame_times(video_duration)
-                print(f"  🔍 Using fallback frame times")
+                print(f"  🔍 Wine not mentioned, sampling shots across the video")
             
             # Extract frames
             print(f"  📸 Extracting {len(frame_times)} frames...")
-            frame_paths = extract_frames_at_times(video_path, frame_times)
+            frame_paths = rank_frame_files(extract_frames_at_times(video_path, frame_times))
             
             # Upload to Cloudinary
             print(f"  ☁️  Uploading to Cloudinary...")
             temp_wine_id = hashlib.md5(f"{tiktok_url}_{wine_data['name']}".encode()).hexdigest()[:16]
             
-            image_urls = []
-            for i, frame_path in enumerate(frame_paths):
-                cloudinary_url = upload_wine_image(frame_path, temp_wine_id, i)
-                if cloudinary_url:
-                    image_urls.append(cloudinary_url)
+            uploaded = get_uploader().upload_wine_images(frame_paths, temp_wine_id, new_wine=True)
+            image_urls = [url for url in uploaded if url]
             
             if not image_urls:
                 print(f"  ❌ No images uploaded")
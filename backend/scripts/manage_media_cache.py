@@ -0,0 +1,98 @@
+"""
+Inspect and prune the persistent media cache of downloaded TikTok audio/video.
+
+Usage:
+    python scripts/manage_media_cache.py stats
+    python scripts/manage_media_cache.py prune [max_mb]   # default: configured budget
+    python scripts/manage_media_cache.py verify           # re-check sha256 of every entry
+    python scripts/manage_media_cache.py transcripts [clear]  # transcription cache stats / wipe
+    python scripts/manage_media_cache.py extractions [invalidate <prompt_version> | clear]
+                                                          # LLM extraction cache stats / drop entries
+"""
+import sys
+import os
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.media_cache import get_media_cache, _sha256
+from app.services.transcription_cache import get_transcription_cache
+from app.services.extraction_cache import get_extraction_cache
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def stats():
+    cache = get_media_cache()
+    s = cache.stats()
+    print(f"Media cache: {s['root']}")
+    print(f"  Entries: {s['entries']}  Size: {_mb(s['bytes'])} / {_mb(s['max_bytes'])}")
+    for fmt, entry in sorted(s["by_format"].items()):
+        print(f"  {fmt:<6} {entry['entries']:>6} entries  {_mb(entry['bytes'])}")
+
+
+def prune(max_mb=None):
+    cache = get_media_cache()
+    evicted = cache.prune(int(max_mb) * 1024 * 1024 if max_mb is not None else None)
+    print(f"Evicted {len(evicted)} entries")
+    stats()
+
+
+def verify():
+    cache = get_media_cache()
+    manifest = cache._load()
+    bad = 0
+    for key, entry in manifest.items():
+        path = Path(cache.root) / entry["file"]
+        if not path.exists():
+            print(f"  [MISSING] {key}")
+            bad += 1
+        elif _sha256(path) != entry.get("sha256"):
+            print(f"  [CHECKSUM] {key}")
+            bad += 1
+    print(f"Verified {len(manifest)} entries, {bad} problem(s)")
+
+
+def transcripts(action=None):
+    cache = get_transcription_cache()
+    if action == "clear":
+        print(f"Removed {cache.clear()} cached transcripts")
+    s = cache.stats()
+    print(f"Transcription cache: {s['root']}")
+    print(f"  Entries: {s['entries']}  Size: {_mb(s['bytes'])}")
+
+
+def extractions(action=None, prompt_version=None):
+    from app.services.wine_extractor import BATCH_PROMPT_VERSION, PROMPT_VERSION
+    cache = get_extraction_cache()
+    if action == "invalidate":
+        if not prompt_version:
+            print("Usage: extractions invalidate <prompt_version>")
+            sys.exit(1)
+        print(f"Removed {cache.invalidate(prompt_version)} cached extractions for prompt {prompt_version}")
+    elif action == "clear":
+        print(f"Removed {cache.clear()} cached extractions")
+    s = cache.stats()
+    print(f"Extraction cache: {s['root']} (current prompt versions: {PROMPT_VERSION}, {BATCH_PROMPT_VERSION})")
+    print(f"  Entries: {s['entries']}  Size: {_mb(s['bytes'])}")
+    for version, count in sorted(s["by_prompt_version"].items()):
+        print(f"  {version:<12} {count:>6} entries")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        stats()
+    elif command == "prune":
+        prune(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif command == "verify":
+        verify()
+    elif command == "transcripts":
+        transcripts(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif command == "extractions":
+        extractions(*sys.argv[2:4])
+    else:
+        print(__doc__)
+        sys.exit(1)
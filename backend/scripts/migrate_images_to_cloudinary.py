@@ -10,7 +10,7 @@ from motor.motor_asyncio import AsyncIOMotorClient
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.config import settings
-from app.services.cloudinary_upload import upload_wine_image
+from app.services.cloudinary_upload import get_uploader
 
 
 async def migrate_images():
@@ -31,6 +31,9 @@ async def migrate_images():
     skipped = 0
     errors = 0
     
+    # Collect every local image first, then upload them all concurrently
+    wines = []
+    jobs = []
     async for wine in db.wines.find({}):
         wine_id = str(wine['_id'])
         wine_name = wine.get('name', 'Unknown')
@@ -41,16 +44,13 @@ async def migrate_images():
             skipped += 1
             continue
         
-        print(f"\n🍷 Processing: {wine_name}")
-        new_image_urls = []
-        
-        # Process each image for this wine
+        # Per image: the URL to keep, or the index into `jobs` of its upload
+        slots = []
         for idx, old_url in enumerate(old_image_urls):
             # Extract filename from URL (handle both absolute and relative paths)
             if old_url.startswith('http'):
                 # Already a CDN URL, skip
-                print(f"  ⏭️  Image {idx}: Already on CDN")
-                new_image_urls.append(old_url)
+                slots.append(old_url)
                 continue
             
             # Local path - need to migrate
@@ -58,29 +58,40 @@ async def migrate_images():
             local_path = images_dir / filename
             
             if not local_path.exists():
-                print(f"  ⚠️  Image {idx}: File not found: {filename}")
+                print(f"  ⚠️  {wine_name} image {idx}: File not found: {filename}")
                 errors += 1
                 continue
             
-            # Upload to Cloudinary
-            print(f"  ⬆️  Uploading image {idx}: {filename}...")
-            cdn_url = upload_wine_image(local_path, wine_id, idx)
-            
+            slots.append(len(jobs))
+            jobs.append((local_path, wine_id, idx))
+        wines.append((wine, slots))
+    
+    uploader = get_uploader()
+    print(f"⬆️  Uploading {len(jobs)} images with {uploader.workers} workers...")
+    results = uploader.upload_batch(jobs)
+    
+    for wine, slots in wines:
+        old_image_urls = wine.get('image_urls', [])
+        new_image_urls = []
+        for slot in slots:
+            if isinstance(slot, str):
+                new_image_urls.append(slot)
+                continue
+            cdn_url = results[slot]
             if cdn_url:
                 new_image_urls.append(cdn_url)
                 migrated += 1
-                print(f"  ✅ Uploaded: {cdn_url}")
             else:
                 errors += 1
-                print(f"  ❌ Failed to upload: {filename}")
+                print(f"  ❌ Failed to upload: {jobs[slot][0].name} ({wine.get('name', 'Unknown')})")
         
         # Update wine with CDN URLs if we have any new URLs
         if new_image_urls and new_image_urls != old_image_urls:
             await db.wines.update_one(
                 {'_id': wine['_id']},
-                {'$set': {'image_urls': new_image_urls}}
+                {'$set': {'image_urls': new_image_urls}, '$currentDate': {'updated_at': True}}
             )
-            print(f"  💾 Updated wine in database with {len(new_image_urls)} CDN URLs")
+            print(f"  💾 {wine.get('name', 'Unknown')}: {len(new_image_urls)} CDN URLs")
     
     print(f"\n" + "="*60)
     print(f"✅ Migration complete!")
@@ -88,6 +99,7 @@ async def migrate_images():
     print(f"  - Images migrated: {migrated}")
     print(f"  - Wines skipped: {skipped}")
     print(f"  - Errors: {errors}")
+    print(f"  - Uploads: {uploader.latency_summary()}")
     print("="*60)
     
     client.close()
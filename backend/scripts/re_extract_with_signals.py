@@ -22,9 +22,11 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from app.config import settings
 from app.services.transcription import transcribe_video_audio
 from app.services.video_downloader import TikTokVideoDownloader
-from app.services.wine_timing import find_wine_mention_with_signal, get_optimal_frame_times, get_fallback_frame_times
-from app.services.frame_extractor import extract_frame, select_best_frame
-from app.services.cloudinary_upload import upload_wine_image
+from app.services.wine_timing import find_wine_mention_with_signal
+from app.services.frame_sampling import candidate_frame_times
+from app.services.frame_extractor import extract_frames_at_times
+from app.services.frame_scoring import rank_frame_files
+from app.services.cloudinary_upload import get_uploader
 import logging
 
 logging.basicConfig(
@@ -80,16 +82,16 @@ async def re_extract_wine_images(limit: int = None, dry_run: bool = False):
             continue
         
         try:
-            # Step 1: Download audio for transcription
-            logger.info("Step 1: Downloading audio...")
-            result = downloader.download_video_audio(post_url)
+            # Step 1: Download the video once; the ASR audio is decoded from it
+            logger.info("Step 1: Downloading video...")
+            media = downloader.acquire_media(post_url)
             
-            if not result:
-                logger.error("Failed to download audio")
+            if not media:
+                logger.error("Failed to download video")
                 failed += 1
                 continue
             
-            audio_path, _ = result  # Unpack tuple (audio_path, video_path)
+            audio_path, video_path = media["audio_path"], media["video_path"]
             
             # Step 2: Transcribe with Whisper
             logger.info("Step 2: Transcribing audio...")
@@ -98,6 +100,7 @@ async def re_extract_wine_images(limit: int = None, dry_run: bool = False):
             if not transcription_result:
                 logger.error("Failed to transcribe")
                 downloader.cleanup_audio_file(audio_path)
+                downloader.cleanup_video_file(video_path)
                 failed += 1
                 continue
             
@@ -112,49 +115,30 @@ async def re_extract_wine_images(limit: int = None, dry_run: bool = False):
             
             if mention_time:
                 logger.info(f"✨ Found wine at {mention_time:.1f}s (method: {match_method})")
-                
-                # Check if this is better than before (has signal word)
                 if match_method and 'signal' in match_method:
                     logger.info(f"⭐ IMPROVED DETECTION! Using signal word match")
-                    frame_times = get_optimal_frame_times(mention_time, duration)
                 else:
                     logger.info(f"Standard detection (no signal word)")
-                    frame_times = get_optimal_frame_times(mention_time, duration)
             else:
                 logger.warning("Wine not found, using fallback")
-                frame_times = get_fallback_frame_times(duration)
             
-            logger.info(f"Frame times: {[f'{t:.1f}s' for t in frame_times]}")
+            # Step 4: Plan frame times around the actual shots
+            frame_times = candidate_frame_times(video_path, mention_time or None, duration)
+            logger.info(f"Scene-aware frame times: {[f'{t:.1f}s' for t in frame_times]}")
             
             if dry_run:
                 logger.info("DRY RUN - Would extract frames and upload")
                 downloader.cleanup_audio_file(audio_path)
-                continue
-            
-            # Step 4: Download full video
-            logger.info("Step 4: Downloading full video...")
-            video_path = downloader.download_full_video(post_url)
-            
-            if not video_path:
-                logger.error("Failed to download video")
-                downloader.cleanup_audio_file(audio_path)
-                failed += 1
+                downloader.cleanup_video_file(video_path)
                 continue
             
             # Step 5: Extract frames
             logger.info("Step 5: Extracting frames...")
-            temp_dir = Path(__file__).parent.parent / "temp" / "re_extraction"
-            temp_dir.mkdir(parents=True, exist_ok=True)
-            
-            extracted_frames = []
-            for frame_idx, timestamp in enumerate(frame_times):
-                frame_path = temp_dir / f"{wine_id}_{frame_idx}.jpg"
-                if extract_frame(video_path, timestamp, str(frame_path)):
-                    extracted_frames.append(str(frame_path))
-                    size_kb = frame_path.stat().st_size / 1024
-                    logger.info(f"  Frame {frame_idx+1}: {timestamp:.1f}s ({size_kb:.1f}KB)")
-            
-            if not extracted_frames:
+            extracted_frames = extract_frames_at_times(video_path, frame_times)
+            # Rank by sharpness/exposure/colour and drop near-duplicates
+            best_frames = rank_frame_files(extracted_frames)
+            
+            if not best_frames:
                 logger.error("No frames extracted")
                 downloader.cleanup_audio_file(audio_path)
                 downloader.cleanup_video_file(video_path)
@@ -162,11 +146,11 @@ async def re_extract_wine_images(limit: int = None, dry_run: bool = False):
                 continue
             
             # Step 6: Upload to Cloudinary
-            logger.info(f"Step 6: Uploading {len(extracted_frames)} frames to Cloudinary...")
+            logger.info(f"Step 6: Uploading {len(best_frames)}/{len(extracted_frames)} frames to Cloudinary...")
             cloudinary_urls = []
             
-            for frame_idx, frame_path in enumerate(extracted_frames):
-                url = upload_wine_image(Path(frame_path), wine_id, frame_idx)
+            uploaded = get_uploader().upload_wine_images(best_frames, wine_id)
+            for frame_idx, url in enumerate(uploaded):
                 if url:
                     cloudinary_urls.append(url)
                     logger.info(f"  Uploaded frame {frame_idx+1}: {url[:60]}...")
@@ -184,8 +168,10 @@ async def re_extract_wine_images(limit: int = None, dry_run: bool = False):
             logger.info(f"Step 7: Updating wine with {len(cloudinary_urls)} new images...")
             await wines_collection.update_one(
                 {"_id": wine['_id']},
-                {"$set": {"image_urls": cloudinary_urls}}
+                {"$set": {"image_urls": cloudinary_urls}, "$currentDate": {"updated_at": True}}
             )
+            # Old uploads under this wine's id are no longer referenced
+            get_uploader().delete_superseded(wine_id, cloudinary_urls)
             
             logger.info(f"✅ SUCCESS! Replaced {len(wine.get('image_urls', []))} old images with {len(cloudinary_urls)} new images")
             improved += 1
@@ -207,6 +193,8 @@ async def re_extract_wine_images(limit: int = None, dry_run: bool = False):
     logger.info(f"  Failed: {failed}")
     logger.info(f"  Skipped: {skipped}")
     logger.info(f"  Total: {len(wines)}")
+    if not dry_run:
+        logger.info(f"  Uploads: {get_uploader().latency_summary()}")
     
     client.close()
 
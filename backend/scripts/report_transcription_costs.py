@@ -50,18 +50,23 @@ async def report_transcription_costs():
     
     # Calculate costs
     total_duration = 0
+    billed_duration = 0
     videos_with_duration = 0
     
     async for video in db.processed_videos.find({"transcription_status": "success"}):
         if "audio_duration_seconds" in video:
             total_duration += video["audio_duration_seconds"]
             videos_with_duration += 1
+            # Local ASR (asr.provider: local) has no per-minute cost
+            version = (video.get("asr_metrics") or {}).get("version", "")
+            if not version.startswith("faster-whisper"):
+                billed_duration += video["audio_duration_seconds"]
     
     total_minutes = total_duration / 60
     total_hours = total_duration / 3600
     
-    # Whisper cost: $0.006 per minute
-    whisper_cost = total_minutes * 0.006
+    # Whisper API cost: $0.006 per minute
+    whisper_cost = billed_duration / 60 * 0.006
     
     # GPT cost: $0.001 per video (approximate)
     gpt_cost = successful * 0.001
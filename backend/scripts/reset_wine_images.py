@@ -15,7 +15,7 @@ async def main():
     
     result = await db.wines.update_many(
         {},
-        {"$unset": {"image_urls": "", "image_url": ""}}
+        {"$unset": {"image_urls": "", "image_url": ""}, "$currentDate": {"updated_at": True}}
     )
     
     print(f"Reset images for {result.modified_count} wines")
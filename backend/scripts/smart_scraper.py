@@ -8,7 +8,6 @@ Smart TikTok Wine Scraper
 import asyncio
 import sys
 import os
-import re
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
@@ -16,7 +15,7 @@ from playwright.async_api import async_playwright
 from motor.motor_asyncio import AsyncIOMotorClient
 from datetime import datetime, timezone
 from app.config import settings
-from app.scrapers.tiktok_oembed_scraper import TikTokOEmbedScraper
+from app.scrapers.oembed_client import OEmbedClient
 from app.utils.config_loader import config
 
 
@@ -37,27 +36,9 @@ def is_supermarket_video(caption: str) -> bool:
     if not caption or len(caption) < min_length:
         return False
     
-    caption_lower = caption.lower()
-    caption_raw = caption
-    
-    # Check for ANY supermarket keywords (from YAML config)
-    supermarket_keywords = config.get_all_supermarket_keywords()
-    
-    # Special handling for ambiguous 'plus': only accept case-sensitive 'Plus' or 'PLUS'
-    non_plus_keywords = [k for k in supermarket_keywords if k.lower() != 'plus']
-    has_non_plus_sm = any(k.lower() in caption_lower for k in non_plus_keywords)
-    
-    # Case-sensitive check for Plus/PLUS as a standalone word or hashtag
-    has_plus_cs_word = bool(re.search(r"\b(Plus|PLUS)\b", caption_raw))
-    has_plus_cs_hashtag = ('#Plus' in caption_raw) or ('#PLUS' in caption_raw)
-    has_plus_ok = has_plus_cs_word or has_plus_cs_hashtag
-    
-    # Also check general supermarket hashtags (case-insensitive)
-    supermarket_hashtags = ['#supermarktwijn', '#supermarkt']
-    has_supermarket_hashtag = any(tag in caption_lower for tag in supermarket_hashtags)
-    
-    # Return True if ANY valid supermarket mention found
-    return has_non_plus_sm or has_plus_ok or has_supermarket_hashtag
+    # ANY supermarket alias or general keyword (supermarkets.yaml), matched by the
+    # compiled pre-filter: word boundaries, hashtags, and case-sensitive Plus/PLUS
+    return config.supermarket_filter.search(caption) is not None
 
 
 async def get_new_video_urls(username: str, db):
@@ -190,8 +171,8 @@ async def process_videos_smart(username: str, video_urls: list, db):
     print()
     
     # Scrape video data
-    scraper = TikTokOEmbedScraper()
-    videos = scraper.scrape_profile_videos(username, video_urls)
+    async with OEmbedClient(db) as scraper:
+        videos = await scraper.scrape_profile_videos(username, video_urls)
     
     # Stats
     wine_videos = 0
@@ -113,11 +113,10 @@ async def test_filter_on_real_data():
         caption_clean = caption.encode('ascii', 'ignore').decode('ascii')
         print(f"\n{i}. {caption_clean[:100]}...")
         
-        # Show which keyword matched
-        caption_lower = caption.lower()
-        matched_keywords = [kw for kw in supermarket_keywords if kw.lower() in caption_lower]
-        if matched_keywords:
-            print(f"   Matched keywords: {matched_keywords[:3]}")
+        # Show which keyword matched (and where)
+        matches = config.supermarket_filter.find_all(caption)
+        if matches:
+            print(f"   Matched keywords: {[(m.alias, m.supermarket, m.start) for m in matches[:3]]}")
     
     print()
     
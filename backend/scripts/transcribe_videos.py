@@ -18,7 +18,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
 from app.services.video_downloader import TikTokVideoDownloader
-from app.services.transcription import transcribe_video_audio
+from app.services.transcription import transcribe_video_audio, prompt_context_terms, influencer_history
 
 
 async def transcribe_pending_videos(username: str = None):
@@ -104,7 +104,9 @@ async def transcribe_pending_videos(username: str = None):
                 continue
             
             # Step 2: Transcribe
-            transcription_result = transcribe_video_audio(audio_path)
+            history = await influencer_history(db, video.get("tiktok_handle"))
+            context_terms = prompt_context_terms(video.get("caption", ""), history)
+            transcription_result = transcribe_video_audio(audio_path, context_terms)
             
             # Step 3: Update database
             if transcription_result['status'] == 'success':
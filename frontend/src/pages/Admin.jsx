@@ -93,32 +93,25 @@ const Admin = () => {
     try {
       setIsProcessing(true);
       
-      // Simulate progress updates (actual processing happens on backend)
-      setProcessingMessage('📥 Downloading video...');
-      
-      // Start the API call
-      const apiPromise = adminApi.addTikTokPost(tiktokUrl);
-      
-      // Simulate progress messages while waiting
-      const progressSteps = [
-        { delay: 3000, message: '🎤 Transcribing audio with Whisper...' },
-        { delay: 8000, message: '🤖 Extracting wine data with AI...' },
-        { delay: 12000, message: '🔍 Finding optimal frame times...' },
-        { delay: 15000, message: '📸 Extracting frames from video...' },
-        { delay: 20000, message: '☁️ Uploading images to Cloudinary...' },
-        { delay: 25000, message: '💾 Saving to database...' }
-      ];
-      
-      progressSteps.forEach(({ delay, message }) => {
-        setTimeout(() => {
-          if (isProcessing) {
-            setProcessingMessage(message);
-          }
-        }, delay);
+      setProcessingMessage('⏳ Queued for processing...');
+
+      // Processing runs as a backend job; show its current stage while polling
+      const stageMessages = {
+        metadata: '🔗 Fetching video metadata...',
+        download: '📥 Downloading video...',
+        transcribe: '🎤 Transcribing audio with Whisper...',
+        extract: '🤖 Extracting wine data with AI...',
+        frames: '📸 Extracting frames from video...',
+        upload: '☁️ Uploading images to Cloudinary...',
+        save: '💾 Saving to database...'
+      };
+
+      const result = await adminApi.addTikTokPost(tiktokUrl, (job) => {
+        if (stageMessages[job.stage]) {
+          setProcessingMessage(stageMessages[job.stage]);
+        }
       });
       
-      const result = await apiPromise;
-      
       setProcessingMessage('');
       setTiktokUrl('');
       await loadWines();
@@ -5,6 +5,9 @@ const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000
 const IS_PRODUCTION = import.meta.env.VITE_USE_STATIC_DATA === 'true'; // Only use static data if explicitly set
 const GITHUB_PAGES_BASE = import.meta.env.BASE_URL || '/vinly';
 
+// Largest page /api/wines serves (MAX_PAGE_SIZE in backend/app/api/wines.py)
+const WINES_PAGE_SIZE = 500;
+
 const api = axios.create({
   baseURL: API_BASE_URL,
   timeout: 10000,
@@ -33,12 +36,19 @@ export const fetchWines = async (supermarket = null, wineType = null) => {
       return wines;
     } else {
       // Local development: use backend API
-      const params = {};
+      const params = { limit: WINES_PAGE_SIZE };
       if (supermarket) params.supermarket = supermarket;
       if (wineType) params.type = wineType;
       
-      const response = await api.get('/api/wines', { params });
-      return response.data;
+      // The API pages by keyset cursor; follow X-Next-Cursor until the last page
+      const wines = [];
+      let cursor = null;
+      do {
+        const response = await api.get('/api/wines', { params: cursor ? { ...params, cursor } : params });
+        wines.push(...response.data);
+        cursor = response.headers['x-next-cursor'] || null;
+      } while (cursor);
+      return wines;
     }
   } catch (error) {
     console.error('Error fetching wines:', error);
@@ -126,19 +136,27 @@ export const adminApi = {
     }
   },
 
-  // Add TikTok post
-  async addTikTokPost(tiktokUrl) {
+  // Add TikTok post: queue it, then poll the job until it finishes.
+  // onProgress(job) is called with every poll so the UI can show the stage.
+  async addTikTokPost(tiktokUrl, onProgress) {
     try {
-      const response = await api.post('/api/admin/add-tiktok-post', 
+      const headers = { 'Authorization': `Bearer ${getAdminToken()}` };
+      const queued = await api.post('/api/admin/add-tiktok-post',
         { tiktok_url: tiktokUrl },
-        {
-          headers: {
-            'Authorization': `Bearer ${getAdminToken()}`
-          },
-          timeout: 120000 // 2 minutes for processing
-        }
+        { headers }
       );
-      return response.data;
+      const jobId = queued.data.job_id;
+      const deadline = Date.now() + 10 * 60 * 1000; // 10 minutes
+
+      while (Date.now() < deadline) {
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        const response = await api.get(`/api/admin/jobs/${jobId}`, { headers });
+        const job = response.data;
+        if (onProgress) onProgress(job);
+        if (job.status === 'succeeded') return job.result;
+        if (job.status === 'failed') throw new Error(job.error || 'Processing failed');
+      }
+      throw new Error('Timed out waiting for processing to finish');
     } catch (error) {
       console.error('Error adding TikTok post:', error);
       throw error;